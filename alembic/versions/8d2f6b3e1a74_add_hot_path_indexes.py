@@ -0,0 +1,58 @@
+"""Add indexes for hot query filters
+
+Revision ID: 8d2f6b3e1a74
+Revises: 1b7e5a9c0d63
+Create Date: 2026-10-17 14:31:09.557218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6b3e1a74'
+down_revision: Union[str, Sequence[str], None] = '1b7e5a9c0d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# students.email and user_profiles.user_id are already covered by their unique constraints.
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    # GET /payments: one student's plans in due-date order
+    ('ix_payment_plans_student_id_due_date', 'payment_plans', ['student_id', 'due_date'], None),
+    # Invoice lookups per student, and the reminder pipeline's join
+    ('ix_invoices_student_id_due_date', 'invoices', ['student_id', 'due_date'], None),
+    # Reminder pipeline: unpaid invoices due on / before a date
+    ('ix_invoices_unpaid_due_date', 'invoices', ['due_date', 'id'], "status <> 'PAID'"),
+    ('ix_externship_status_student_id', 'externship_status', ['student_id'], None),
+    # GET /documents/list and the /auth/me documents summary
+    ('ix_documents_user_id_uploaded_at', 'documents', ['user_id', 'uploaded_at'], None),
+    # GET /documents/admin/pending: the review queue, oldest first
+    ('ix_documents_pending_review', 'documents', ['uploaded_at', 'id'],
+     "verification_status = 'pending' AND upload_status = 'complete'"),
+    # GET /auth/me?include=enrollments
+    ('ix_enrollments_user_id', 'enrollments', ['user_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so the tables stay writable while the indexes build; it
+    # cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,28 @@
+"""Add document upload status for direct-to-blob uploads
+
+Revision ID: a3f4d2c81e57
+Revises: 5c1e9a7d3b20
+Create Date: 2026-10-17 10:04:18.257390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f4d2c81e57'
+down_revision: Union[str, Sequence[str], None] = '5c1e9a7d3b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('upload_status', sa.String(length=20), server_default='complete', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('documents', 'upload_status')
@@ -0,0 +1,28 @@
+"""Add token version to users for claims-based auth revocation
+
+Revision ID: c71b0e5f9a42
+Revises: a3f4d2c81e57
+Create Date: 2026-10-17 11:37:52.613084
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71b0e5f9a42'
+down_revision: Union[str, Sequence[str], None] = 'a3f4d2c81e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,38 @@
+"""Add used action token ledger
+
+Revision ID: f4a9c3d27b15
+Revises: e2d8b6a41c09
+Create Date: 2026-10-17 13:05:44.270519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a9c3d27b15'
+down_revision: Union[str, Sequence[str], None] = 'e2d8b6a41c09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('used_action_tokens',
+    sa.Column('jti', sa.String(length=32), nullable=False),
+    sa.Column('purpose', sa.String(length=50), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index(op.f('ix_used_action_tokens_expires_at'), 'used_action_tokens', ['expires_at'], unique=False)
+    # Lets the purge job find expired legacy rows without a full scan
+    op.create_index('ix_verification_tokens_expires_at', 'verification_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_verification_tokens_expires_at', table_name='verification_tokens')
+    op.drop_index(op.f('ix_used_action_tokens_expires_at'), table_name='used_action_tokens')
+    op.drop_table('used_action_tokens')
@@ -1,16 +1,17 @@
 import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Protocol, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from models import User
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from services.password_pool import PasswordPoolBusy, password_pool
+from services.ttl_cache import TTLCache
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this-in-production")
@@ -18,16 +19,106 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Auth mode: "claims" trusts the signed role claim and checks revocation against a
+# short-lived in-process cache; "db" loads the User row on every request.
+AUTH_MODE = os.getenv("AUTH_MODE", "claims").lower()
+# How stale a worker's view of deactivation/revocation may get (other workers'
+# changes are picked up within this window; this worker's own are immediate)
+AUTH_STATE_CACHE_SECONDS = float(os.getenv("AUTH_STATE_CACHE_SECONDS", "30"))
+
 # Security scheme
 security = HTTPBearer()
 
+# user_id -> (is_active, token_version)
+_auth_state_cache = TTLCache(maxsize=10000, ttl=AUTH_STATE_CACHE_SECONDS)
+
+class CurrentUser(Protocol):
+    """
+    What the get_current_* dependencies return: an AuthenticatedUser in claims
+    mode, the User row in db mode. Only these attributes are available in both;
+    anything else (profile, token_version, is_verified, relationships) must be
+    loaded from the database by id.
+    """
+    id: int
+    email: Optional[str]
+    role: str
+    is_active: bool
+
+@dataclass
+class AuthenticatedUser:
+    """The current user as described by a verified access token."""
+    id: int
+    email: Optional[str]
+    role: str
+    is_active: bool = True
+
+def token_claims(user: User) -> Dict[str, Any]:
+    """Claims embedded in access and refresh tokens for a user."""
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "ver": user.token_version or 0,
+    }
+
+def invalidate_auth_state(user_id: int) -> None:
+    """
+    Drop a user's cached revocation/deactivation state. ORM updates to a User do
+    this automatically; bulk query.update() calls must call it themselves.
+    """
+    _auth_state_cache.delete(user_id)
+
+@event.listens_for(User, "before_update")
+def _revoke_tokens_on_password_change(mapper, connection, target):
+    """
+    Changing the password revokes every token issued before it. So does a role
+    change, since refresh reissues access tokens from the claims it carries.
+    """
+    attrs = inspect(target).attrs
+    if attrs.password_hash.history.has_changes() or attrs.role.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
+
+@event.listens_for(User, "after_update")
+def _invalidate_auth_state_on_update(mapper, connection, target):
+    invalidate_auth_state(target.id)
+    # Again after commit, in case a concurrent request re-cached the old state meanwhile
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_state_stale", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_auth_state_after_commit(session):
+    for user_id in session.info.pop("auth_state_stale", ()):
+        invalidate_auth_state(user_id)
+
+def _password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests in progress. Please retry shortly.",
+        headers={"Retry-After": "1"}
+    )
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a plaintext password against its hash on the password pool.
+    Returns (valid, new_hash); new_hash is set when the stored hash should be
+    upgraded to the current bcrypt cost.
+    """
+    try:
+        return password_pool.verify_and_update(plain_password, hashed_password)
+    except PasswordPoolBusy:
+        raise _password_pool_busy()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plaintext password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
     """Hash a password for storing in the database."""
-    return pwd_context.hash(password)
+    try:
+        return password_pool.hash(password)
+    except PasswordPoolBusy:
+        raise _password_pool_busy()
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -68,31 +159,114 @@ def verify_token(token: str, expected_type: str = "access") -> Dict[str, Any]:
             detail="Could not validate credentials"
         )
 
+def _user_id_from(payload: Dict[str, Any]) -> int:
+    user_id = payload.get("user_id")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    return user_id
+
+def _check_auth_state(payload: Dict[str, Any], state: Optional[Tuple[bool, int]]) -> AuthenticatedUser:
+    """Build the current user from token claims plus its (cached) revocation state."""
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    is_active, token_version = state
+    if payload.get("ver", 0) != token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return AuthenticatedUser(
+        id=payload["user_id"],
+        email=payload.get("email"),
+        role=payload["role"],
+        is_active=is_active
+    )
+
+def load_auth_state(db: Session, user_id: int) -> Optional[Tuple[bool, int]]:
+    """(is_active, token_version) for a user, from the in-process cache when fresh."""
+    state = _auth_state_cache.get(user_id)
+    if state is None:
+        row = db.query(User.is_active, User.token_version).filter(User.id == user_id).first()
+        if row is not None:
+            state = (row.is_active, row.token_version)
+            _auth_state_cache.set(user_id, state)
+    return state
+
+def _use_claims(payload: Dict[str, Any]) -> bool:
+    # Tokens issued before claims were added carry no role; they fall back to the DB path
+    return AUTH_MODE == "claims" and "role" in payload
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
-    token = credentials.credentials
-    payload = verify_token(token)
+) -> CurrentUser:
+    """
+    Get the current authenticated user from JWT token.
 
-    user_id: int = payload.get("user_id")
-    if user_id is None:
+    In claims mode this returns an AuthenticatedUser built from the token and
+    usually makes no database round trip; in db mode it returns the User row.
+    Either way, rely only on the CurrentUser attributes (id, email, role,
+    is_active).
+    """
+    payload = verify_token(credentials.credentials)
+    user_id = _user_id_from(payload)
+
+    if _use_claims(payload):
+        return _check_auth_state(payload, load_auth_state(db, user_id))
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
+            detail="User not found"
+        )
+    if payload.get("ver", 0) != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """Async variant of get_current_user for async def handlers."""
+    payload = verify_token(credentials.credentials)
+    user_id = _user_id_from(payload)
+
+    if _use_claims(payload):
+        state = _auth_state_cache.get(user_id)
+        if state is None:
+            result = await db.execute(select(User.is_active, User.token_version).where(User.id == user_id))
+            row = result.first()
+            if row is not None:
+                state = (row.is_active, row.token_version)
+                _auth_state_cache.set(user_id, state)
+        return _check_auth_state(payload, state)
+
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    if payload.get("ver", 0) != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
 
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Get the current active user (not suspended)."""
     if not current_user.is_active:
         raise HTTPException(
@@ -101,9 +275,18 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         )
     return current_user
 
+async def get_current_active_user_async(current_user: CurrentUser = Depends(get_current_user_async)) -> CurrentUser:
+    """Async variant of get_current_active_user."""
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return current_user
+
 def require_role(required_role: str):
     """Decorator to require a specific user role."""
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    def role_checker(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -113,11 +296,11 @@ def require_role(required_role: str):
     return role_checker
 
 # Convenience functions for common roles
-def get_current_student(current_user: User = Depends(require_role("student"))) -> User:
+def get_current_student(current_user: CurrentUser = Depends(require_role("student"))) -> CurrentUser:
     return current_user
 
-def get_current_instructor(current_user: User = Depends(require_role("instructor"))) -> User:
+def get_current_instructor(current_user: CurrentUser = Depends(require_role("instructor"))) -> CurrentUser:
     return current_user
 
-def get_current_admin(current_user: User = Depends(require_role("admin"))) -> User:
+def get_current_admin(current_user: CurrentUser = Depends(require_role("admin"))) -> CurrentUser:
     return current_user
\ No newline at end of file
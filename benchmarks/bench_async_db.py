@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_async_db.py
+
+Compares GET /payments served by the async (asyncpg) handler against the same
+query on the old threadpool model (sync def + SessionLocal), under concurrent
+load. Needs DATABASE_URL pointing at a seeded Postgres (see seed.py).
+
+Usage:
+  python -m benchmarks.bench_async_db [concurrency] [seconds] [student_id]
+"""
+import asyncio
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import PaymentPlan
+from routers.payments import router as payments_router
+
+HOST = "127.0.0.1"
+PORT = 8767
+
+app = FastAPI()
+app.include_router(payments_router, prefix="/async/payments")
+
+
+@app.get("/threadpool/payments")
+def threadpool_payments(student_id: int = Query(...), db: Session = Depends(get_db)):
+    plans = (
+        db.query(PaymentPlan)
+        .filter(PaymentPlan.student_id == student_id)
+        .order_by(PaymentPlan.due_date)
+        .all()
+    )
+    return [{"student_id": p.student_id, "amount": p.amount, "due_date": p.due_date.isoformat()} for p in plans]
+
+
+async def load(path: str, concurrency: int, seconds: float, student_id: int):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{PORT}", limits=limits) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                resp = await client.get(path, params={"student_id": student_id})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(f"{path:24} {len(latencies) / seconds:8.1f} req/s   p99={p99 * 1000:.1f}ms")
+
+
+def main(concurrency: int, seconds: int, student_id: int):
+    server = uvicorn.Server(uvicorn.Config(app, host=HOST, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        for path in ("/threadpool/payments", "/async/payments/"):
+            asyncio.run(load(path, concurrency, seconds, student_id))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    defaults = [100, 10, 1]
+    main(*(args + defaults[len(args):]))
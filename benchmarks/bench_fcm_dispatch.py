@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_fcm_dispatch.py
+
+Compares one-message-at-a-time sending (the old _send_push loop) against
+services.notification_dispatcher.NotificationDispatcher, both pointed at the
+local FCM stub through HttpV1Transport.
+
+Usage:
+  python -m benchmarks.bench_fcm_dispatch [message_count]
+"""
+import sys
+import threading
+import time
+
+import uvicorn
+
+from benchmarks.fcm_stub import app
+from services.notification_dispatcher import HttpV1Transport, NotificationDispatcher, PushMessage
+
+HOST = "127.0.0.1"
+PORT = 8766
+BASE_URL = f"http://{HOST}:{PORT}"
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host=HOST, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main(count: int):
+    server = start_stub()
+    # Every 20th token is stale, to exercise invalid-token collection
+    messages = [
+        PushMessage(token=f"{'dead' if n % 20 == 0 else 'live'}-{n}", title="Payment Due Soon", body="bench")
+        for n in range(count)
+    ]
+
+    try:
+        serial = HttpV1Transport(BASE_URL, "stub-project", "stub-token", concurrency=1)
+        started = time.perf_counter()
+        for message in messages:
+            serial.send_batch([message])
+        elapsed = time.perf_counter() - started
+        serial.close()
+        print(f"serial send:  {count} messages in {elapsed:.2f}s ({count / elapsed:.1f} msg/s)")
+
+        transport = HttpV1Transport(BASE_URL, "stub-project", "stub-token", concurrency=64)
+        report = NotificationDispatcher(transport).dispatch(messages)
+        transport.close()
+        print(f"dispatcher:   {report.summary()}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_logging.py
+
+Measures what logging costs the thread doing the logging, at production
+volume: --threads request threads each emit --lines lines while stdout is
+slowed to --sink-latency-us per write (a container log pipe under
+backpressure). Compares:
+
+- print:        the old emoji print() lines
+- sync json:    StreamHandler + JsonFormatter, written on the calling thread
+- queue json:   DroppingQueueHandler + QueueListener (services.logging_config)
+- debug off:    logger.debug(...) with DEBUG disabled
+- debug 1%:     logger.debug(...) with DEBUG enabled and 1% sampling, via the queue
+
+and reports per-call p50 / p99 latency and throughput on the calling
+threads, plus how long the queue took to drain and how many records it
+dropped.
+
+Usage:
+  python -m benchmarks.bench_logging [--threads N] [--lines N] [--sink-latency-us US] [--queue-size N]
+"""
+import argparse
+import logging
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from logging.handlers import QueueListener
+
+from services.logging_config import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestContextFilter,
+    request_id_var,
+)
+
+
+class SlowSink:
+    """A stdout stand-in that takes latency_s per write, like a full pipe."""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self._devnull = open(os.devnull, "w")
+        self._lock = threading.Lock()
+
+    def write(self, data: str) -> int:
+        with self._lock:
+            if self.latency_s:
+                time.sleep(self.latency_s)
+            return self._devnull.write(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def run_threads(threads: int, lines: int, emit):
+    """Run emit(i) lines times on each thread; returns (per-call latencies, wall seconds)."""
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n: int):
+        request_id_var.set(f"req-{n}")
+        out = latencies[n]
+        barrier.wait()
+        for i in range(lines):
+            started = time.perf_counter()
+            emit(i)
+            out.append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in pool:
+        t.join()
+    return [x for per_thread in latencies for x in per_thread], time.perf_counter() - started
+
+
+def report(name: str, latencies, wall: float, extra: str = ""):
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered) * 1e6
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1e6
+    print(f"{name:<12} p50 {p50:9.1f}µs  p99 {p99:9.1f}µs  {len(ordered) / wall:>11,.0f} lines/s  {extra}")
+
+
+def make_logger(name: str, handler: logging.Handler, level: int) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--sink-latency-us", type=float, default=20.0)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    sink = SlowSink(args.sink_latency_us / 1e6)
+    print(f"{args.threads} threads x {args.lines} lines, sink latency {args.sink_latency_us:.0f}µs/write\n")
+
+    # print(): what the jobs and services used to do
+    real_stdout = sys.stdout
+    sys.stdout = sink
+    try:
+        latencies, wall = run_threads(args.threads, args.lines, lambda i: print(
+            f"✅ Reminder queued for Student {i} for invoice due 2026-10-20"))
+    finally:
+        sys.stdout = real_stdout
+    report("print", latencies, wall)
+
+    # Synchronous handler: formatting and the write happen on the calling thread
+    sync_handler = logging.StreamHandler(sink)
+    sync_handler.setFormatter(JsonFormatter())
+    sync_handler.addFilter(RequestContextFilter(1.0))
+    logger = make_logger("sync", sync_handler, logging.INFO)
+    latencies, wall = run_threads(args.threads, args.lines, lambda i: logger.info(
+        "Reminder queued", extra={"student_id": i, "invoice_id": i, "due_date": "2026-10-20"}))
+    report("sync json", latencies, wall)
+
+    # Queue handler: the calling thread only enqueues
+    def queued(name: str, level: int, sample_rate: float):
+        output = logging.StreamHandler(sink)
+        output.setFormatter(JsonFormatter())
+        handler = DroppingQueueHandler(queue.Queue(maxsize=args.queue_size))
+        handler.addFilter(RequestContextFilter(sample_rate))
+        listener = QueueListener(handler.queue, output)
+        listener.start()
+        return make_logger(name, handler, level), handler, listener
+
+    logger, handler, listener = queued("queue", logging.INFO, 1.0)
+    latencies, wall = run_threads(args.threads, args.lines, lambda i: logger.info(
+        "Reminder queued", extra={"student_id": i, "invoice_id": i, "due_date": "2026-10-20"}))
+    drain_started = time.perf_counter()
+    listener.stop()
+    report("queue json", latencies, wall,
+           f"(drain {time.perf_counter() - drain_started:.2f}s, dropped {handler.dropped})")
+
+    # DEBUG lines: disabled, then enabled with 1% sampling
+    logger, handler, listener = queued("debug_off", logging.INFO, 1.0)
+    latencies, wall = run_threads(args.threads, args.lines, lambda i: logger.debug(
+        "Invoice state", extra={"invoice_id": i, "delta_days": 3}))
+    listener.stop()
+    report("debug off", latencies, wall)
+
+    logger, handler, listener = queued("debug_sampled", logging.DEBUG, 0.01)
+    latencies, wall = run_threads(args.threads, args.lines, lambda i: logger.debug(
+        "Invoice state", extra={"invoice_id": i, "delta_days": 3}))
+    listener.stop()
+    report("debug 1%", latencies, wall, f"(dropped {handler.dropped})")
+
+
+if __name__ == "__main__":
+    main()
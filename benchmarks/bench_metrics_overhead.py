@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_metrics_overhead.py
+
+Measures the per-request cost of MetricsMiddleware. Drives two identical
+minimal FastAPI apps, one wrapped in the middleware and one not, with
+in-process ASGI calls (no sockets, so the network doesn't drown out the
+difference), and reports the added microseconds per request. Exits non-zero
+when the overhead exceeds --budget-us.
+
+Usage:
+  python -m benchmarks.bench_metrics_overhead [--requests N] [--repeats N] [--budget-us US]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from fastapi import FastAPI
+
+from services.metrics import MetricsMiddleware
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id, "name": "item"}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def make_scope(item_id: int):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": f"/items/{item_id}", "raw_path": f"/items/{item_id}".encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app: FastAPI, requests: int) -> float:
+    """Seconds per request over `requests` sequential calls."""
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(make_scope(i % 100), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    plain, metered = build_app(False), build_app(True)
+    # Warm both (route compilation, label children, first-call allocations)
+    await run(plain, 500)
+    await run(metered, 500)
+
+    # Interleave the runs so drift (thermal, GC) hits both sides equally
+    plain_runs, metered_runs = [], []
+    for _ in range(args.repeats):
+        plain_runs.append(await run(plain, args.requests))
+        metered_runs.append(await run(metered, args.requests))
+
+    plain_us = statistics.median(plain_runs) * 1e6
+    metered_us = statistics.median(metered_runs) * 1e6
+    overhead_us = metered_us - plain_us
+    print(f"without middleware: {plain_us:8.1f}µs/request")
+    print(f"with middleware:    {metered_us:8.1f}µs/request")
+    print(f"overhead:           {overhead_us:8.1f}µs/request (budget {args.budget_us:.0f}µs)")
+    if overhead_us > args.budget_us:
+        sys.exit(f"metrics middleware overhead {overhead_us:.1f}µs exceeds {args.budget_us:.0f}µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
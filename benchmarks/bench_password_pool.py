@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_password_pool.py
+
+Measures login-shaped bcrypt throughput through services.password_pool for a
+range of BCRYPT_ROUNDS values, with many concurrent request threads, so the
+cost can be tuned against the login rate we need to sustain at term start.
+Also reports how many requests were turned away by admission control.
+
+Usage:
+  python -m benchmarks.bench_password_pool [threads] [logins_per_thread] [rounds,...]
+"""
+import os
+import sys
+import threading
+import time
+
+from passlib.context import CryptContext
+
+from services.password_pool import PasswordPool, PasswordPoolBusy
+
+
+def run(rounds: int, threads: int, logins: int):
+    stored = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds).hash("correct horse")
+    # Worker processes are spawned fresh, so they pick the cost up from the environment
+    os.environ["BCRYPT_ROUNDS"] = str(rounds)
+    pool = PasswordPool()
+    pool.verify_and_update("correct horse", stored)  # start the worker processes
+    latencies, busy = [], [0]
+
+    def worker():
+        for _ in range(logins):
+            started = time.perf_counter()
+            try:
+                pool.verify_and_update("correct horse", stored)
+                latencies.append(time.perf_counter() - started)
+            except PasswordPoolBusy:
+                busy[0] += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] if latencies else 0.0
+    print(f"rounds={rounds:2d}  {len(latencies) / elapsed:7.1f} logins/s  p99={p99 * 1000:7.1f}ms  "
+          f"rejected={busy[0]}  max_pending_seen={pool.max_pending_seen}/{pool.max_pending}")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    logins = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rounds = [int(r) for r in sys.argv[3].split(",")] if len(sys.argv) > 3 else [10, 11, 12]
+    for r in rounds:
+        run(r, threads, logins)
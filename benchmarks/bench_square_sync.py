@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_square_sync.py
+
+Compares the legacy serial status check (one requests.get per invoice, no
+connection reuse) against services.square_sync.SquareInvoiceSync, both pointed
+at the local Square stub.
+
+Usage:
+  python -m benchmarks.bench_square_sync [invoice_count]
+"""
+import sys
+import threading
+import time
+
+import requests
+import uvicorn
+
+from benchmarks.square_stub import STUB_LOCATION_ID, app, invoice_id
+from services.square_sync import SquareInvoiceSync
+
+HOST = "127.0.0.1"
+PORT = 8765
+BASE_URL = f"http://{HOST}:{PORT}"
+
+
+def start_stub() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host=HOST, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def legacy_serial(ids) -> float:
+    started = time.perf_counter()
+    for inv_id in ids:
+        resp = requests.get(f"{BASE_URL}/v2/invoices/{inv_id}", timeout=10)
+        resp.raise_for_status()
+        resp.json().get("invoice", {}).get("status", "").upper() == "PAID"
+    return time.perf_counter() - started
+
+
+def main(count: int):
+    server = start_stub()
+    ids = [invoice_id(n) for n in range(count)]
+
+    try:
+        legacy = legacy_serial(ids)
+        print(f"legacy serial:     {count} invoices in {legacy:.2f}s ({count / legacy:.1f} inv/s)")
+
+        for label, locations in (("retrieve only:    ", []), ("list + retrieve:  ", [STUB_LOCATION_ID])):
+            engine = SquareInvoiceSync("stub-token", base_url=BASE_URL, location_ids=locations)
+            statuses = engine.sync(ids)
+            assert len(statuses) == count, engine.stats.errors[:5]
+            print(f"{label} {engine.stats.summary()}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/bench_startup.py
+
+Tracks cold-start cost: imports main.py in fresh interpreters under
+`python -X importtime`, and reports the median total import time, the
+slowest modules (cumulative), and how long the app takes from process start
+until it has finished its startup (lifespan) with warm-up off.
+
+Save a baseline on main and compare a branch against it; the run fails when
+the median import time regresses by more than --threshold percent.
+
+Usage:
+  python -m benchmarks.bench_startup [--runs N] [--top N] [--save FILE] [--baseline FILE] [--threshold PCT]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STARTUP_SNIPPET = """
+import asyncio, time
+started = time.perf_counter()
+import main
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+asyncio.run(run())
+print(f"STARTUP {time.perf_counter() - started:.6f}")
+"""
+
+
+def parse_importtime(stderr: str):
+    """Return {module: cumulative_us} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        # "import time:  <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+def run_once():
+    env = dict(os.environ, STARTUP_WARMUP="off")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # any value disables writing .pyc files
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SNIPPET],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"startup failed:\n{proc.stderr[-3000:]}")
+    modules = parse_importtime(proc.stderr)
+    startup = next(float(line.split()[1]) for line in proc.stdout.splitlines() if line.startswith("STARTUP "))
+    return modules, startup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    run_once()  # compile bytecode so every measured run is a warm-disk, cold-interpreter start
+    runs = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(m.get("main", 0) for m, _ in runs) / 1000
+    startup_ms = statistics.median(s for _, s in runs) * 1000
+    slowest = sorted(runs[-1][0].items(), key=lambda kv: kv[1], reverse=True)
+
+    print(f"import main: {import_ms:.1f}ms median over {args.runs} runs; import + lifespan startup: {startup_ms:.1f}ms")
+    print("\nslowest top-level imports (cumulative):")
+    top_level = [(name, us) for name, us in slowest if "." not in name and name != "main"]
+    for name, us in top_level[:args.top]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    result = {"import_ms": round(import_ms, 1), "startup_ms": round(startup_ms, 1),
+              "top": {name: us for name, us in top_level[:args.top]}}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nsaved baseline to {args.save}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        change = (import_ms - baseline["import_ms"]) / baseline["import_ms"] * 100
+        print(f"\nvs baseline: {baseline['import_ms']:.1f}ms → {import_ms:.1f}ms ({change:+.1f}%)")
+        for name, us in top_level[:args.top]:
+            before = baseline["top"].get(name)
+            if before is None or us > before * (1 + args.threshold / 100):
+                print(f"  {'new' if before is None else 'slower'}: {name} {us / 1000:.1f}ms")
+        if change > args.threshold:
+            sys.exit(f"import time regressed by {change:.1f}% (threshold {args.threshold}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/explain_hot_queries.py
+
+Replays the queries behind our hot endpoints with EXPLAIN (ANALYZE, BUFFERS)
+against a seeded local Postgres and flags sequential scans on tables big
+enough for one to matter. Run it after seeding (seed.py,
+generate_test_invoices.py) and after adding or changing a query; it exits 1
+when something is flagged, so it can gate a CI job.
+
+Every statement runs inside a transaction that is rolled back.
+
+Usage:
+  python -m benchmarks.explain_hot_queries [--min-rows N] [--verbose]
+"""
+import json
+import sys
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from database import SessionLocal
+from models import (
+    Document,
+    Enrollment,
+    ExternshipStatus,
+    Invoice,
+    PaymentPlan,
+    Student,
+    User,
+)
+from services.reminder_pipeline import actionable_invoices_query
+
+# Tables estimated below this many rows are fine to seq scan
+DEFAULT_MIN_ROWS = 1000
+
+
+def sample_ids(db):
+    """Pick real keys so the planner sees realistic selectivity."""
+    student_id = db.scalar(
+        select(Invoice.student_id).group_by(Invoice.student_id).order_by(func.count().desc()).limit(1)
+    ) or db.scalar(select(Student.id).limit(1)) or 1
+    user_id = db.scalar(
+        select(Document.user_id).group_by(Document.user_id).order_by(func.count().desc()).limit(1)
+    ) or db.scalar(select(User.id).limit(1)) or 1
+    email = db.scalar(select(Student.email).where(Student.id == student_id)) or "student@example.com"
+    return student_id, user_id, email
+
+
+def hot_queries(db):
+    """(label, statement) pairs mirroring the endpoint and job queries."""
+    student_id, user_id, email = sample_ids(db)
+    return [
+        ("GET /auth/login (legacy)", select(Student).where(Student.email == email)),
+        ("GET /auth/me", select(User).options(joinedload(User.profile)).where(User.id == user_id)),
+        ("GET /auth/me?include=enrollments", select(Enrollment).where(Enrollment.user_id == user_id)),
+        ("GET /auth/me?include=documents_summary",
+         select(Document.verification_status, func.count())
+         .where(Document.user_id == user_id, Document.upload_status == "complete")
+         .group_by(Document.verification_status)),
+        ("GET /payments",
+         select(PaymentPlan).where(PaymentPlan.student_id == student_id).order_by(PaymentPlan.due_date)),
+        ("GET /externships", select(ExternshipStatus).where(ExternshipStatus.student_id == student_id)),
+        ("GET /documents/list",
+         select(Document).where(Document.user_id == user_id, Document.upload_status == "complete")),
+        ("GET /documents/admin/pending",
+         select(Document)
+         .where(Document.verification_status == "pending", Document.upload_status == "complete")
+         .order_by(Document.uploaded_at, Document.id)),
+        ("student invoices", select(Invoice).where(Invoice.student_id == student_id).order_by(Invoice.due_date)),
+        ("reminder pipeline", actionable_invoices_query(db, date.today()).statement),
+    ]
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def table_rows(db, table: str) -> float:
+    """The planner's row estimate for a table (kept current by autovacuum/ANALYZE)."""
+    return db.connection().exec_driver_sql(
+        "SELECT reltuples FROM pg_class WHERE relname = %(name)s", {"name": table}
+    ).scalar() or 0
+
+
+def explain(db, statement):
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    row = db.connection().exec_driver_sql(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + str(compiled), compiled.params
+    ).scalar()
+    return (json.loads(row) if isinstance(row, str) else row)[0]
+
+
+def main(min_rows: int = DEFAULT_MIN_ROWS, verbose: bool = False) -> int:
+    db = SessionLocal()
+    flagged = 0
+    try:
+        for label, statement in hot_queries(db):
+            result = explain(db, statement)
+            plan = result["Plan"]
+            seq_scans = [
+                node for node in walk(plan)
+                if node["Node Type"] == "Seq Scan" and table_rows(db, node["Relation Name"]) >= min_rows
+            ]
+            mark = "SEQ SCAN" if seq_scans else "ok"
+            print(f"{mark:<9} {label:<40} {result['Execution Time']:>9.2f}ms  top node: {plan['Node Type']}")
+            for node in seq_scans:
+                flagged += 1
+                print(f"          ↳ seq scan on {node['Relation Name']} "
+                      f"(~{int(table_rows(db, node['Relation Name']))} rows, "
+                      f"filter: {node.get('Filter', '-')}, removed: {node.get('Rows Removed by Filter', 0)})")
+            if verbose:
+                print(json.dumps(plan, indent=2, default=str))
+    finally:
+        db.rollback()
+        db.close()
+
+    print(f"\n{flagged} sequential scan(s) on tables with ≥ {min_rows} rows")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    min_rows = int(args[args.index("--min-rows") + 1]) if "--min-rows" in args else DEFAULT_MIN_ROWS
+    sys.exit(main(min_rows, verbose="--verbose" in args))
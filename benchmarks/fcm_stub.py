@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/fcm_stub.py
+
+Minimal local stand-in for the FCM HTTP v1 send endpoint, used to benchmark
+services.notification_dispatcher without talking to Google.
+
+Serves:
+  POST /v1/projects/{project_id}/messages:send
+
+Tokens starting with "dead-" are answered with an UNREGISTERED error, the way
+FCM reports uninstalled apps. STUB_LATENCY_MS adds a per-request delay.
+
+Run standalone:
+  uvicorn benchmarks.fcm_stub:app --port 8766
+"""
+import asyncio
+import itertools
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "40"))
+
+app = FastAPI(title="FCM stub")
+_ids = itertools.count()
+
+
+@app.post("/v1/projects/{project_id}/messages:send")
+async def send(project_id: str, request: Request):
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    message = (await request.json()).get("message", {})
+    if message.get("token", "").startswith("dead-"):
+        return JSONResponse(status_code=404, content={
+            "error": {
+                "code": 404,
+                "message": "Requested entity was not found.",
+                "status": "NOT_FOUND",
+                "details": [{
+                    "@type": "type.googleapis.com/google.firebase.fcm.v1.FcmError",
+                    "errorCode": "UNREGISTERED",
+                }],
+            }
+        })
+    return {"name": f"projects/{project_id}/messages/{next(_ids)}"}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/load_db_pool.py
+
+Hammers the shared engine from many threads (the way FastAPI's threadpool does
+under load) and reports pool behaviour: checkout waits, overflow use and
+timeouts. Point DATABASE_URL at a local Postgres and tune DB_POOL_SIZE /
+DB_MAX_OVERFLOW / DB_POOL_TIMEOUT to see their effect.
+
+Usage:
+  python -m benchmarks.load_db_pool [threads] [requests_per_thread] [query_ms]
+"""
+import statistics
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+from database import SessionLocal, engine, pool_metrics, pool_status
+
+
+def worker(requests: int, query_ms: int, latencies: list, errors: list, peak: dict):
+    for _ in range(requests):
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": query_ms / 1000})
+            peak["overflow"] = max(peak["overflow"], max(engine.pool.overflow(), 0))
+            peak["checked_out"] = max(peak["checked_out"], engine.pool.checkedout())
+        except Exception as e:
+            errors.append(type(e).__name__)
+        finally:
+            db.close()
+        latencies.append(time.perf_counter() - started)
+
+
+def main(threads: int, requests: int, query_ms: int):
+    pool_metrics.reset()
+    latencies, errors = [], []
+    peak = {"overflow": 0, "checked_out": 0}
+
+    started = time.perf_counter()
+    pool = [
+        threading.Thread(target=worker, args=(requests, query_ms, latencies, errors, peak))
+        for _ in range(threads)
+    ]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    status = pool_status()
+    print(f"{threads} threads x {requests} requests, {query_ms} ms queries: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms")
+    print(f"pool: size={status.get('pool_size')} max_overflow={status.get('max_overflow')} "
+          f"peak_checked_out={peak['checked_out']} peak_overflow={peak['overflow']}")
+    avg_wait = status["wait_seconds_total"] / max(status["checkouts"], 1)
+    print(f"checkouts={status['checkouts']} avg_wait={avg_wait * 1000:.2f}ms max_wait={status['wait_seconds_max'] * 1000:.2f}ms "
+          f"timeouts={status['timeouts']} connects={status['connects']} errors={len(errors)}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    defaults = [40, 25, 20]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/load_rate_limit.py
+
+Simulates a credential-stuffing burst against a bcrypt-backed login endpoint
+while legitimate users keep logging in and polling a cheap endpoint, with the
+rate limiter off and then on. Reports legitimate-user p99 and how many
+attacker requests were throttled.
+
+Attackers come from a handful of IPs, each legitimate user from their own,
+set via a single X-Forwarded-For entry (the bench client plays App Service's
+front end, the one trusted proxy hop).
+
+Usage:
+  python -m benchmarks.load_rate_limit [attack_concurrency] [seconds]
+"""
+import asyncio
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from services.password_pool import PasswordPool, PasswordPoolBusy, pwd_context
+from services.rate_limit import MemoryBucketStore, RateLimiter, RateLimitMiddleware
+
+HOST = "127.0.0.1"
+PORT = 8768
+STORED_HASH = pwd_context.hash("correct horse")
+
+
+class Login(BaseModel):
+    email: str
+    password: str
+
+
+def build_app(enabled: bool) -> FastAPI:
+    app = FastAPI()
+    limiter = RateLimiter(store=MemoryBucketStore(), enabled=enabled)
+    pool = PasswordPool()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.post("/auth/login")
+    def login(body: Login):
+        limiter.enforce_email("login", body.email)
+        try:
+            ok, _ = pool.verify_and_update(body.password, STORED_HASH)
+        except PasswordPoolBusy:
+            return {"ok": False, "busy": True}
+        return {"ok": ok}
+
+    @app.get("/students/1")
+    def student():
+        return {"id": 1}
+
+    app.state.limiter = limiter
+    return app
+
+
+async def run(app: FastAPI, attack_concurrency: int, seconds: float, port: int):
+    server = uvicorn.Server(uvicorn.Config(app, host=HOST, port=port, log_level="warning",
+                                           proxy_headers=True, forwarded_allow_ips="*"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    deadline = time.perf_counter() + seconds
+    legit, attack_codes = [], {}
+
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{port}", timeout=30) as client:
+        async def attacker(n):
+            headers = {"X-Forwarded-For": f"10.66.0.{n % 4}"}
+            while time.perf_counter() < deadline:
+                resp = await client.post("/auth/login", headers=headers,
+                                         json={"email": f"victim{n}@example.com", "password": "guess"})
+                attack_codes[resp.status_code] = attack_codes.get(resp.status_code, 0) + 1
+
+        async def user(n):
+            headers = {"X-Forwarded-For": f"192.168.1.{n}"}
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get("/students/1", headers=headers)
+                await client.post("/auth/login", headers=headers,
+                                  json={"email": f"user{n}@example.com", "password": "correct horse"})
+                legit.append(time.perf_counter() - started)
+                await asyncio.sleep(2)
+
+        await asyncio.gather(*(attacker(n) for n in range(attack_concurrency)), *(user(n) for n in range(20)))
+
+    server.should_exit = True
+    legit.sort()
+    p99 = legit[max(int(len(legit) * 0.99) - 1, 0)] if legit else 0.0
+    print(f"limiter={'on ' if app.state.limiter.enabled else 'off'}  legit p99={p99 * 1000:.0f}ms  "
+          f"attacker responses={dict(sorted(attack_codes.items()))}  counters={app.state.limiter.stats()['login']}")
+
+
+def main(attack_concurrency: int, seconds: int):
+    for n, enabled in enumerate((False, True)):
+        asyncio.run(run(build_app(enabled), attack_concurrency, seconds, PORT + n))
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    defaults = [50, 15]
+    main(*(args + defaults[len(args):]))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script: benchmarks/square_stub.py
+
+Minimal local stand-in for the Square Invoices API, used to benchmark and test
+services.square_sync without touching the sandbox.
+
+Serves:
+  GET /v2/invoices?location_id=&limit=&cursor=   (paged ListInvoices)
+  GET /v2/invoices/{invoice_id}                   (RetrieveInvoice)
+
+Every invoice whose numeric suffix is even is reported PAID. STUB_LATENCY_MS adds
+an artificial per-request delay to mimic the real network round trip.
+
+Run standalone:
+  uvicorn benchmarks.square_stub:app --port 8765
+"""
+import asyncio
+import os
+
+from fastapi import FastAPI, HTTPException, Query
+
+STUB_INVOICE_COUNT = int(os.getenv("STUB_INVOICE_COUNT", "5000"))
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "40"))
+STUB_LOCATION_ID = "STUB_LOCATION"
+
+app = FastAPI(title="Square stub")
+
+
+def invoice_id(n: int) -> str:
+    return f"inv_{n:06d}"
+
+
+def _invoice(n: int) -> dict:
+    return {
+        "id": invoice_id(n),
+        "location_id": STUB_LOCATION_ID,
+        "status": "PAID" if n % 2 == 0 else "UNPAID",
+    }
+
+
+@app.get("/v2/invoices")
+async def list_invoices(
+    location_id: str = Query(...),
+    limit: int = Query(100, le=200),
+    cursor: str = Query(None),
+):
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    if location_id != STUB_LOCATION_ID:
+        return {"invoices": []}
+    start = int(cursor or 0)
+    end = min(start + limit, STUB_INVOICE_COUNT)
+    body = {"invoices": [_invoice(n) for n in range(start, end)]}
+    if end < STUB_INVOICE_COUNT:
+        body["cursor"] = str(end)
+    return body
+
+
+@app.get("/v2/invoices/{invoice_id}")
+async def retrieve_invoice(invoice_id: str):
+    await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    try:
+        n = int(invoice_id.rsplit("_", 1)[-1])
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    if not 0 <= n < STUB_INVOICE_COUNT:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return {"invoice": _invoice(n)}
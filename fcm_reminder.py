@@ -1,19 +1,25 @@
 
+import logging
+
 import firebase_admin
 from firebase_admin import credentials, messaging
 
+from services.reminder_pipeline import REMINDER_TITLE
+
 # Initialize Firebase Admin SDK
 if not firebase_admin._apps:
     cred = credentials.Certificate("firebase_service_key.json")
     firebase_admin.initialize_app(cred)
 
+logger = logging.getLogger(__name__)
+
 def send_push_notification(fcm_token, message):
     notification = messaging.Message(
         notification=messaging.Notification(
-            title="AADA Payment Reminder",
+            title=REMINDER_TITLE,
             body=message,
         ),
         token=fcm_token
     )
     response = messaging.send(notification)
-    print("✅ Push sent:", response)
+    logger.info("Push sent: %s", response)
@@ -1,47 +1,52 @@
+import asyncio
+import logging
 import os
-import json
-from pathlib import Path
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from firebase_admin import credentials, initialize_app
 
-print("🚀 Starting FastAPI application...")
-
-# 1) Load .env
+# 1) Load .env, then logging (LOG_LEVEL / LOG_FORMAT may come from it)
 load_dotenv()
 
-# 2) Initialize Firebase Admin from env or file
-firebase_credentials_path = os.getenv("FIREBASE_CREDENTIALS")
-firebase_credentials_file = "/app/firebase_service_key.json"
-
-if firebase_credentials_path and Path(firebase_credentials_path).exists():
-    # Standard local dev behavior
-    print(f"✅ Using Firebase credentials from local file: {firebase_credentials_path}")
-    cred = credentials.Certificate(firebase_credentials_path)
-    initialize_app(cred)
-elif os.getenv("FIREBASE_CREDENTIALS_JSON"):
-    # Azure: write FIREBASE_CREDENTIALS_JSON to file
-    print("✅ Writing Firebase credentials from environment to file...")
-    try:
-        firebase_credentials_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
-        with open(firebase_credentials_file, "w") as f:
-            f.write(firebase_credentials_json)
-        cred = credentials.Certificate(firebase_credentials_file)
-        initialize_app(cred)
-        print("✅ Firebase initialized from FIREBASE_CREDENTIALS_JSON.")
-    except Exception as e:
-        raise RuntimeError(f"❌ Failed to initialize Firebase from env: {e}")
-else:
-    raise RuntimeError("❌ Firebase credentials not found in path or env.")
+from services.logging_config import RequestIdMiddleware, configure_logging
+configure_logging()
+logger = logging.getLogger("main")
+logger.info("Starting FastAPI application")
+
+# 2) External services (database, Firebase, blob storage) register with the
+#    service registry and are initialized at startup warm-up or on first use,
+#    never at import. STARTUP_WARMUP: background (default; serve immediately),
+#    blocking (finish warm-up before serving) or off (first use only).
+from database import dispose_async_engine
+from services.registry import registry
+import services.firebase_app  # noqa: F401  (registers Firebase)
+from services.password_pool import password_pool
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up = None
+    if STARTUP_WARMUP == "blocking":
+        await registry.warm_up()
+    elif STARTUP_WARMUP == "background":
+        warm_up = asyncio.create_task(registry.warm_up())
+    yield
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    await registry.close()
+    await dispose_async_engine()
+    password_pool.shutdown()
 
 # 3) Create FastAPI
 app = FastAPI(
     title="AADA Backend API",
     version="1.0",
     description="All AADA endpoints: auth, students, payments, externships, fcm",
-    redirect_slashes=False  # 🔥 Prevents auto-redirects like 307
+    redirect_slashes=False,  # 🔥 Prevents auto-redirects like 307
+    lifespan=lifespan
 )
 
 # 4) Enable CORS
@@ -53,6 +58,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Throttle login / password-reset endpoints per IP before they reach bcrypt
+from services.rate_limit import RateLimitMiddleware
+app.add_middleware(RateLimitMiddleware)
+
+# Reject oversized uploads from Content-Length, before the multipart body is spooled
+from routers.documents import MAX_FILE_SIZE
+from services.upload_limit import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    path: MAX_FILE_SIZE + MULTIPART_OVERHEAD
+    for path in ("/documents/upload", "/documents/upload-registration")
+})
+
+# Development only: per-request SQL counts / N+1 detection in X-SQL-* headers, reports under /debug/sql
+from services.query_profiler import SQL_PROFILE, QueryProfilerMiddleware
+if SQL_PROFILE:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Added last so it is outermost: its latency covers the other middleware, and 429s are counted too
+from services.metrics import MetricsMiddleware, render_metrics
+app.add_middleware(MetricsMiddleware)
+
+# Outermost of all, so every line logged while handling a request carries its X-Request-ID
+app.add_middleware(RequestIdMiddleware)
+
 # 5) Import & include your routers
 from routers.auth        import router as auth_router
 from routers.students    import router as students_router
@@ -60,6 +89,7 @@ from routers.payments    import router as payments_router
 from routers.externships import router as externships_router
 from routers.fcm         import router as fcm_router
 from routers.documents   import router as documents_router
+from routers.health      import router as health_router
 
 app.include_router(auth_router,        prefix="/auth",        tags=["Authentication"])
 app.include_router(students_router,    prefix="/students",    tags=["Students"])
@@ -67,12 +97,27 @@ app.include_router(payments_router,    prefix="/payments",    tags=["Payments"])
 app.include_router(externships_router, prefix="/externships", tags=["Externships"])
 app.include_router(fcm_router,         prefix="/fcm",         tags=["FCM"])
 app.include_router(documents_router,   prefix="/documents",   tags=["Documents"])
+app.include_router(health_router,      prefix="/health",      tags=["Health"])
 
-# 6) Root health-check
+# Mock storage stands in for Azure's direct-upload endpoint; its routes 404 while Azure is in use
+from routers.mock_storage import router as mock_storage_router
+app.include_router(mock_storage_router, prefix="/mock-storage", tags=["Mock Storage"])
+
+if SQL_PROFILE:
+    from routers.debug import router as debug_router
+    app.include_router(debug_router, prefix="/debug", tags=["Debug"])
+
+# 6) Root health-check (static; load balancers should use /health/live and /health/ready)
 @app.get("/", tags=["Health"])
 def read_root():
     return {"message": "✅ AADA Backend API is up and running"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # 7) (Optional) trigger background tasks on startup
 # from routers.database import get_db
 # from reminder_task import daily_payment_reminder
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Text, Date, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from database import Base
 
@@ -11,9 +12,16 @@ class User(Base):
     role = Column(String(20), nullable=False, default="student")  # student, instructor, admin
     is_active = Column(Boolean, default=True, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
+    # Bumped on password or role change and on logout-all; tokens carrying an older version are rejected
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Lazy by default; hot paths choose a loader strategy explicitly (see routers/auth.py)
+    profile = relationship("UserProfile", back_populates="user", uselist=False)
+    enrollments = relationship("Enrollment", back_populates="user", order_by="Enrollment.enrollment_date")
+    documents = relationship("Document", back_populates="user", foreign_keys="Document.user_id")
+
 class UserProfile(Base):
     __tablename__ = "user_profiles"
     id = Column(Integer, primary_key=True, index=True)
@@ -33,6 +41,8 @@ class UserProfile(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    user = relationship("User", back_populates="profile")
+
 class Document(Base):
     __tablename__ = "documents"
     id = Column(Integer, primary_key=True, index=True)
@@ -42,18 +52,27 @@ class Document(Base):
     file_url = Column(Text, nullable=False)
     file_size = Column(Integer, nullable=True)
     verification_status = Column(String(20), default="pending", nullable=False)  # pending, approved, rejected
+    upload_status = Column(String(20), default="complete", server_default="complete", nullable=False)  # uploading, complete
     verified_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     verification_notes = Column(Text, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     verified_at = Column(DateTime, nullable=True)
 
+    user = relationship("User", back_populates="documents", foreign_keys=[user_id])
+
+    __table_args__ = (
+        Index("ix_documents_user_id_uploaded_at", "user_id", "uploaded_at"),
+        Index("ix_documents_pending_review", "uploaded_at", "id",
+              postgresql_where=text("verification_status = 'pending' AND upload_status = 'complete'")),
+    )
+
 class VerificationToken(Base):
     __tablename__ = "verification_tokens"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String(255), nullable=False, unique=True, index=True)
     token_type = Column(String(50), nullable=False)  # email_verification, password_reset
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     used = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -78,6 +97,11 @@ class Enrollment(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    user = relationship("User", back_populates="enrollments")
+    course = relationship("Course")
+
+    __table_args__ = (Index("ix_enrollments_user_id", "user_id"),)
+
 class JobPosting(Base):
     __tablename__ = "job_postings"
     id = Column(Integer, primary_key=True, index=True)
@@ -123,6 +147,8 @@ class PaymentPlan(Base):
     due_date = Column(Date, nullable=False)
     square_customer_id = Column(String, nullable=True)  # ← Add this line
 
+    __table_args__ = (Index("ix_payment_plans_student_id_due_date", "student_id", "due_date"),)
+
 class PaymentReminderStatus(Base):
     __tablename__ = "payment_reminders"
     id = Column(Integer, primary_key=True, index=True)
@@ -139,6 +165,8 @@ class ExternshipStatus(Base):
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     status = Column(String(30), nullable=False)
 
+    __table_args__ = (Index("ix_externship_status_student_id", "student_id"),)
+
 class Invoice(Base):
     __tablename__ = "invoices"
     id = Column(Integer, primary_key=True, index=True)
@@ -152,3 +180,53 @@ class Invoice(Base):
     late_notice_sent = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_invoices_student_id_due_date", "student_id", "due_date"),
+        Index("ix_invoices_unpaid_due_date", "due_date", "id", postgresql_where=text("status <> 'PAID'")),
+    )
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    token = Column(Text, nullable=False)
+    title = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    data = Column(Text, nullable=True)  # JSON-encoded FCM data payload
+    status = Column(String(20), default="pending", nullable=False)  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    message_id = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    allowed = Column(Boolean, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class UsedActionToken(Base):
+    """Ledger of consumed verification/reset tokens; rows outlive the token only until purged."""
+    __tablename__ = "used_action_tokens"
+    jti = Column(String(32), primary_key=True)
+    purpose = Column(String(50), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class RefreshTokenFamily(Base):
+    """
+    One login session. Each refresh rotates current_jti; presenting any older
+    token from the family means it was copied, and the whole family is revoked.
+    """
+    __tablename__ = "refresh_token_families"
+    family_id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    current_jti = Column(String(32), nullable=False)
+    previous_jti = Column(String(32), nullable=True)
+    rotated_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Script: outbox_worker.py
+
+Drains the notification_outbox table:
+- Claims due rows with SELECT ... FOR UPDATE SKIP LOCKED (safe to run many
+  workers across nodes).
+- Sends them in multicast batches via FCM.
+- Marks rows sent, or schedules a retry with exponential backoff, or marks them
+  failed after OUTBOX_MAX_ATTEMPTS / on an invalid token.
+
+Usage:
+  python outbox_worker.py          # run forever
+  python outbox_worker.py --once   # drain what is due now, then exit
+"""
+import os
+import sys
+import time
+
+from database import SessionLocal
+from services.firebase_app import initialize_firebase
+from services.notification_dispatcher import NotificationDispatcher
+from services.logging_config import configure_logging
+from services.notification_outbox import process_batch
+
+POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+
+
+def run_worker(once: bool = False):
+    # FIREBASE_CREDENTIALS / FIREBASE_CREDENTIALS_JSON, as for the API
+    initialize_firebase()
+    dispatcher = NotificationDispatcher()
+    session = SessionLocal()
+    try:
+        while True:
+            processed = process_batch(session, dispatcher)
+            if processed:
+                continue
+            if once:
+                return
+            time.sleep(POLL_SECONDS)
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    configure_logging()
+    run_worker(once="--once" in sys.argv)
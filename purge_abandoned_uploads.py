@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script: purge_abandoned_uploads.py
+
+Deletes documents rows left in upload_status "uploading" (a direct upload was
+requested but never completed) once they are older than
+ABANDONED_UPLOAD_HOURS, together with any partly uploaded blob. Such rows
+are never listed or served, but would otherwise accumulate. Safe to run
+repeatedly, e.g. from a daily cron alongside purge_auth_tokens.py.
+
+Usage:
+  python purge_abandoned_uploads.py [older_than_hours]
+"""
+import logging
+import sys
+
+from database import SessionLocal
+from services.logging_config import configure_logging
+from services.storage_service import storage_service
+from services.upload_cleanup import ABANDONED_UPLOAD_HOURS, purge_abandoned_uploads
+
+logger = logging.getLogger(__name__)
+
+
+def run_cleanup(older_than_hours: float = ABANDONED_UPLOAD_HOURS):
+    session = SessionLocal()
+    try:
+        counts = purge_abandoned_uploads(session, storage_service, older_than_hours)
+        logger.info("Abandoned uploads purged", extra={"documents": counts["documents"], "blobs": counts["blobs"],
+                                                       "older_than_hours": older_than_hours})
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    configure_logging()
+    run_cleanup(float(sys.argv[1]) if len(sys.argv) > 1 else ABANDONED_UPLOAD_HOURS)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Script: purge_auth_tokens.py
+
+Deletes auth token rows that can never be redeemed again:
+- used_action_tokens entries whose token has expired (an expired token is
+  rejected on its signature alone, so its ledger entry is no longer needed).
+- verification_tokens rows, left from before signed tokens, that have expired
+  or were already used.
+- refresh_token_families past their expiry (revoked ones included; a revoked
+  family's tokens are rejected anyway once they expire).
+
+Rows are deleted in batches, one transaction each. Safe to run repeatedly,
+e.g. from a daily cron alongside reminder_task.py.
+
+Usage:
+  python purge_auth_tokens.py [batch_size]
+"""
+import logging
+import sys
+
+from database import SessionLocal
+from services.action_tokens import PURGE_BATCH_SIZE, purge_expired_tokens
+from services.logging_config import configure_logging
+from services.refresh_tokens import purge_expired_families
+
+logger = logging.getLogger(__name__)
+
+
+def run_purge(batch_size: int = PURGE_BATCH_SIZE):
+    session = SessionLocal()
+    try:
+        counts = purge_expired_tokens(session, batch_size)
+        counts["refresh_token_families"] = purge_expired_families(session, batch_size)
+        logger.info("Expired auth tokens purged", extra=counts)
+    finally:
+        session.close()
+
+
+if __name__ == '__main__':
+    configure_logging()
+    run_purge(int(sys.argv[1]) if len(sys.argv) > 1 else PURGE_BATCH_SIZE)
@@ -11,54 +11,70 @@ Uses:
   invoices(id, student_id, due_date, amount_cents, reminder_sent, late_notice_sent)
 
 Helper:
-  fcm_reminder.send_push_notification(token, message)
+  services.notification_outbox.enqueue_pushes (sent later by outbox_worker.py)
 """
-import os
+import logging
 from datetime import date
 
 from database import SessionLocal
-from models import Student, Invoice
-from fcm_reminder import send_push_notification as send_push
+from services.notification_dispatcher import PushMessage
+from services.notification_outbox import enqueue_pushes
+from services.reminder_pipeline import (
+    REMINDER_TITLE,
+    bulk_update_invoices,
+    is_late,
+    is_upcoming,
+    load_actionable_invoices,
+)
+from services.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
 
 
 def run_reminders():
     session = SessionLocal()
     today = date.today()
+    reminder_ids, late_ids = [], []
+    pushes = []
 
-    # Process all invoices
-    invoices = session.query(Invoice).all()
-    for inv in invoices:
-        # Debug invoice state
-        delta = (inv.due_date - today).days
-        print(f"[DEBUG] Invoice {inv.id}: due={inv.due_date}, delta={delta}, reminder_sent={inv.reminder_sent}, late_notice_sent={inv.late_notice_sent}")
-
-        student = session.get(Student, inv.student_id)
-        if not student or not student.fcm_token:
-            print(f"[DEBUG] Skipping invoice {inv.id}: missing student or token")
-            continue
-
-        # Reminder: 3 days before due_date
-        if delta == 3 and not inv.reminder_sent:
-            message = f"Your payment of ${inv.amount_cents/100:.2f} is due on {inv.due_date:%Y-%m-%d}."
-            send_push(student.fcm_token, message)
-            inv.reminder_sent = True
-            inv.updated_at = today
-            print(f"✅ Reminder sent to {student.name} for invoice due {inv.due_date}")
+    try:
+        # Only the unpaid invoices due in 3 days or 2+ days late, joined to a student with a token
+        rows = load_actionable_invoices(session, today, include_square_sync=False, require_fcm_token=True)
+        for inv, student in rows:
+            # Per-invoice state; sampled, and skipped entirely unless LOG_LEVEL=DEBUG
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Invoice state", extra={
+                    "invoice_id": inv.id, "due_date": inv.due_date, "delta_days": (inv.due_date - today).days,
+                    "reminder_sent": inv.reminder_sent, "late_notice_sent": inv.late_notice_sent,
+                })
 
-        # Late notice: 2 or more days after due_date
-        elif delta <= -2 and not inv.late_notice_sent:
-            message = f"Your payment of ${inv.amount_cents/100:.2f} was due on {inv.due_date:%Y-%m-%d}. Please pay ASAP."
-            send_push(student.fcm_token, message)
-            inv.late_notice_sent = True
-            inv.updated_at = today
-            print(f"✅ Late notice sent to {student.name} for invoice due {inv.due_date}")
+            # Reminder: 3 days before due_date
+            if is_upcoming(inv, today):
+                message = f"Your payment of ${inv.amount_cents/100:.2f} is due on {inv.due_date:%Y-%m-%d}."
+                pushes.append(PushMessage(token=student.fcm_token, title=REMINDER_TITLE, body=message))
+                reminder_ids.append(inv.id)
+                logger.info("Reminder queued", extra={"student_id": student.id, "invoice_id": inv.id, "due_date": inv.due_date})
 
-        else:
-            print(f"[DEBUG] No action for invoice {inv.id} (delta={delta})")
+            # Late notice: 2 or more days after due_date
+            elif is_late(inv, today):
+                message = f"Your payment of ${inv.amount_cents/100:.2f} was due on {inv.due_date:%Y-%m-%d}. Please pay ASAP."
+                pushes.append(PushMessage(token=student.fcm_token, title=REMINDER_TITLE, body=message))
+                late_ids.append(inv.id)
+                logger.info("Late notice queued", extra={"student_id": student.id, "invoice_id": inv.id, "due_date": inv.due_date})
 
-    session.commit()
-    session.close()
+        # One UPDATE per category plus the outbox rows, one commit
+        bulk_update_invoices(session, reminder_ids, reminder_sent=True)
+        bulk_update_invoices(session, late_ids, late_notice_sent=True)
+        queued = enqueue_pushes(session, pushes)
+        session.commit()
+        logger.info("Queued %d push notifications", queued)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
 
 if __name__ == '__main__':
+    configure_logging()
     run_reminders()
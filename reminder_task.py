@@ -1,64 +1,44 @@
 # reminder_task.py
 
+import logging
 import os
-import requests
-from datetime import date, timedelta
+from datetime import date
+
+from typing import List
 
-from firebase_admin.messaging import Message, send
 from sqlalchemy.orm import Session
 
-from models import Invoice, Student
+from models import Student
+from services.notification_dispatcher import PushMessage
+from services.notification_outbox import enqueue_pushes
+from services.reminder_pipeline import (
+    bulk_update_invoices,
+    is_late,
+    is_upcoming,
+    load_actionable_invoices,
+)
+from services.square_sync import SquareInvoiceSync
+
+logger = logging.getLogger(__name__)
 
 # ────────────────────────────────────────────────────────────────────────────────
-# Configuration: read your Square credentials + version from env
+# Configuration: read your Square credentials from env
 # ────────────────────────────────────────────────────────────────────────────────
 SQUARE_TOKEN = os.getenv("SQUARE_ACCESS_TOKEN")
 if not SQUARE_TOKEN:
     raise RuntimeError("Missing SQUARE_ACCESS_TOKEN in environment")
 
-# Decide base URL based on environment
-env = os.getenv("SQUARE_ENVIRONMENT", "sandbox").lower()
-if env == "production":
-    SQUARE_BASE = "https://connect.squareup.com"
-else:
-    SQUARE_BASE = "https://connect.squareupsandbox.com"
-
-# Square API version header
-SQUARE_VERSION = os.getenv("SQUARE_API_VERSION", "2024-06-12")
-
-HEADERS = {
-    "Authorization": f"Bearer {SQUARE_TOKEN}",
-    "Square-Version": SQUARE_VERSION,
-    "Content-Type": "application/json"
-}
-
-
-def check_invoice_paid(invoice_id: str) -> bool:
-    """
-    Fetch the invoice from Square and return True if its status is PAID.
-    """
-    url = f"{SQUARE_BASE}/v2/invoices/{invoice_id}"
-    resp = requests.get(url, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
-    data = resp.json().get("invoice", {})
-    return data.get("status", "").upper() == "PAID"
+# Location(s) to page through when bulk-syncing invoice statuses
+SQUARE_LOCATION_IDS = [loc.strip() for loc in os.getenv("SQUARE_LOCATION_ID", "").split(",") if loc.strip()]
 
 
-def _send_push(student: Student, title: str, body: str):
-    """Helper to send an FCM message to a student."""
+def _send_push(pushes: List[PushMessage], student: Student, title: str, body: str):
+    """Helper to queue an FCM message to a student for the notification outbox."""
     if not student.fcm_token:
-        print(f"⚠️ No FCM token for {student.id}")
+        logger.warning("No FCM token for student %s", student.id)
         return
 
-    message = Message(
-        token=student.fcm_token,
-        notification={"title": title, "body": body}
-    )
-    try:
-        send(message)
-        print(f"✅ Sent '{title}' to {student.email}")
-    except Exception as e:
-        print(f"❌ Failed to send push to {student.email}: {e}")
+    pushes.append(PushMessage(token=student.fcm_token, title=title, body=body))
 
 
 def daily_payment_reminder(db: Session):
@@ -66,55 +46,65 @@ def daily_payment_reminder(db: Session):
        - Remind 3 days before due_date
        - Notify 2 days after overdue
        - Sync PAID status from Square
+
+    Loads only the invoices that need action today (joined to their student in
+    one query) and writes state back with one UPDATE per category, in a single
+    transaction. Pushes are only enqueued in the notification outbox, in that
+    same transaction; outbox_worker.py sends them.
     """
     today = date.today()
-    upcoming_cutoff = today + timedelta(days=3)
-    late_cutoff = today - timedelta(days=2)
-
-    # Fetch all invoices that have a Square ID
-    invoices = (
-        db.query(Invoice)
-          .filter(Invoice.square_invoice_id.isnot(None))
-          .all()
-    )
-
-    for inv in invoices:
-        student = db.query(Student).filter_by(id=inv.student_id).first()
-        if not student:
-            continue
-
-        # 1) Sync status from Square
-        try:
-            paid = check_invoice_paid(inv.square_invoice_id)
-        except Exception as e:
-            print(f"⚠️ Could not check {inv.square_invoice_id}: {e}")
-            paid = False
-
-        if paid and inv.status != "PAID":
-            inv.status = "PAID"
-            db.commit()
-            _send_push(
-                student,
-                "Payment Received",
-                f"Thanks, we received your payment for ${inv.amount_cents/100:.2f}."
-            )
-
-        # 2) Upcoming reminder (3 days before)
-        if inv.status != "PAID" and not inv.reminder_sent and inv.due_date == upcoming_cutoff:
-            _send_push(
-                student,
-                "Payment Due Soon",
-                f"Your payment of ${inv.amount_cents/100:.2f} is due on {inv.due_date}."
-            )
-            inv.reminder_sent = True
-            db.commit()
-
-        # 3) Late notice (2 days after)
-        if inv.status != "PAID" and not inv.late_notice_sent and inv.due_date <= late_cutoff:
-            _send_push(
-                student,
-                "Payment Overdue",
-                f"Your payment of ${inv.amount_cents/100:.2f} was due on {inv.due_date}."
-            )
-            inv.late_notice_sent = True
-            db.commit()
+    rows = load_actionable_invoices(db, today)
+
+    # Fetch every status from Square up front, concurrently and in bulk
+    square_sync = SquareInvoiceSync(SQUARE_TOKEN, location_ids=SQUARE_LOCATION_IDS)
+    statuses = square_sync.sync(inv.square_invoice_id for inv, _ in rows if inv.square_invoice_id)
+    logger.info("Square sync: %s", square_sync.stats.summary())
+    for error in square_sync.stats.errors:
+        logger.warning("Could not check %s", error)
+
+    paid_ids, reminder_ids, late_ids = [], [], []
+    pushes: List[PushMessage] = []
+
+    try:
+        for inv, student in rows:
+            # 1) Sync status from Square
+            if statuses.get(inv.square_invoice_id) == "PAID":
+                paid_ids.append(inv.id)
+                _send_push(
+                    pushes,
+                    student,
+                    "Payment Received",
+                    f"Thanks, we received your payment for ${inv.amount_cents/100:.2f}."
+                )
+                continue
+
+            # 2) Upcoming reminder (3 days before)
+            if is_upcoming(inv, today):
+                _send_push(
+                    pushes,
+                    student,
+                    "Payment Due Soon",
+                    f"Your payment of ${inv.amount_cents/100:.2f} is due on {inv.due_date}."
+                )
+                reminder_ids.append(inv.id)
+
+            # 3) Late notice (2 days after)
+            if is_late(inv, today):
+                _send_push(
+                    pushes,
+                    student,
+                    "Payment Overdue",
+                    f"Your payment of ${inv.amount_cents/100:.2f} was due on {inv.due_date}."
+                )
+                late_ids.append(inv.id)
+
+        # 4) Write everything back: one UPDATE per category plus the outbox rows, one commit
+        bulk_update_invoices(db, paid_ids, status="PAID")
+        bulk_update_invoices(db, reminder_ids, reminder_sent=True)
+        bulk_update_invoices(db, late_ids, late_notice_sent=True)
+        queued = enqueue_pushes(db, pushes)
+        db.commit()
+        logger.info("Queued %d push notifications", queued)
+    except Exception:
+        db.rollback()
+        raise
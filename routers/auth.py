@@ -1,21 +1,41 @@
-import secrets
-import string
-from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
-from database import get_db
-from models import User, UserProfile, Student, VerificationToken
+from database import get_db, get_async_db
+from services.rate_limit import rate_limiter
+from models import User, UserProfile, Student, Document, Enrollment
+from services.action_tokens import (
+    EMAIL_VERIFICATION,
+    PASSWORD_RESET,
+    InvalidActionToken,
+    consume_action_token,
+    consume_legacy_token,
+    is_legacy_token
+)
+from services.refresh_tokens import (
+    RefreshTokenError,
+    exchange_legacy_refresh_token,
+    issue_refresh_token,
+    revoke_all_for_user,
+    revoke_family,
+    rotate_refresh_token,
+    user_claims
+)
 from auth_utils import (
-    verify_password,
+    verify_and_update_password,
     get_password_hash,
     create_access_token,
-    create_refresh_token,
     verify_token,
+    token_claims,
+    load_auth_state,
+    CurrentUser,
     get_current_user,
-    get_current_active_user
+    get_current_active_user,
+    get_current_active_user_async
 )
 
 router = APIRouter(tags=["Authentication"])
@@ -52,10 +72,45 @@ class PasswordResetConfirm(BaseModel):
     token: str
     new_password: str
 
-def generate_verification_token() -> str:
-    """Generate a secure random token for email verification."""
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(32))
+# Optional sections of GET /auth/me
+ME_INCLUDES = {"enrollments", "documents_summary"}
+
+def user_response(user: User) -> dict:
+    """The user block returned by login; expects user.profile to be loaded."""
+    profile = user.profile
+    return {
+        "id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "is_verified": user.is_verified,
+        "first_name": profile.first_name if profile else None,
+        "last_name": profile.last_name if profile else None
+    }
+
+def parse_includes(include: Optional[str]) -> List[str]:
+    requested = [part.strip() for part in (include or "").split(",") if part.strip()]
+    unknown = set(requested) - ME_INCLUDES
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(ME_INCLUDES))}"
+        )
+    return requested
+
+def redeem_token(db: Session, token: str, purpose: str) -> Optional[int]:
+    """Consume a verification/reset token and return its user id, or None if unusable."""
+    if is_legacy_token(token):
+        return consume_legacy_token(db, token, purpose)
+    try:
+        payload = consume_action_token(db, token, purpose)
+    except InvalidActionToken:
+        return None
+    if purpose == PASSWORD_RESET:
+        # A reset link dies with the password it was issued against
+        current_version = db.query(User.token_version).filter(User.id == payload["user_id"]).scalar()
+        if current_version is not None and payload.get("ver", 0) != current_version:
+            return None
+    return payload["user_id"]
 
 @router.post("/register", response_model=dict)
 def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
@@ -89,20 +144,11 @@ def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
     )
     db.add(profile)
 
-    # Generate email verification token
-    verification_token = generate_verification_token()
-    token_record = VerificationToken(
-        user_id=user.id,
-        token=verification_token,
-        token_type="email_verification",
-        expires_at=datetime.utcnow() + timedelta(hours=24)
-    )
-    db.add(token_record)
-
     db.commit()
 
-    # TODO: Send verification email here
-    # send_verification_email(user.email, verification_token)
+    # TODO: Send verification email here, with a signed, stateless token
+    # (nothing is stored until it is used)
+    # send_verification_email(user.email, create_action_token(user, EMAIL_VERIFICATION))
 
     return {
         "id": user.id,
@@ -120,9 +166,18 @@ def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
 def login_user(user_data: UserLogin, db: Session = Depends(get_db)):
     """Authenticate user and return JWT tokens."""
 
-    # Find user by email
-    user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.password_hash):
+    # Per-account throttle (the per-IP one runs in RateLimitMiddleware)
+    rate_limiter.enforce_email("login", user_data.email)
+
+    # Find user by email; the profile comes back in the same query
+    user = (
+        db.query(User)
+        .options(joinedload(User.profile))
+        .filter(User.email == user_data.email)
+        .first()
+    )
+    valid, new_hash = verify_and_update_password(user_data.password, user.password_hash) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -134,79 +189,112 @@ def login_user(user_data: UserLogin, db: Session = Depends(get_db)):
             detail="Account is deactivated"
         )
 
-    # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
+    # Build the response before committing, which would expire the loaded rows
+    response_user = user_response(user)
 
-    # Create tokens
-    access_token = create_access_token(data={"user_id": user.id, "email": user.email})
-    refresh_token = create_refresh_token(data={"user_id": user.id})
+    # Create tokens (role and token version travel as claims); each login starts a refresh token family
+    access_token = create_access_token(data=token_claims(user))
+    refresh_token = issue_refresh_token(db, user)
 
-    # Return user data
-    user_data = {
-        "id": user.id,
-        "email": user.email,
-        "role": user.role,
-        "is_verified": user.is_verified,
-        "first_name": profile.first_name if profile else None,
-        "last_name": profile.last_name if profile else None
-    }
+    # Transparently upgrade hashes made with an older bcrypt cost. A bulk UPDATE
+    # skips the ORM hook, so this doesn't count as a password change.
+    if new_hash:
+        db.query(User).filter(User.id == user.id).update(
+            {User.password_hash: new_hash}, synchronize_session=False
+        )
+    db.commit()
 
     return TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token,
-        user=user_data
+        user=response_user
     )
 
 @router.post("/refresh", response_model=dict)
 def refresh_access_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
-    """Refresh access token using refresh token."""
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Refresh tokens are single use: clients must store the returned
+    refresh_token. Presenting one that was already rotated away (outside a
+    short retry window) revokes the whole session.
+    """
 
     try:
         payload = verify_token(request.refresh_token, expected_type="refresh")
         user_id = payload.get("user_id")
 
-        # Verify user still exists and is active
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user or not user.is_active:
+        if "fid" not in payload:
+            # Issued before rotation: check against the user row, then move it into a family (once)
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user or not user.is_active or payload.get("ver", 0) != user.token_version:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found or inactive"
+                )
+            refresh_token = exchange_legacy_refresh_token(db, request.refresh_token, payload, user)
+            return {
+                "access_token": create_access_token(data=token_claims(user)),
+                "refresh_token": refresh_token,
+                "token_type": "bearer"
+            }
+
+        # Deactivation and revocation come from the cached auth state, not a User load
+        state = load_auth_state(db, user_id)
+        if state is None or not state[0] or payload.get("ver", 0) != state[1]:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found or inactive"
             )
 
-        # Create new access token
-        access_token = create_access_token(data={"user_id": user.id, "email": user.email})
+        refresh_token = rotate_refresh_token(db, payload)
+        access_token = create_access_token(data=user_claims(payload))
 
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
-    except HTTPException:
+    except (HTTPException, RefreshTokenError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
         )
 
+@router.post("/logout")
+def logout(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Revoke the session (refresh token family) the given refresh token belongs to."""
+    try:
+        payload = verify_token(request.refresh_token, expected_type="refresh")
+    except HTTPException:
+        # Already unusable; nothing to revoke
+        return {"message": "Logged out"}
+    if "fid" in payload:
+        revoke_family(db, payload["fid"])
+    return {"message": "Logged out"}
+
+@router.post("/logout-all")
+def logout_all_devices(
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke every session of the current user, including outstanding access tokens."""
+    sessions = revoke_all_for_user(db, current_user.id)
+    return {"message": "Logged out of all devices", "sessions_revoked": sessions}
+
 @router.post("/verify-email")
 def verify_email(request: EmailVerificationRequest, db: Session = Depends(get_db)):
     """Verify user email using verification token."""
 
-    # Find the token
-    token_record = db.query(VerificationToken).filter(
-        VerificationToken.token == request.token,
-        VerificationToken.token_type == "email_verification",
-        VerificationToken.used == False,
-        VerificationToken.expires_at > datetime.utcnow()
-    ).first()
-
-    if not token_record:
+    user_id = redeem_token(db, request.token, EMAIL_VERIFICATION)
+    if user_id is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired verification token"
         )
 
-    # Mark user as verified
-    user = db.query(User).filter(User.id == token_record.user_id).first()
+    # Mark user as verified (commits the token as used in the same transaction)
+    user = db.query(User).filter(User.id == user_id).first()
     if user:
         user.is_verified = True
-        token_record.used = True
         db.commit()
 
         return {"message": "Email verified successfully"}
@@ -219,22 +307,12 @@ def verify_email(request: EmailVerificationRequest, db: Session = Depends(get_db
 @router.post("/forgot-password")
 def forgot_password(request: PasswordResetRequest, db: Session = Depends(get_db)):
     """Request password reset."""
+    rate_limiter.enforce_email("forgot_password", request.email)
 
-    user = db.query(User).filter(User.email == request.email).first()
-    if user:
-        # Generate reset token
-        reset_token = generate_verification_token()
-        token_record = VerificationToken(
-            user_id=user.id,
-            token=reset_token,
-            token_type="password_reset",
-            expires_at=datetime.utcnow() + timedelta(hours=1)
-        )
-        db.add(token_record)
-        db.commit()
-
-        # TODO: Send reset email
-        # send_password_reset_email(user.email, reset_token)
+    # TODO: Send reset email, with a signed token (no database write)
+    # user = db.query(User).filter(User.email == request.email).first()
+    # if user:
+    #     send_password_reset_email(user.email, create_action_token(user, PASSWORD_RESET))
 
     # Always return success to prevent email enumeration
     return {"message": "If the email exists, a password reset link has been sent"}
@@ -243,25 +321,18 @@ def forgot_password(request: PasswordResetRequest, db: Session = Depends(get_db)
 def reset_password(request: PasswordResetConfirm, db: Session = Depends(get_db)):
     """Reset password using reset token."""
 
-    # Find the token
-    token_record = db.query(VerificationToken).filter(
-        VerificationToken.token == request.token,
-        VerificationToken.token_type == "password_reset",
-        VerificationToken.used == False,
-        VerificationToken.expires_at > datetime.utcnow()
-    ).first()
-
-    if not token_record:
+    user_id = redeem_token(db, request.token, PASSWORD_RESET)
+    if user_id is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired reset token"
         )
 
-    # Update password
-    user = db.query(User).filter(User.id == token_record.user_id).first()
+    # Update password (this also bumps token_version, revoking existing sessions)
+    user = db.query(User).filter(User.id == user_id).first()
     if user:
         user.password_hash = get_password_hash(request.new_password)
-        token_record.used = True
         db.commit()
 
         return {"message": "Password reset successfully"}
@@ -272,23 +343,62 @@ def reset_password(request: PasswordResetConfirm, db: Session = Depends(get_db))
     )
 
 @router.get("/me")
-def get_current_user_info(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def get_current_user_info(
+    include: Optional[str] = Query(
+        None, description="Comma-separated extras: enrollments, documents_summary"
+    ),
+    current_user: CurrentUser = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get current user information."""
-
-    # Get user profile
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
-
-    return {
-        "id": current_user.id,
-        "email": current_user.email,
-        "role": current_user.role,
-        "is_verified": current_user.is_verified,
+    includes = parse_includes(include)
+
+    # The token only carries claims; load the user with its profile in one query,
+    # and enrollments (with their courses) in one more if asked for
+    options = [joinedload(User.profile)]
+    if "enrollments" in includes:
+        options.append(selectinload(User.enrollments).joinedload(Enrollment.course))
+    result = await db.execute(select(User).options(*options).where(User.id == current_user.id))
+    user = result.unique().scalar_one()
+    profile = user.profile
+
+    response = {
+        "id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "is_verified": user.is_verified,
         "first_name": profile.first_name if profile else None,
         "last_name": profile.last_name if profile else None,
         "phone": profile.phone if profile else None,
-        "created_at": current_user.created_at
+        "created_at": user.created_at
     }
 
+    if "enrollments" in includes:
+        response["enrollments"] = [
+            {
+                "id": enrollment.id,
+                "course_id": enrollment.course_id,
+                "course_title": enrollment.course.title if enrollment.course else None,
+                "status": enrollment.status,
+                "enrollment_date": enrollment.enrollment_date,
+                "graduation_date": enrollment.graduation_date
+            }
+            for enrollment in user.enrollments
+        ]
+
+    if "documents_summary" in includes:
+        # Counted in the database rather than by loading every document
+        counts = await db.execute(
+            select(Document.verification_status, func.count())
+            .where(Document.user_id == user.id, Document.upload_status == "complete")
+            .group_by(Document.verification_status)
+        )
+        by_status = {"pending": 0, "approved": 0, "rejected": 0}
+        by_status.update({row[0]: row[1] for row in counts})
+        response["documents_summary"] = {"total": sum(by_status.values()), **by_status}
+
+    return response
+
 # Legacy endpoint for backward compatibility
 @router.get("/login")
 def legacy_login(
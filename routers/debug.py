@@ -0,0 +1,28 @@
+# routers/debug.py
+# Mounted only when SQL_PROFILE is on (development); see services/query_profiler.py
+
+from fastapi import APIRouter, HTTPException
+
+from services.query_profiler import reports
+
+router = APIRouter(tags=["Debug"])
+
+@router.get("/sql")
+def recent_profiles(n_plus_one_only: bool = False):
+    """Summaries of recently profiled requests, newest first."""
+    summaries = [
+        {k: report[k] for k in ("id", "label", "queries", "time_ms", "distinct_shapes")}
+        | {"n_plus_one": len(report["n_plus_one"])}
+        for report in reversed(reports.values())
+    ]
+    if n_plus_one_only:
+        summaries = [s for s in summaries if s["n_plus_one"]]
+    return summaries
+
+@router.get("/sql/{profile_id}")
+def profile_report(profile_id: str):
+    """Full report for one request: every statement shape with counts, timings and call sites."""
+    report = reports.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return report
@@ -1,15 +1,22 @@
 import os
+import mimetypes
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, status
-from fastapi.responses import RedirectResponse
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request, status
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from database import get_db
-from models import User, Document
-from auth_utils import get_current_active_user
-from services.storage_service import storage_service
+from database import get_db, get_async_db
+from models import Document
+from auth_utils import CurrentUser, get_current_active_user, get_current_active_user_async
+from services.registry import ServiceUnavailable
+from services.storage_service import get_storage_service, storage_service
+from services.storage_errors import FileTooLargeError
+from services.pagination import estimate_count, keyset_page, page_results, set_page_headers
+from services.document_review import VERDICTS, Verdict, apply_verdicts, notify_reviewed, unapplied_reasons
 
 router = APIRouter(tags=["Documents"])
 
@@ -25,23 +32,47 @@ class DocumentResponse(BaseModel):
     uploaded_at: str
     verified_at: Optional[str] = None
 
+class UploadUrlRequest(BaseModel):
+    document_type: str
+    file_name: str
+    file_size: Optional[int] = None
+
 class DocumentVerificationRequest(BaseModel):
     verification_status: str  # approved, rejected
     verification_notes: str = None
 
+class BulkVerificationItem(BaseModel):
+    document_id: int
+    verification_status: str  # approved, rejected
+    verification_notes: Optional[str] = None
+
+class BulkVerificationRequest(BaseModel):
+    items: List[BulkVerificationItem]
+
 # Configuration
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_BLOCK_SIZE = int(os.getenv("UPLOAD_BLOCK_SIZE", str(4 * 1024 * 1024)))  # 4MB staged blocks
+UPLOAD_URL_EXPIRY_MINUTES = int(os.getenv("UPLOAD_URL_EXPIRY_MINUTES", "15"))
+DOCUMENT_DOWNLOAD_MODE = os.getenv("DOCUMENT_DOWNLOAD_MODE", "redirect")  # redirect, proxy
 ALLOWED_DOCUMENT_TYPES = ["id", "diploma", "certificate", "transcript", "other"]
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".pdf", ".doc", ".docx"}
+PENDING_PAGE_SIZE = 100
+MAX_BULK_VERIFY = 500
+MAX_PAGE_SIZE = 500
+# Keyset order for document listings (matches the uploaded_at indexes)
+DOCUMENT_PAGE_ORDER = (Document.uploaded_at, Document.id)
+
+def file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE // (1024*1024)}MB"
+    )
 
 def validate_file(file: UploadFile) -> None:
     """Validate uploaded file."""
-    # Check file size
-    if hasattr(file, 'size') and file.size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
+    # Check file size (UploadSizeLimitMiddleware has already bounded the body by Content-Length)
+    if getattr(file, 'size', None) and file.size > MAX_FILE_SIZE:
+        raise file_too_large()
 
     # Check file extension
     if file.filename:
@@ -52,12 +83,105 @@ def validate_file(file: UploadFile) -> None:
                 detail=f"File type {file_extension} not allowed. Allowed types: {list(ALLOWED_EXTENSIONS)}"
             )
 
+async def iter_upload(file: UploadFile, block_size: int = UPLOAD_BLOCK_SIZE):
+    """
+    Yield an uploaded file in blocks so at most one block is held in memory.
+    The file has already been spooled by the multipart parser; this bounds
+    memory while copying it to storage, not what is received.
+    """
+    while True:
+        chunk = await file.read(block_size)
+        if not chunk:
+            break
+        yield chunk
+
+async def resolve_storage():
+    """The storage service for async handlers, without blocking the event loop while it initializes."""
+    try:
+        return await get_storage_service()
+    except ServiceUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Storage service not available"
+        )
+
+def parse_range_header(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" range into an inclusive (start, end) pair.
+    Returns None for headers we don't handle (multiple ranges, other units);
+    raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    if start_s:
+        start = int(start_s)
+        end = min(int(end_s), size - 1) if end_s else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(end_s), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+def proxy_download(request: Request, blob_name: str, file_name: str) -> Response:
+    """
+    Serve a blob through the API with ETag/If-None-Match revalidation and
+    single-range (resumable) requests.
+    """
+    props = storage_service.get_blob_properties(blob_name)
+    if props is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document file not found"
+        )
+
+    size = props["size"]
+    headers = {
+        "ETag": props["etag"],
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="{file_name}"',
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or props["etag"] in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == props["etag"]):
+        try:
+            byte_range = parse_range_header(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(storage_service.iter_blob(blob_name), media_type=props["content_type"], headers=headers)
+
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        storage_service.iter_blob(blob_name, offset=start, length=end - start + 1),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=props["content_type"],
+        headers=headers
+    )
+
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
     document_type: str = Form(...),
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a document for the current user."""
 
@@ -70,26 +194,18 @@ async def upload_document(
 
     validate_file(file)
 
-    if not storage_service:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Storage service not available. Please configure Azure Storage."
-        )
+    storage = await resolve_storage()
 
     try:
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
-
-        # Reset file pointer and upload to Azure
-        import io
-        file_stream = io.BytesIO(file_content)
-
-        blob_name, blob_url = storage_service.upload_document(
+        # Copy the spooled file to storage block by block. Oversized bodies were
+        # refused from Content-Length before parsing; the exact MAX_FILE_SIZE
+        # check on the file part happens here as blocks are copied
+        blob_name, blob_url, file_size = await storage.upload_document_stream(
             user_id=current_user.id,
             document_type=document_type,
-            file_content=file_stream,
-            filename=file.filename
+            chunks=iter_upload(file),
+            filename=file.filename,
+            max_size=MAX_FILE_SIZE
         )
 
         # Save document record to database
@@ -103,8 +219,8 @@ async def upload_document(
         )
 
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.commit()
+        await db.refresh(document)
 
         return DocumentResponse(
             id=document.id,
@@ -118,8 +234,11 @@ async def upload_document(
             verified_at=document.verified_at.isoformat() if document.verified_at else None
         )
 
+    except FileTooLargeError:
+        await db.rollback()
+        raise file_too_large()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload document: {str(e)}"
@@ -130,7 +249,7 @@ async def upload_registration_document(
     document_type: str = Form(...),
     file: UploadFile = File(...),
     user_id: Optional[int] = Form(0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a document during registration (no authentication required)."""
     # Validate inputs
@@ -142,21 +261,16 @@ async def upload_registration_document(
 
     # Validate file
     validate_file(file)
+    storage = await resolve_storage()
 
     try:
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
-
-        # Reset file pointer and upload to Azure (using user_id = 0 for registration)
-        import io
-        file_stream = io.BytesIO(file_content)
-
-        blob_name, blob_url = storage_service.upload_document(
+        # Copy the spooled file to storage block by block (using user_id = 0 for registration)
+        blob_name, blob_url, file_size = await storage.upload_document_stream(
             user_id=user_id,  # Use the provided user_id (0 for pre-registration, actual ID for post-registration)
             document_type=document_type,
-            file_content=file_stream,
-            filename=file.filename
+            chunks=iter_upload(file),
+            filename=file.filename,
+            max_size=MAX_FILE_SIZE
         )
 
         # Save document record to database with the provided user_id
@@ -170,8 +284,8 @@ async def upload_registration_document(
         )
 
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.commit()
+        await db.refresh(document)
 
         return DocumentResponse(
             id=document.id,
@@ -185,20 +299,162 @@ async def upload_registration_document(
             verified_at=document.verified_at.isoformat() if document.verified_at else None
         )
 
+    except FileTooLargeError:
+        await db.rollback()
+        raise file_too_large()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload registration document: {str(e)}"
         )
 
-@router.get("/list", response_model=List[DocumentResponse])
-def list_user_documents(
-    current_user: User = Depends(get_current_active_user),
+@router.post("/upload-url")
+def create_upload_url(
+    request: UploadUrlRequest,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a direct-to-blob upload: returns a short-lived write-only URL and a
+    pending document. The client PUTs the file to upload_url, then calls
+    POST /documents/{id}/complete.
+    """
+    if request.document_type not in ALLOWED_DOCUMENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid document type. Allowed types: {ALLOWED_DOCUMENT_TYPES}"
+        )
+
+    file_extension = os.path.splitext(request.file_name)[1].lower()
+    if file_extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type {file_extension} not allowed. Allowed types: {list(ALLOWED_EXTENSIONS)}"
+        )
+
+    if request.file_size is not None and request.file_size > MAX_FILE_SIZE:
+        raise file_too_large()
+
+    if not storage_service:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Storage service not available. Please configure Azure Storage."
+        )
+
+    blob_name, blob_url, upload_url, expires_at = storage_service.generate_upload_url(
+        user_id=current_user.id,
+        document_type=request.document_type,
+        filename=request.file_name,
+        expiry_minutes=UPLOAD_URL_EXPIRY_MINUTES
+    )
+
+    document = Document(
+        user_id=current_user.id,
+        document_type=request.document_type,
+        file_name=request.file_name,
+        file_url=blob_url,
+        file_size=request.file_size,
+        verification_status="pending",
+        upload_status="uploading"
+    )
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+
+    content_type = mimetypes.guess_type(request.file_name)[0] or "application/octet-stream"
+    return {
+        "document_id": document.id,
+        "upload_url": upload_url,
+        "expires_at": expires_at.isoformat(),
+        "max_file_size": MAX_FILE_SIZE,
+        "method": "PUT",
+        "headers": {"x-ms-blob-type": "BlockBlob", "Content-Type": content_type}
+    }
+
+@router.post("/{document_id}/complete", response_model=DocumentResponse)
+def complete_upload(
+    document_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List all documents for the current user."""
-    documents = db.query(Document).filter(Document.user_id == current_user.id).all()
+    """
+    Finish a direct-to-blob upload: seals the blob so the upload URL can no
+    longer overwrite it, then verifies its size and content type before
+    marking the document as uploaded.
+    """
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id,
+        Document.upload_status == "uploading"
+    ).first()
+
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pending upload not found"
+        )
+
+    blob_name = storage_service.blob_name_from_url(document.file_url)
+    props = storage_service.seal_upload(blob_name)
+    if props is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File has not been uploaded yet"
+        )
+
+    expected_type = mimetypes.guess_type(document.file_name)[0] or "application/octet-stream"
+    problem = None
+    if props["size"] > MAX_FILE_SIZE:
+        problem = file_too_large()
+    elif (props["content_type"] or "").split(";")[0].strip().lower() != expected_type:
+        problem = HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Uploaded content type {props['content_type']} does not match {expected_type}"
+        )
+
+    if problem:
+        # Reject the upload outright so the client starts over with a new URL
+        storage_service.delete_document(blob_name)
+        db.delete(document)
+        db.commit()
+        raise problem
+
+    document.file_size = props["size"]
+    document.upload_status = "complete"
+    document.uploaded_at = datetime.utcnow()
+    db.commit()
+    db.refresh(document)
+
+    return DocumentResponse(
+        id=document.id,
+        document_type=document.document_type,
+        file_name=document.file_name,
+        file_url=document.file_url,
+        file_size=document.file_size,
+        verification_status=document.verification_status,
+        verification_notes=document.verification_notes,
+        uploaded_at=document.uploaded_at.isoformat(),
+        verified_at=document.verified_at.isoformat() if document.verified_at else None
+    )
+
+@router.get("/list", response_model=List[DocumentResponse])
+async def list_user_documents(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (default: everything)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    current_user: CurrentUser = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List the current user's documents, oldest first; paged when limit is given."""
+    stmt = select(Document).where(
+        Document.user_id == current_user.id,
+        Document.upload_status == "complete"
+    )
+    result = await db.execute(keyset_page(stmt, DOCUMENT_PAGE_ORDER, cursor, limit))
+    documents, next_cursor = page_results(result.scalars().all(), DOCUMENT_PAGE_ORDER, limit)
+    set_page_headers(response, request, next_cursor)
 
     return [
         DocumentResponse(
@@ -218,13 +474,14 @@ def list_user_documents(
 @router.get("/{document_id}", response_model=DocumentResponse)
 def get_document(
     document_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific document by ID."""
     document = db.query(Document).filter(
         Document.id == document_id,
-        Document.user_id == current_user.id
+        Document.user_id == current_user.id,
+        Document.upload_status == "complete"
     ).first()
 
     if not document:
@@ -248,13 +505,16 @@ def get_document(
 @router.get("/{document_id}/download")
 def download_document(
     document_id: int,
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    mode: Optional[str] = Query(None, description="redirect (SAS URL) or proxy (streamed, supports Range/ETag)"),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get a temporary download URL for a document."""
+    """Get a temporary download URL for a document, or stream it when proxied."""
     document = db.query(Document).filter(
         Document.id == document_id,
-        Document.user_id == current_user.id
+        Document.user_id == current_user.id,
+        Document.upload_status == "complete"
     ).first()
 
     if not document:
@@ -269,9 +529,14 @@ def download_document(
             detail="Storage service not available"
         )
 
+    # Extract blob name from URL
+    blob_name = storage_service.blob_name_from_url(document.file_url)
+
+    if (mode or DOCUMENT_DOWNLOAD_MODE) == "proxy":
+        return proxy_download(request, blob_name, document.file_name)
+
     try:
-        # Extract blob name from URL
-        blob_name = document.file_url.split("/")[-1]
+        # Signed URLs are cached per blob, so repeated downloads reuse one signature
         download_url = storage_service.generate_download_url(blob_name)
 
         # Redirect to the download URL
@@ -285,7 +550,7 @@ def download_document(
 @router.delete("/{document_id}")
 def delete_document(
     document_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a document."""
@@ -304,7 +569,7 @@ def delete_document(
         # Delete from Azure Storage
         if storage_service:
             # Extract blob name from URL
-            blob_name = document.file_url.split("/")[-1]
+            blob_name = storage_service.blob_name_from_url(document.file_url)
             storage_service.delete_document(blob_name)
 
         # Delete from database
@@ -324,7 +589,7 @@ def delete_document(
 def verify_document(
     document_id: int,
     verification: DocumentVerificationRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Verify a document (admin only)."""
@@ -335,36 +600,139 @@ def verify_document(
             detail="Only administrators can verify documents"
         )
 
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
+    if verification.verification_status not in VERDICTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"verification_status must be one of {sorted(VERDICTS)}"
+        )
+
+    # Same path as the bulk endpoint, so the student is notified either way
+    reviewed = apply_verdicts(db, [Verdict(
+        document_id=document_id,
+        verification_status=verification.verification_status,
+        verification_notes=verification.verification_notes
+    )], current_user.id)
+    if not reviewed:
+        db.rollback()
+        if unapplied_reasons(db, [document_id])[document_id] == "already_reviewed":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Document has already been reviewed"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
 
-    # Update verification status
-    document.verification_status = verification.verification_status
-    document.verification_notes = verification.verification_notes
-    document.verified_by = current_user.id
-    document.verified_at = datetime.utcnow()
-
+    notify_reviewed(db, reviewed)
     db.commit()
 
     return {"message": f"Document {verification.verification_status} successfully"}
 
+@router.post("/admin/verify-bulk")
+def verify_documents_bulk(
+    request: BulkVerificationRequest,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Approve or reject many documents at once (admin only).
+
+    All verdicts are applied with a single UPDATE and committed together with
+    the students' notifications (one per student). Returns a result per
+    document ID: approved, rejected, already_reviewed, not_uploaded,
+    not_found, invalid_status or duplicate.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can verify documents"
+        )
+    if len(request.items) > MAX_BULK_VERIFY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_VERIFY} documents per request"
+        )
+
+    results = {}
+    verdicts = []
+    for item in request.items:
+        if item.document_id in results:
+            results[item.document_id] = "duplicate"
+        elif item.verification_status not in VERDICTS:
+            results[item.document_id] = "invalid_status"
+        else:
+            results[item.document_id] = "not_found"
+            verdicts.append(Verdict(item.document_id, item.verification_status, item.verification_notes))
+    # A duplicated ID is left out entirely rather than guessing which verdict wins
+    verdicts = [v for v in verdicts if results[v.document_id] != "duplicate"]
+
+    try:
+        reviewed = apply_verdicts(db, verdicts, current_user.id)
+        for doc in reviewed:
+            results[doc.id] = doc.verification_status
+        reviewed_ids = {doc.id for doc in reviewed}
+        results.update(unapplied_reasons(db, [v.document_id for v in verdicts if v.document_id not in reviewed_ids]))
+        notified = notify_reviewed(db, reviewed)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to verify documents: {str(e)}"
+        )
+
+    return {
+        "updated": len(reviewed),
+        "results": [{"document_id": doc_id, "result": result} for doc_id, result in results.items()],
+        **notified
+    }
+
 @router.get("/admin/pending", response_model=List[DocumentResponse])
 def list_pending_documents(
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    limit: int = Query(PENDING_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    document_type: Optional[str] = Query(None),
+    uploaded_from: Optional[datetime] = Query(None, description="Uploaded at or after (UTC)"),
+    uploaded_to: Optional[datetime] = Query(None, description="Uploaded before (UTC)"),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """List all pending documents (admin only)."""
+    """
+    List pending documents, oldest first (admin only).
+
+    Paged by cursor: the next page's cursor is in the X-Next-Cursor header (and
+    a Link rel="next" header); X-Total-Count-Estimate gives the queue size.
+    """
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators can view pending documents"
         )
+    if document_type is not None and document_type not in ALLOWED_DOCUMENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid document type. Allowed types: {ALLOWED_DOCUMENT_TYPES}"
+        )
 
-    documents = db.query(Document).filter(Document.verification_status == "pending").all()
+    stmt = select(Document).where(
+        Document.verification_status == "pending",
+        Document.upload_status == "complete"
+    )
+    if document_type is not None:
+        stmt = stmt.where(Document.document_type == document_type)
+    if uploaded_from is not None:
+        stmt = stmt.where(Document.uploaded_at >= uploaded_from)
+    if uploaded_to is not None:
+        stmt = stmt.where(Document.uploaded_at < uploaded_to)
+
+    # The count only matters for the first page
+    total_estimate = estimate_count(db, stmt) if cursor is None else None
+    rows = db.execute(keyset_page(stmt, DOCUMENT_PAGE_ORDER, cursor, limit)).scalars().all()
+    documents, next_cursor = page_results(rows, DOCUMENT_PAGE_ORDER, limit)
+    set_page_headers(response, request, next_cursor, total_estimate)
 
     return [
         DocumentResponse(
@@ -1,19 +1,18 @@
 # routers/externships.py
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from database import SessionLocal
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import ExternshipStatus
+from services.response_cache import response_cache
 
 router = APIRouter(tags=["Externships"])
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def externship_response(student_id: int, record: ExternshipStatus = None) -> dict:
+    if not record:
+        return {"student_id": student_id, "status": "Not Started"}
+    return {"student_id": student_id, "status": record.status}
 
 @router.get(
     "",  # No trailing slash; root of the /externships prefix
@@ -21,21 +20,22 @@ def get_db():
     response_model=dict,
     response_description="Externship status object for the given student"
 )
-def get_externship_status(
+async def get_externship_status(
+    request: Request,
     student_id: int = Query(..., description="ID of the student"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Returns the current externship status for the given student.
     If no record exists, returns: {"student_id": ..., "status": "Not Started"}
+    Supports If-None-Match (304 while unchanged).
     """
-    record = (
-        db.query(ExternshipStatus)
-        .filter(ExternshipStatus.student_id == student_id)
-        .first()
-    )
+    async def load():
+        result = await db.execute(
+            select(ExternshipStatus)
+            .where(ExternshipStatus.student_id == student_id)
+            .limit(1)
+        )
+        return externship_response(student_id, result.scalars().first())
 
-    if not record:
-        return {"student_id": student_id, "status": "Not Started"}
-
-    return {"student_id": student_id, "status": record.status}
+    return await response_cache.respond(request, "externship", student_id, load)
@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import get_db
 from models import Student
 
 router = APIRouter(
@@ -13,13 +13,6 @@ router = APIRouter(
 class FCMTokenPayload(BaseModel):
     fcm_token: str
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post(
     "/students/{student_id}/fcm-token",
     summary="Register or update a student's FCM token"
@@ -0,0 +1,31 @@
+# routers/health.py
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from database import pool_status
+from services.health import readiness
+from services.registry import registry
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/live")
+def liveness():
+    """The process is up and serving requests. Touches no dependencies."""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def ready():
+    """
+    Whether this instance should receive traffic: 200 when every required
+    dependency probe passes, 503 otherwise. Probe results are cached briefly
+    and time-bounded, so this is cheap to poll.
+    """
+    report = await readiness()
+    report["pool"] = pool_status()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+@router.get("/services")
+def service_status():
+    """Per-dependency startup state (ready / starting / failed, with timings and errors)."""
+    return registry.report()
@@ -0,0 +1,58 @@
+# routers/mock_storage.py
+
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response
+
+from services.mock_storage_service import MockStorageService, mock_storage_service
+from services.registry import registry
+
+def require_mock_storage():
+    """Only serve these routes while mock storage is the active backend."""
+    if not isinstance(registry.get("storage"), MockStorageService):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+router = APIRouter(tags=["Mock Storage"], dependencies=[Depends(require_mock_storage)])
+
+@router.put("/{blob_name:path}", status_code=status.HTTP_201_CREATED)
+async def put_blob(
+    blob_name: str,
+    request: Request,
+    se: int = Query(..., description="Expiry (unix seconds)"),
+    sig: str = Query(..., description="Upload signature"),
+):
+    """
+    Accept a direct upload to a signed mock upload URL, mirroring an Azure
+    Put Blob request against a SAS URL.
+    """
+    if not mock_storage_service.verify_upload_signature(blob_name, se, sig):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired upload URL")
+    if ".." in blob_name.split("/"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    if mock_storage_service.is_sealed(blob_name):
+        # Azure answers a write to a leased blob the same way
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Blob has been sealed")
+
+    await mock_storage_service.put_blob(blob_name, request.stream(), request.headers.get("content-type"))
+    return Response(status_code=status.HTTP_201_CREATED)
+
+@router.get("/{blob_name:path}")
+def get_blob(
+    blob_name: str,
+    se: int = Query(..., description="Expiry (unix seconds)"),
+    sig: str = Query(..., description="Read signature"),
+):
+    """
+    Serve a blob from mock storage to a signed, expiring read URL (from
+    GET /documents/{id}/download), mirroring a read SAS.
+    """
+    if not mock_storage_service.verify_signature(blob_name, se, sig, "r"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired download URL")
+    if ".." in blob_name.split("/"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    file_path = os.path.join(mock_storage_service.base_path, blob_name)
+    props = mock_storage_service.get_blob_properties(blob_name)
+    if props is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    return FileResponse(file_path, media_type=props["content_type"])
@@ -1,10 +1,22 @@
 # routers/payments.py
 
-from typing import List
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from database import get_db
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import PaymentPlan
+from services.pagination import keyset_page, page_results, set_page_headers
+from services.response_cache import response_cache
+
+PAGE_ORDER = (PaymentPlan.due_date, PaymentPlan.id)
+
+def plan_response(plan: PaymentPlan) -> dict:
+    return {
+        "student_id": plan.student_id,
+        "amount": plan.amount,
+        "due_date": plan.due_date.isoformat()
+    }
 
 router = APIRouter(
     tags=["Payments"],
@@ -12,26 +24,29 @@ router = APIRouter(
 
 @router.get("", include_in_schema=False)
 @router.get("/", summary="Get payment plans for a student")
-def get_payments(
+async def get_payments(
+    request: Request,
+    response: Response,
     student_id: int = Query(..., description="ID of the student"),
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (default: everything)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
 ) -> List[dict]:
     """
     Returns all payment plans (amount + due_date) for the given student_id,
     ordered by due_date. If none exist, returns [].
+    With limit, returns one page; the next page's cursor is in X-Next-Cursor.
+    The full (unpaged) list is cached and supports If-None-Match.
     """
-    plans = (
-        db.query(PaymentPlan)
-        .filter(PaymentPlan.student_id == student_id)
-        .order_by(PaymentPlan.due_date)
-        .all()
-    )
+    async def load():
+        stmt = select(PaymentPlan).where(PaymentPlan.student_id == student_id)
+        result = await db.execute(keyset_page(stmt, PAGE_ORDER, cursor, limit))
+        plans, next_cursor = page_results(result.scalars().all(), PAGE_ORDER, limit)
+        set_page_headers(response, request, next_cursor)
+
+        return [plan_response(p) for p in plans]
 
-    return [
-        {
-            "student_id": p.student_id,
-            "amount": p.amount,
-            "due_date": p.due_date.isoformat()
-        }
-        for p in plans
-    ]
+    # What the app polls is the full list; paged reads go straight to the database
+    if limit is None and cursor is None:
+        return await response_cache.respond(request, "payments", student_id, load)
+    return await load()
@@ -1,21 +1,100 @@
 # students.py
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Student
+import json
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from auth_utils import CurrentUser, get_current_active_user_async
+from database import get_async_db
+from models import Student, PaymentPlan, ExternshipStatus
+from services.response_cache import response_cache
+from routers.payments import plan_response
+from routers.externships import externship_response
 
 router = APIRouter(
     tags=["Students"],
 )
 
+# Largest cohort the dashboard asks for at once
+MAX_BATCH_STUDENTS = 500
+
 class FCMTokenPayload(BaseModel):
     fcm_token: str
 
+class StudentBatchRequest(BaseModel):
+    student_ids: List[int] = Field(..., max_length=MAX_BATCH_STUDENTS)
+
+@router.post("/batch")
+async def get_students_batch(
+    request: StudentBatchRequest,
+    current_user: CurrentUser = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Student record, payment plans and externship status for many students at
+    once (admin only), from three set-based queries.
+
+    Streams {"results": [{"id", "student", "payments", "externship"}, ...],
+    "not_found": [...]} with results in the order the IDs were given; each
+    entry has the same shape as the per-student endpoints.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can batch-load students"
+        )
+    # At most MAX_BATCH_STUDENTS, enforced (422) when the body is validated
+    student_ids = list(dict.fromkeys(request.student_ids))
+
+    # Everything is read before streaming starts: the session closes once the handler returns
+    students = {
+        s.id: s for s in (await db.execute(select(Student).where(Student.id.in_(student_ids)))).scalars()
+    }
+    plans = {}
+    for plan in (await db.execute(
+        select(PaymentPlan)
+        .where(PaymentPlan.student_id.in_(student_ids))
+        .order_by(PaymentPlan.student_id, PaymentPlan.due_date, PaymentPlan.id)
+    )).scalars():
+        plans.setdefault(plan.student_id, []).append(plan)
+    externships = {}
+    for record in (await db.execute(
+        select(ExternshipStatus)
+        .where(ExternshipStatus.student_id.in_(student_ids))
+        .order_by(ExternshipStatus.student_id, ExternshipStatus.id)
+    )).scalars():
+        externships.setdefault(record.student_id, record)
+
+    found = [sid for sid in student_ids if sid in students]
+    student_rows = {sid: jsonable_encoder(students[sid]) for sid in found}
+
+    def body():
+        # One student per chunk, so the encoded response is never held in memory whole
+        yield '{"results":['
+        for n, sid in enumerate(found):
+            entry = {
+                "id": sid,
+                "student": student_rows[sid],
+                "payments": [plan_response(p) for p in plans.get(sid, [])],
+                "externship": externship_response(sid, externships.get(sid)),
+            }
+            yield ("," if n else "") + json.dumps(entry, separators=(",", ":"))
+        yield '],"not_found":' + json.dumps([sid for sid in student_ids if sid not in students]) + "}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
 @router.get("/{student_id}")
-def get_student(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(Student).filter(Student.id == student_id).first()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    return student
+async def get_student(student_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        student = await db.get(Student, student_id)
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        return student
+
+    # Cached until the student row changes; 304 when the client's ETag is current
+    return await response_cache.respond(request, "student", student_id, load)
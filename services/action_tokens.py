@@ -0,0 +1,133 @@
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from auth_utils import ALGORITHM, SECRET_KEY
+from models import UsedActionToken, User, VerificationToken
+
+EMAIL_VERIFICATION = "email_verification"
+PASSWORD_RESET = "password_reset"
+
+TOKEN_LIFETIMES = {
+    EMAIL_VERIFICATION: timedelta(hours=int(os.getenv("EMAIL_VERIFICATION_TOKEN_HOURS", "24"))),
+    PASSWORD_RESET: timedelta(hours=int(os.getenv("PASSWORD_RESET_TOKEN_HOURS", "1"))),
+}
+PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "5000"))
+
+
+class InvalidActionToken(Exception):
+    """The token is malformed, expired, already used, or for another purpose."""
+
+
+def create_action_token(user: User, purpose: str) -> str:
+    """
+    Signed, expiring token for an emailed link. Nothing is written to the
+    database; the token carries the user, purpose, expiry and a random jti.
+    Reset tokens also carry the token version, so any password change
+    (including the reset itself) invalidates every outstanding reset link.
+    """
+    claims = {
+        "user_id": user.id,
+        "type": purpose,
+        "jti": secrets.token_urlsafe(16),
+        "exp": datetime.utcnow() + TOKEN_LIFETIMES[purpose],
+    }
+    if purpose == PASSWORD_RESET:
+        claims["ver"] = user.token_version or 0
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_action_token(token: str, purpose: str) -> Dict[str, Any]:
+    """Check signature, expiry and purpose. Does not check single use."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise InvalidActionToken("Invalid or expired token")
+    if payload.get("type") != purpose or "jti" not in payload or "user_id" not in payload:
+        raise InvalidActionToken("Invalid or expired token")
+    return payload
+
+
+def consume_action_token(db: Session, token: str, purpose: str) -> Dict[str, Any]:
+    """
+    Validate a token and record its jti in the used-token ledger, in the
+    caller's transaction. A primary-key upsert makes this the single-use check:
+    a second attempt (even a concurrent one) inserts nothing and is rejected.
+    """
+    payload = decode_action_token(token, purpose)
+    if not record_token_use(db, payload["jti"], purpose, datetime.utcfromtimestamp(payload["exp"])):
+        raise InvalidActionToken("Token has already been used")
+    return payload
+
+
+def record_token_use(db: Session, jti: str, purpose: str, expires_at: datetime) -> bool:
+    """
+    Add jti to the used-token ledger in the caller's transaction. Returns
+    False if it was already there, i.e. the token has been used before.
+    """
+    inserted = db.execute(
+        insert(UsedActionToken)
+        .values(jti=jti, purpose=purpose, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=["jti"])
+        .returning(UsedActionToken.jti)
+    ).first()
+    return inserted is not None
+
+
+def consume_legacy_token(db: Session, token: str, purpose: str) -> Optional[int]:
+    """
+    Redeem a random token issued before signed tokens, while those links are
+    still live. Returns the user id, or None if there is no usable row.
+    """
+    record = db.query(VerificationToken).filter(
+        VerificationToken.token == token,
+        VerificationToken.token_type == purpose,
+        VerificationToken.used == False,
+        VerificationToken.expires_at > datetime.utcnow()
+    ).with_for_update().first()
+    if record is None:
+        return None
+    record.used = True
+    return record.user_id
+
+
+def is_legacy_token(token: str) -> bool:
+    # Signed tokens are JWTs (header.payload.signature); legacy ones are bare alphanumerics
+    return token.count(".") != 2
+
+
+def delete_in_batches(db: Session, model, id_column, condition, batch_size: int) -> int:
+    """Delete matching rows batch_size at a time, committing after each batch."""
+    total = 0
+    while True:
+        ids = select(id_column).where(condition).limit(batch_size).scalar_subquery()
+        deleted = db.execute(delete(model).where(id_column.in_(ids))).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def purge_expired_tokens(db: Session, batch_size: int = PURGE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Delete expired ledger entries and expired or used legacy
+    verification_tokens rows, a batch per transaction so locks and WAL bursts
+    stay small.
+    """
+    now = datetime.utcnow()
+    return {
+        "used_action_tokens": delete_in_batches(
+            db, UsedActionToken, UsedActionToken.jti,
+            UsedActionToken.expires_at <= now, batch_size,
+        ),
+        "verification_tokens": delete_in_batches(
+            db, VerificationToken, VerificationToken.id,
+            (VerificationToken.expires_at <= now) | (VerificationToken.used == True), batch_size,
+        ),
+    }
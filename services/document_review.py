@@ -0,0 +1,124 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Integer, String, Text, column, update, values
+from sqlalchemy.orm import Session
+
+from models import Document, Notification, UserProfile
+from services.notification_dispatcher import PushMessage, has_fcm_token
+from services.notification_outbox import enqueue_pushes
+
+VERDICTS = {"approved", "rejected"}
+
+
+@dataclass
+class Verdict:
+    document_id: int
+    verification_status: str  # approved, rejected
+    verification_notes: Optional[str] = None
+
+
+@dataclass
+class ReviewedDocument:
+    id: int
+    user_id: int
+    document_type: str
+    verification_status: str
+
+
+def apply_verdicts(db: Session, verdicts: List[Verdict], reviewer_id: int) -> List[ReviewedDocument]:
+    """
+    Apply every verdict with one UPDATE ... FROM (VALUES ...), whatever the mix
+    of approvals, rejections and notes. Only documents that are fully uploaded
+    and still pending are updated, so a document is never reviewed (or its
+    student notified) twice. Returns the rows actually updated; use
+    unapplied_reasons() for the rest. Does not commit.
+    """
+    if not verdicts:
+        return []
+    verdict_rows = values(
+        column("id", Integer), column("status", String), column("notes", Text),
+        name="verdicts",
+    ).data([(v.document_id, v.verification_status, v.verification_notes) for v in verdicts])
+
+    result = db.execute(
+        update(Document)
+        .where(
+            Document.id == verdict_rows.c.id,
+            Document.upload_status == "complete",
+            Document.verification_status == "pending",
+        )
+        .values(
+            verification_status=verdict_rows.c.status,
+            verification_notes=verdict_rows.c.notes,
+            verified_by=reviewer_id,
+            verified_at=datetime.utcnow(),
+        )
+        .returning(Document.id, Document.user_id, Document.document_type, Document.verification_status)
+        .execution_options(synchronize_session=False)
+    )
+    return [ReviewedDocument(*row) for row in result]
+
+
+def unapplied_reasons(db: Session, document_ids: Iterable[int]) -> Dict[str, str]:
+    """
+    Why verdicts for these ids were not applied: not_found, not_uploaded
+    (direct upload still in progress) or already_reviewed. One query.
+    """
+    ids = list(document_ids)
+    reasons = {doc_id: "not_found" for doc_id in ids}
+    if ids:
+        rows = db.query(Document.id, Document.upload_status).filter(Document.id.in_(ids)).all()
+        for doc_id, upload_status in rows:
+            reasons[doc_id] = "not_uploaded" if upload_status != "complete" else "already_reviewed"
+    return reasons
+
+
+def _summary(docs: List[ReviewedDocument]) -> str:
+    by_status = defaultdict(list)
+    for doc in docs:
+        by_status[doc.verification_status].append(doc.document_type)
+    parts = [f"{len(types)} {status} ({', '.join(sorted(set(types)))})" for status, types in sorted(by_status.items())]
+    return "Your documents were reviewed: " + "; ".join(parts) + "."
+
+
+def notify_reviewed(db: Session, reviewed: Iterable[ReviewedDocument]) -> Dict[str, int]:
+    """
+    Tell each affected student about their reviewed documents: one in-app
+    notification and one push per student, however many of their documents
+    were in the batch. Inserts and the outbox rows go in with one statement
+    each, in the caller's transaction.
+    """
+    by_user = defaultdict(list)
+    for doc in reviewed:
+        if doc.user_id:  # 0 = uploaded during registration, no account yet
+            by_user[doc.user_id].append(doc)
+    if not by_user:
+        return {"notifications": 0, "pushes": 0}
+
+    now = datetime.utcnow()
+    messages = {user_id: _summary(docs) for user_id, docs in by_user.items()}
+    db.bulk_insert_mappings(Notification, [
+        {
+            "user_id": user_id,
+            "title": "Document review update",
+            "message": message,
+            "notification_type": "document",
+            "is_read": False,
+            "created_at": now,
+        }
+        for user_id, message in messages.items()
+    ])
+
+    tokens = db.query(UserProfile.user_id, UserProfile.fcm_token).filter(
+        UserProfile.user_id.in_(list(by_user)),
+        has_fcm_token(UserProfile.fcm_token)
+    ).all()
+    pushes = enqueue_pushes(db, (
+        PushMessage(token=token, title="Document review update", body=messages[user_id],
+                    data={"type": "document_review"})
+        for user_id, token in tokens
+    ))
+    return {"notifications": len(messages), "pushes": pushes}
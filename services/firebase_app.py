@@ -0,0 +1,44 @@
+import logging
+import os
+from pathlib import Path
+
+from services.registry import registry
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_CREDENTIALS_FILE = "/app/firebase_service_key.json"
+
+
+def initialize_firebase():
+    """
+    Initialize Firebase Admin from FIREBASE_CREDENTIALS (a file path, for local
+    dev) or FIREBASE_CREDENTIALS_JSON (the key itself, on Azure). Safe to call
+    more than once.
+    """
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        return firebase_admin.get_app()
+
+    firebase_credentials_path = os.getenv("FIREBASE_CREDENTIALS")
+    if firebase_credentials_path and Path(firebase_credentials_path).exists():
+        # Standard local dev behavior
+        logger.info("Using Firebase credentials from local file: %s", firebase_credentials_path)
+        return firebase_admin.initialize_app(credentials.Certificate(firebase_credentials_path))
+
+    firebase_credentials_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
+    if firebase_credentials_json:
+        # Azure: write FIREBASE_CREDENTIALS_JSON to file
+        logger.info("Writing Firebase credentials from environment to file")
+        with open(FIREBASE_CREDENTIALS_FILE, "w") as f:
+            f.write(firebase_credentials_json)
+        app = firebase_admin.initialize_app(credentials.Certificate(FIREBASE_CREDENTIALS_FILE))
+        logger.info("Firebase initialized from FIREBASE_CREDENTIALS_JSON")
+        return app
+
+    raise RuntimeError("Firebase credentials not found in path or env.")
+
+
+# The API itself sends no pushes (the outbox worker does), so it can serve without Firebase
+registry.register("firebase", initialize_firebase, required=False)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from services.registry import registry
+
+# How long a probe result is reused before the next request refreshes it
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "10"))
+# A probe that takes longer than this is reported as failed (it keeps running
+# in the background, and no second copy is started until it finishes)
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: datetime
+    error: Optional[str] = None
+
+
+class Probe:
+    """
+    A time-bounded, cached, single-flight dependency check.
+
+    Concurrent callers share one in-flight run; while a refresh runs, callers
+    that already have a result get the previous one rather than waiting. So
+    however many health requests arrive, each dependency sees at most one
+    probe at a time.
+    """
+
+    def __init__(self, name: str, check: Callable[[], None], required: bool = True,
+                 ttl: float = HEALTH_CACHE_SECONDS, timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.name = name
+        self.check = check
+        self.required = required
+        self.ttl = ttl
+        self.timeout = timeout
+        self.result: Optional[ProbeResult] = None
+        self._expires_at = 0.0
+        self._in_flight: Optional[asyncio.Task] = None
+
+    async def _run(self) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.check)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return ProbeResult(ok=error is None, latency_ms=round((time.perf_counter() - started) * 1000, 2),
+                           checked_at=datetime.utcnow(), error=error)
+
+    def _store(self, result: ProbeResult) -> None:
+        self.result = result
+        self._expires_at = time.monotonic() + self.ttl
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._in_flight = None
+        if not task.cancelled() and task.exception() is None:
+            self._store(task.result())
+
+    async def get(self) -> ProbeResult:
+        if self.result is not None and time.monotonic() < self._expires_at:
+            return self.result
+        if self._in_flight is None:
+            self._in_flight = asyncio.create_task(self._run())
+            self._in_flight.add_done_callback(self._finished)
+        elif self.result is not None:
+            return self.result  # a refresh is already under way
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._in_flight), self.timeout)
+        except asyncio.TimeoutError:
+            result = ProbeResult(ok=False, latency_ms=self.timeout * 1000, checked_at=datetime.utcnow(),
+                                 error=f"timed out after {self.timeout}s")
+            self._store(result)
+            return result
+
+
+def _check_database():
+    from database import engine
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+def _check_storage():
+    from services.mock_storage_service import MockStorageService
+    from services.storage_service import azure_storage_configured
+    storage = registry.get("storage")
+    # Azure failed at startup and uploads are going to container-local disk instead
+    if azure_storage_configured() and isinstance(storage, MockStorageService):
+        raise RuntimeError("Azure storage is configured but unavailable; using local mock storage")
+    storage.ping(timeout=int(HEALTH_PROBE_TIMEOUT) or 1)
+
+
+def _check_fcm_credentials():
+    # Fetches (or reuses, while still valid) the OAuth token FCM sends are authorized with
+    app = registry.get("firebase")
+    app.credential.get_access_token()
+
+
+PROBES: List[Probe] = [
+    Probe("database", _check_database),
+    Probe("storage", _check_storage),
+    # Only the outbox worker sends pushes, so FCM trouble is reported but doesn't pull the API out of rotation
+    Probe("fcm", _check_fcm_credentials, required=False),
+]
+
+
+async def readiness() -> Dict[str, object]:
+    results = await asyncio.gather(*(probe.get() for probe in PROBES))
+    checks = {
+        probe.name: {
+            "ok": result.ok,
+            "required": probe.required,
+            "latency_ms": result.latency_ms,
+            "checked_at": result.checked_at.isoformat() + "Z",
+            **({"error": result.error} if result.error else {}),
+        }
+        for probe, result in zip(PROBES, results)
+    }
+    ready = all(result.ok for probe, result in zip(PROBES, results) if probe.required)
+    return {"status": "ready" if ready else "unavailable", "checks": checks}
@@ -0,0 +1,181 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Under gunicorn with several workers, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all of them
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+registry = CollectorRegistry(auto_describe=True)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status.",
+    ["method", "route", "status"], registry=registry,
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte.",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size.",
+    ["method", "route"], buckets=SIZE_BUCKETS, registry=registry,
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled.",
+    registry=registry, multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements executed per request.",
+    ["method", "route"], buckets=QUERY_COUNT_BUCKETS, registry=registry,
+)
+DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request.",
+    ["method", "route"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+DB_STATEMENTS = Histogram(
+    "db_statement_duration_seconds", "Duration of individual database statements (all callers).",
+    buckets=LATENCY_BUCKETS, registry=registry,
+)
+
+
+class RequestDBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set per request by MetricsMiddleware. The object is shared with the
+# threadpool thread a sync handler runs on (contextvars are copied into it).
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def current_db_stats() -> Optional[RequestDBStats]:
+    return _request_db_stats.get()
+
+
+# Registered on the Engine class so the sync engine, the lazily created async
+# engine (via its sync_engine) and any script engines are all covered
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    DB_STATEMENTS.observe(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't fire for a failed statement; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+class PoolCollector:
+    """Exports database.pool_status() at scrape time."""
+
+    def collect(self):
+        from database import pool_status
+        for name, value in pool_status().items():
+            gauge = GaugeMetricFamily(f"db_pool_{name}", f"Connection pool {name.replace('_', ' ')}.")
+            gauge.add_metric([], value)
+            yield gauge
+
+
+registry.register(PoolCollector())
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording, per route template: request count by
+    status, latency, response size, and the DB statements and DB time the
+    request caused. Labels use the matched route (/students/{student_id}),
+    never the raw path, so cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._children = {}
+
+    def _observe(self, method: str, route: str, status: int, elapsed: float, size: int, db: RequestDBStats):
+        key = (method, route)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                LATENCY.labels(method, route),
+                RESPONSE_SIZE.labels(method, route),
+                DB_QUERIES.labels(method, route),
+                DB_TIME.labels(method, route),
+            )
+        latency, response_size, db_queries, db_time = children
+        latency.observe(elapsed)
+        response_size.observe(size)
+        db_queries.observe(db.queries)
+        db_time.observe(db.seconds)
+        REQUESTS.labels(method, route, str(status)).inc()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        db_stats = RequestDBStats()
+        token = _request_db_stats.set(db_stats)
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _request_db_stats.reset(token)
+            # The router stores the matched route in the scope it was handed
+            route = scope.get("route")
+            self._observe(scope["method"], getattr(route, "path", "unmatched"), status_code, elapsed, size, db_stats)
+
+
+def render_metrics():
+    """Exposition body and content type for GET /metrics."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        scrape_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(scrape_registry)
+        scrape_registry.register(PoolCollector())
+        return generate_latest(scrape_registry), CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,9 +1,17 @@
+import asyncio
+import hashlib
+import hmac
+import logging
 import os
 import uuid
-from datetime import datetime
-from typing import BinaryIO, Tuple, Optional
+from datetime import datetime, timedelta
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, Optional, Set, Tuple
 import mimetypes
 
+from .storage_errors import FileTooLargeError
+
+logger = logging.getLogger(__name__)
+
 class MockStorageService:
     """Mock storage service for testing without Azure Storage account."""
 
@@ -12,7 +20,16 @@ class MockStorageService:
         # Use local temp directory for storing files during testing
         self.base_path = "/tmp/aada_documents"
         os.makedirs(self.base_path, exist_ok=True)
-        print(f"📁 Mock Storage initialized at: {self.base_path}")
+        # Stands in for the storage account key when signing mock URLs. Set
+        # MOCK_STORAGE_SIGNING_KEY when running several workers, so a URL signed
+        # by one verifies on the others.
+        key = os.getenv("MOCK_STORAGE_SIGNING_KEY")
+        self._signing_key = key.encode() if key else os.urandom(32)
+        # Content types recorded by direct uploads (PUT /mock-storage/...)
+        self._content_types: Dict[str, str] = {}
+        # Blobs locked by seal_upload (the mock stand-in for an infinite lease)
+        self._sealed: Set[str] = set()
+        logger.info("Mock Storage initialized at %s", self.base_path)
 
     def _generate_blob_name(self, user_id: int, document_type: str, original_filename: str) -> str:
         """Generate a unique blob name for the document."""
@@ -57,34 +74,168 @@ class MockStorageService:
             # Generate mock URL
             blob_url = f"http://localhost:8000/mock-storage/{blob_name}"
 
-            print(f"📄 Mock file saved: {blob_name}")
+            logger.info("Mock file saved: %s", blob_name)
             return blob_name, blob_url
 
         except Exception as e:
-            print(f"❌ Error uploading document: {e}")
+            logger.error("Error uploading document %s: %s", filename, e)
             raise
 
+    async def upload_document_stream(
+        self,
+        user_id: int,
+        document_type: str,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        max_size: Optional[int] = None
+    ) -> Tuple[str, str, int]:
+        """
+        Stream a document to mock storage chunk by chunk, off the event loop.
+        """
+        allowed_extensions = {'.jpg', '.jpeg', '.png', '.pdf', '.doc', '.docx'}
+        file_extension = os.path.splitext(filename)[1].lower()
+        if file_extension not in allowed_extensions:
+            raise ValueError(f"File type {file_extension} not allowed. Allowed types: {allowed_extensions}")
+
+        blob_name = self._generate_blob_name(user_id, document_type, filename)
+        file_path = os.path.join(self.base_path, blob_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        size = 0
+        f = await asyncio.to_thread(open, file_path, 'wb')
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise FileTooLargeError(max_size)
+                await asyncio.to_thread(f.write, chunk)
+        except Exception:
+            f.close()
+            os.remove(file_path)
+            raise
+        f.close()
+
+        logger.info("Mock file streamed: %s", blob_name, extra={"bytes": size})
+        return blob_name, self.get_document_url(blob_name), size
+
+    async def close(self):
+        """Nothing to release for mock storage."""
+
     def delete_document(self, blob_name: str) -> bool:
         """Delete a document from mock storage."""
         try:
             file_path = os.path.join(self.base_path, blob_name)
+            self._sealed.discard(blob_name)
             if os.path.exists(file_path):
                 os.remove(file_path)
-                print(f"🗑️  Mock file deleted: {blob_name}")
+                logger.info("Mock file deleted: %s", blob_name)
                 return True
             return False
         except Exception as e:
-            print(f"❌ Error deleting document {blob_name}: {e}")
+            logger.error("Error deleting document %s: %s", blob_name, e)
             return False
 
     def get_document_url(self, blob_name: str) -> str:
         """Get the URL for a document."""
         return f"http://localhost:8000/mock-storage/{blob_name}"
 
+    def blob_name_from_url(self, blob_url: str) -> str:
+        """Recover the blob name from a mock storage URL."""
+        return blob_url.split("/mock-storage/", 1)[-1].split("?", 1)[0]
+
+    def _sign(self, blob_name: str, expiry: int, permission: str) -> str:
+        # The permission is signed too, so an upload URL can't be used to read and vice versa
+        message = f"{blob_name}:{expiry}:{permission}".encode()
+        return hmac.new(self._signing_key, message, hashlib.sha256).hexdigest()
+
+    def _signed_url(self, blob_name: str, expiry: int, permission: str) -> str:
+        return (f"{self.get_document_url(blob_name)}?se={expiry}&sp={permission}"
+                f"&sig={self._sign(blob_name, expiry, permission)}")
+
+    def generate_upload_url(
+        self,
+        user_id: int,
+        document_type: str,
+        filename: str,
+        expiry_minutes: int = 15
+    ) -> Tuple[str, str, str, datetime]:
+        """Generate a signed, expiring upload URL served by the mock storage router."""
+        blob_name = self._generate_blob_name(user_id, document_type, filename)
+        expires_at = datetime.utcnow() + timedelta(minutes=expiry_minutes)
+        expiry = int(expires_at.timestamp())
+        blob_url = self.get_document_url(blob_name)
+        upload_url = self._signed_url(blob_name, expiry, "cw")
+        return blob_name, blob_url, upload_url, expires_at
+
+    def verify_signature(self, blob_name: str, expiry: int, signature: str, permission: str) -> bool:
+        """Check a mock URL's signature, expiry and permission (cw: upload, r: read)."""
+        if expiry < datetime.utcnow().timestamp():
+            return False
+        return hmac.compare_digest(self._sign(blob_name, expiry, permission), signature)
+
+    def verify_upload_signature(self, blob_name: str, expiry: int, signature: str) -> bool:
+        return self.verify_signature(blob_name, expiry, signature, "cw")
+
+    async def put_blob(self, blob_name: str, chunks: AsyncIterator[bytes], content_type: Optional[str]) -> int:
+        """Store a directly uploaded blob (the mock equivalent of a Put Blob call)."""
+        file_path = os.path.join(self.base_path, blob_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        size = 0
+        with await asyncio.to_thread(open, file_path, 'wb') as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        if content_type:
+            self._content_types[blob_name] = content_type
+        return size
+
+    def seal_upload(self, blob_name: str) -> Optional[Dict[str, object]]:
+        """Refuse further direct uploads to a blob and return its properties (None if it does not exist)."""
+        props = self.get_blob_properties(blob_name)
+        if props is not None:
+            self._sealed.add(blob_name)
+        return props
+
+    def is_sealed(self, blob_name: str) -> bool:
+        return blob_name in self._sealed
+
+    def get_blob_properties(self, blob_name: str) -> Optional[Dict[str, object]]:
+        """Return the size and content type of a stored blob, or None if it does not exist."""
+        file_path = os.path.join(self.base_path, blob_name)
+        if not os.path.exists(file_path):
+            return None
+        content_type = self._content_types.get(blob_name) or mimetypes.guess_type(blob_name)[0]
+        stat = os.stat(file_path)
+        return {
+            "size": stat.st_size,
+            "content_type": content_type or "application/octet-stream",
+            "etag": f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"',
+            "last_modified": datetime.utcfromtimestamp(stat.st_mtime),
+        }
+
+    def iter_blob(self, blob_name: str, offset: Optional[int] = None, length: Optional[int] = None,
+                  chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream a stored blob (or a byte range of it) in chunks."""
+        remaining = length
+        with open(os.path.join(self.base_path, blob_name), 'rb') as f:
+            f.seek(offset or 0)
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
     def generate_download_url(self, blob_name: str, expiry_hours: int = 24) -> str:
-        """Generate a temporary download URL."""
-        # For mock, just return the regular URL
-        return self.get_document_url(blob_name)
+        """Generate a signed, expiring read URL (the mock equivalent of a read SAS)."""
+        expiry = int((datetime.utcnow() + timedelta(hours=expiry_hours)).timestamp())
+        return self._signed_url(blob_name, expiry, "r")
+
+    def ping(self, timeout: int = 3) -> None:
+        """Check the local storage directory is still usable."""
+        if not os.access(self.base_path, os.W_OK):
+            raise OSError(f"{self.base_path} is not writable")
 
     def list_user_documents(self, user_id: int) -> list:
         """List all documents for a specific user."""
@@ -103,7 +254,7 @@ class MockStorageService:
 
             return blob_names
         except Exception as e:
-            print(f"❌ Error listing documents for user {user_id}: {e}")
+            logger.error("Error listing documents for user %s: %s", user_id, e)
             return []
 
 # Create mock service instance
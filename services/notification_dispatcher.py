@@ -0,0 +1,216 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from models import Student, UserProfile
+
+# FCM accepts at most 500 messages per send_each call
+FCM_MAX_BATCH = 500
+DISPATCH_CONCURRENCY = int(os.getenv("FCM_DISPATCH_CONCURRENCY", "4"))
+
+# FCM error codes that mean the token will never work again
+INVALID_TOKEN_ERRORS = {"UNREGISTERED", "SENDER_ID_MISMATCH"}
+# INVALID_ARGUMENT also covers malformed payloads (bad data, oversized
+# message); it only condemns the token when the error is about the token
+_MALFORMED_TOKEN_ERROR = "INVALID_ARGUMENT"
+
+
+@dataclass
+class PushMessage:
+    token: str
+    title: str
+    body: str
+    data: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class SendResult:
+    token: str
+    success: bool
+    message_id: Optional[str] = None
+    error_code: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def token_invalid(self) -> bool:
+        if self.error_code in INVALID_TOKEN_ERRORS:
+            return True
+        return self.error_code == _MALFORMED_TOKEN_ERROR and "registration token" in (self.error or "").lower()
+
+
+@dataclass
+class DispatchReport:
+    """Per-run results of a dispatch."""
+    results: List[SendResult] = field(default_factory=list)
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for r in self.results if r.success)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.sent
+
+    @property
+    def invalid_tokens(self) -> Set[str]:
+        return {r.token for r in self.results if r.token_invalid}
+
+    def summary(self) -> str:
+        rate = len(self.results) / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        return (
+            f"{self.sent} sent, {self.failed} failed ({len(self.invalid_tokens)} invalid tokens) "
+            f"in {self.batches} batches, {self.elapsed_seconds:.2f}s ({rate:.1f} msg/s)"
+        )
+
+
+class FirebaseTransport:
+    """Sends a batch through firebase_admin.messaging.send_each (one HTTP/2 fan-out per batch)."""
+
+    def __init__(self, app=None, dry_run: bool = False):
+        self.app = app
+        self.dry_run = dry_run
+
+    def send_batch(self, messages: Sequence[PushMessage]) -> List[SendResult]:
+        from firebase_admin import exceptions, messaging
+
+        batch = [
+            messaging.Message(
+                token=m.token,
+                notification=messaging.Notification(title=m.title, body=m.body),
+                data=m.data,
+            )
+            for m in messages
+        ]
+        response = messaging.send_each(batch, dry_run=self.dry_run, app=self.app)
+
+        results = []
+        for message, resp in zip(messages, response.responses):
+            if resp.success:
+                results.append(SendResult(message.token, True, message_id=resp.message_id))
+                continue
+            exc = resp.exception
+            if isinstance(exc, messaging.UnregisteredError):
+                code = "UNREGISTERED"
+            elif isinstance(exc, messaging.SenderIdMismatchError):
+                code = "SENDER_ID_MISMATCH"
+            elif isinstance(exc, exceptions.InvalidArgumentError):
+                code = "INVALID_ARGUMENT"
+            else:
+                code = getattr(exc, "code", None) or "UNKNOWN"
+            results.append(SendResult(message.token, False, error_code=code, error=str(exc)))
+        return results
+
+
+class HttpV1Transport:
+    """
+    Sends a batch straight to an FCM HTTP v1 compatible endpoint over one pooled
+    HTTP client. Used to benchmark against a local fake FCM server.
+    """
+
+    def __init__(self, base_url: str, project_id: str, access_token: str, concurrency: int = 32):
+        import httpx
+
+        self.url = f"{base_url.rstrip('/')}/v1/projects/{project_id}/messages:send"
+        self.client = httpx.Client(
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _send_one(self, message: PushMessage) -> SendResult:
+        payload = {
+            "message": {
+                "token": message.token,
+                "notification": {"title": message.title, "body": message.body},
+            }
+        }
+        if message.data:
+            payload["message"]["data"] = message.data
+        try:
+            resp = self.client.post(self.url, json=payload)
+        except Exception as e:
+            return SendResult(message.token, False, error_code="UNAVAILABLE", error=str(e))
+        if resp.status_code == 200:
+            return SendResult(message.token, True, message_id=resp.json().get("name"))
+
+        error = resp.json().get("error", {}) if resp.content else {}
+        code = error.get("status", "UNKNOWN")
+        for detail in error.get("details", []):
+            code = detail.get("errorCode", code)
+        return SendResult(message.token, False, error_code=code, error=error.get("message"))
+
+    def send_batch(self, messages: Sequence[PushMessage]) -> List[SendResult]:
+        return list(self.executor.map(self._send_one, messages))
+
+    def close(self):
+        self.executor.shutdown()
+        self.client.close()
+
+
+class NotificationDispatcher:
+    """
+    Groups push messages into batches of up to 500, sends the batches
+    concurrently through a pluggable transport, and collects per-token results.
+    """
+
+    def __init__(self, transport=None, batch_size: int = FCM_MAX_BATCH, concurrency: int = DISPATCH_CONCURRENCY):
+        self.transport = transport or FirebaseTransport()
+        self.batch_size = max(1, min(batch_size, FCM_MAX_BATCH))
+        self.concurrency = max(1, concurrency)
+
+    def _send(self, batch: Sequence[PushMessage]) -> List[SendResult]:
+        try:
+            return self.transport.send_batch(batch)
+        except Exception as e:
+            # A whole-batch failure (auth, network) is reported against every token in it
+            return [SendResult(m.token, False, error_code="UNAVAILABLE", error=str(e)) for m in batch]
+
+    def dispatch(self, messages: Iterable[PushMessage]) -> DispatchReport:
+        messages = [m for m in messages if m.token]
+        batches = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+        report = DispatchReport(batches=len(batches))
+        started = time.perf_counter()
+
+        if len(batches) == 1:
+            report.results = self._send(batches[0])
+        elif batches:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                for results in pool.map(self._send, batches):
+                    report.results.extend(results)
+
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+
+def has_fcm_token(token_column):
+    """Filter for rows with a usable push token; cleared tokens may be stored as "" rather than NULL."""
+    return and_(token_column.isnot(None), token_column != "")
+
+
+def clear_invalid_tokens(db: Session, tokens: Iterable[str]) -> int:
+    """
+    Null out tokens FCM rejected as unregistered/invalid on both Student and
+    UserProfile so later runs skip them. Does not commit.
+    """
+    tokens = list(set(tokens))
+    if not tokens:
+        return 0
+    cleared = (
+        db.query(Student)
+          .filter(Student.fcm_token.in_(tokens))
+          .update({Student.fcm_token: None}, synchronize_session=False)
+    )
+    cleared += (
+        db.query(UserProfile)
+          .filter(UserProfile.fcm_token.in_(tokens))
+          .update({UserProfile.fcm_token: None}, synchronize_session=False)
+    )
+    return cleared
@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from models import NotificationOutbox
+from services.notification_dispatcher import (
+    NotificationDispatcher,
+    PushMessage,
+    clear_invalid_tokens,
+)
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+
+def enqueue_pushes(db: Session, messages: Iterable[PushMessage]) -> int:
+    """
+    Add push messages to the outbox in the caller's transaction. Does not commit,
+    so the rows become visible to workers together with the caller's own writes.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "token": m.token,
+            "title": m.title,
+            "body": m.body,
+            "data": json.dumps(m.data) if m.data else None,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for m in messages
+        if m.token
+    ]
+    if rows:
+        db.bulk_insert_mappings(NotificationOutbox, rows)
+    return len(rows)
+
+
+def _backoff(attempts: int) -> timedelta:
+    """Exponential backoff with jitter (half to full of the capped delay)."""
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def claim_batch(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> List[dict]:
+    """
+    Claim up to ``limit`` due rows with SELECT ... FOR UPDATE SKIP LOCKED, so
+    concurrent workers never pick the same row. Claimed rows are leased: if the
+    worker dies, they become claimable again once the lease runs out.
+    """
+    now = datetime.utcnow()
+    rows = (
+        db.query(NotificationOutbox)
+          .filter(NotificationOutbox.status.in_(["pending", "sending"]))
+          .filter(NotificationOutbox.next_attempt_at <= now)
+          .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+          .limit(limit)
+          .with_for_update(skip_locked=True)
+          .all()
+    )
+    claimed = []
+    for row in rows:
+        row.status = "sending"
+        row.attempts += 1
+        row.locked_at = now
+        row.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        claimed.append({
+            "id": row.id,
+            "attempts": row.attempts,
+            "locked_at": now,
+            "message": PushMessage(
+                token=row.token,
+                title=row.title,
+                body=row.body,
+                data=json.loads(row.data) if row.data else None,
+            ),
+        })
+    db.commit()
+    return claimed
+
+
+def process_batch(db: Session, dispatcher: Optional[NotificationDispatcher] = None,
+                  limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Claim, send and record one batch. Returns the number of rows processed.
+    The network call happens with no transaction open.
+    """
+    claimed = claim_batch(db, limit)
+    if not claimed:
+        return 0
+
+    report = (dispatcher or NotificationDispatcher()).dispatch(c["message"] for c in claimed)
+    now = datetime.utcnow()
+
+    sent, failed, retry = [], [], []
+    for row, result in zip(claimed, report.results):
+        lease = {"b_id": row["id"], "b_locked_at": row["locked_at"]}
+        if result.success:
+            sent.append({**lease, "b_message_id": result.message_id})
+        elif result.token_invalid or row["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+            failed.append({**lease, "b_last_error": f"{result.error_code}: {result.error}"})
+        else:
+            retry.append({**lease, "b_next_attempt_at": now + _backoff(row["attempts"]),
+                          "b_last_error": f"{result.error_code}: {result.error}"})
+
+    # Only rows still under this worker's lease are written: if the lease ran
+    # out mid-send and another worker re-claimed a row, its locked_at differs
+    # and that worker's outcome wins. Core (table) updates, so each outcome
+    # runs as one executemany rather than ORM bulk-by-primary-key.
+    outbox = NotificationOutbox.__table__
+    leased = update(outbox).where(
+        outbox.c.id == bindparam("b_id"),
+        outbox.c.locked_at == bindparam("b_locked_at"),
+    )
+    outcomes = [
+        (sent, leased.values(status="sent", sent_at=now, message_id=bindparam("b_message_id"),
+                             locked_at=None, last_error=None)),
+        (failed, leased.values(status="failed", locked_at=None, last_error=bindparam("b_last_error"))),
+        (retry, leased.values(status="pending", locked_at=None, next_attempt_at=bindparam("b_next_attempt_at"),
+                              last_error=bindparam("b_last_error"))),
+    ]
+
+    try:
+        for params, stmt in outcomes:
+            if params:
+                db.execute(stmt, params)
+        clear_invalid_tokens(db, report.invalid_tokens)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info("Outbox batch: %s", report.summary())
+    return len(claimed)
@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.orm import Session
+
+CURSOR_VERSION = 1
+# Below this planner estimate the exact count is cheap enough to run instead
+EXACT_COUNT_THRESHOLD = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe cursor holding the sort key of the last row on a page."""
+    key = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps({"v": CURSOR_VERSION, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple[Any, ...]:
+    """Parse a cursor back into sort key values typed like ``columns``."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload.get("v") != CURSOR_VERSION or len(payload["k"]) != len(columns):
+            raise ValueError("cursor version or shape mismatch")
+        values = []
+        for column, value in zip(columns, payload["k"]):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+            values.append(value)
+        return tuple(values)
+    except (ValueError, TypeError, KeyError, AttributeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_page(stmt: Select, columns: Sequence, cursor: Optional[str], limit: Optional[int]) -> Select:
+    """
+    Order ``stmt`` by ``columns`` (ascending; the last one must be unique, e.g.
+    the primary key) and resume after ``cursor``. Fetches one extra row so
+    page_results can tell whether another page follows. With no limit the
+    whole remainder is returned.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if len(columns) > 1:
+            stmt = stmt.where(tuple_(*columns) > tuple_(*values))
+        else:
+            stmt = stmt.where(columns[0] > values[0])
+    stmt = stmt.order_by(*columns)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def page_results(rows: List[Any], columns: Sequence, limit: Optional[int]) -> Tuple[List[Any], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page, if any."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def set_page_headers(response: Response, request: Request, next_cursor: Optional[str],
+                     total_estimate: Optional[int] = None) -> None:
+    """
+    Expose pagination in headers so list-shaped response bodies stay unchanged
+    for existing clients.
+    """
+    if next_cursor:
+        params = dict(request.query_params)
+        params["cursor"] = next_cursor
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.path}?{urlencode(params)}>; rel="next"'
+    if total_estimate is not None:
+        response.headers["X-Total-Count-Estimate"] = str(total_estimate)
+
+
+def estimate_count(db: Session, stmt: Select) -> int:
+    """
+    Row count for ``stmt`` (unpaged, unordered): the planner's estimate when
+    it is large, where an exact COUNT would scan that many rows, otherwise the
+    exact count.
+    """
+    compiled = stmt.compile(dialect=db.get_bind().dialect)
+    if db.get_bind().dialect.name == "postgresql":
+        plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate
+    return db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt cost; raising it makes existing hashes get upgraded on their next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker processes dedicated to hashing (0 = hash inline, e.g. for scripts)
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+# Hash jobs allowed in flight + queued before new ones are rejected. This also
+# caps how many request threads can be parked waiting on bcrypt.
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", str(max(PASSWORD_POOL_WORKERS, 1) * 4)))
+PASSWORD_POOL_TIMEOUT = float(os.getenv("PASSWORD_POOL_TIMEOUT", "10"))
+
+# min/max pin the cost, so hashes made with any other cost report needing an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool is at its admission limit, or a job didn't finish within the timeout."""
+
+
+# These run inside the worker processes
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+class PasswordPool:
+    """Size-limited process pool for bcrypt with admission control and queue-depth metrics."""
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, max_pending: int = PASSWORD_POOL_MAX_PENDING,
+                 timeout: float = PASSWORD_POOL_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.busy_seconds_total = 0.0
+        self.max_pending_seen = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent has request threads and open DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        # Another thread may already have replaced it
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _job_done(self, started: float, future: Future) -> None:
+        # Runs when the worker actually finishes (or the job is cancelled before
+        # starting), not when the caller gives up, so pending counts real load
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled() and not isinstance(future.exception(), BrokenProcessPool):
+                self.completed += 1
+                self.busy_seconds_total += time.perf_counter() - started
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        try:
+            return self._attempt(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory) and took the executor with it;
+            # the next attempt starts a fresh one
+            pass
+        try:
+            return self._attempt(fn, *args)
+        except BrokenProcessPool:
+            raise PasswordPoolBusy("password hashing pool keeps losing its workers")
+
+    def _attempt(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy(f"{self.pending} password hash jobs pending")
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception as exc:
+            with self._lock:
+                self.pending -= 1
+            if isinstance(exc, BrokenProcessPool):
+                self._discard_executor(executor)
+            raise
+        future.add_done_callback(lambda f: self._job_done(started, f))
+
+        try:
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        except FutureTimeout:
+            future.cancel()  # only takes effect if it is still queued
+            with self._lock:
+                self.timed_out += 1
+            raise PasswordPoolBusy(f"password hash job did not finish within {self.timeout}s")
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns a new hash if the stored one uses outdated parameters."""
+        return self._run(_verify_and_update, password, hashed)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_seconds": self.busy_seconds_total / self.completed if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+password_pool = PasswordPool()
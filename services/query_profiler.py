@@ -0,0 +1,291 @@
+"""
+SQL query profiler and N+1 detector (development / test use).
+
+Counts and times every statement issued while a profile is active, groups
+them by shape (the statement with literals, bind parameters and IN lists
+collapsed), and flags a SELECT shape repeated N_PLUS_ONE_THRESHOLD or more
+times as a likely N+1: a query issued once per row of an earlier result.
+
+- Requests: set SQL_PROFILE=1 and every response carries X-SQL-Queries,
+  X-SQL-Time-Ms, X-SQL-N-Plus-One and X-SQL-Profile headers; the full JSON
+  report is at /debug/sql/<X-SQL-Profile>.
+- Scripts: `python -m services.query_profiler push_reminders.py [args]`
+  runs the script under a profile and prints the report to stderr.
+- Tests: `with assert_query_budget(3): client.get("/auth/me")` fails with
+  the report when the block issues more statements (or any N+1).
+
+Nothing is hooked until the first profile starts, so with SQL_PROFILE unset
+there is no cost.
+"""
+import json
+import os
+import re
+import runpy
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.ttl_cache import TTLCache
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "").lower() in ("1", "true", "yes", "on")
+# A SELECT shape repeated this many times within one profile is reported as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_PROFILE_N_PLUS_ONE_THRESHOLD", "5"))
+# How many request reports /debug/sql keeps, and for how long
+SQL_PROFILE_KEEP = int(os.getenv("SQL_PROFILE_KEEP", "200"))
+SQL_PROFILE_KEEP_SECONDS = float(os.getenv("SQL_PROFILE_KEEP_SECONDS", "3600"))
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+_IN_LIST = re.compile(r"\bIN\s*\(\s*(?:%\(\w+\)s|\?|\$\d+|'(?:[^']|'')*'|\d+)(?:\s*,\s*(?:%\(\w+\)s|\?|\$\d+|'(?:[^']|'')*'|\d+))*\s*\)", re.I)
+_BIND = re.compile(r"%\(\w+\)s|\$\d+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with literals, bind parameters and IN lists made uniform."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("IN (...)", shape)
+    shape = _BIND.sub("?", shape)
+    shape = _STRING.sub("?", shape)
+    return _NUMBER.sub("?", shape)
+
+
+def _caller() -> Optional[str]:
+    """file:line of the innermost frame in this project's own code."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(_PROJECT_ROOT) and filename != _THIS_FILE
+                and "site-packages" not in filename):
+            return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class _Shape:
+    __slots__ = ("shape", "example", "count", "seconds", "max_seconds", "origins")
+
+    def __init__(self, shape: str, example: str):
+        self.shape = shape
+        self.example = example
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.origins: Dict[str, int] = {}
+
+
+class QueryProfile:
+    """Statements recorded while this profile was active, grouped by shape."""
+
+    def __init__(self, label: str = "", n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.started_at = time.time()
+        self.queries = 0
+        self.seconds = 0.0
+        self._shapes: Dict[str, _Shape] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float, origin: Optional[str]) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is None:
+                entry = self._shapes[shape] = _Shape(shape, statement[:2000])
+            entry.count += 1
+            entry.seconds += seconds
+            entry.max_seconds = max(entry.max_seconds, seconds)
+            if origin is not None:
+                entry.origins[origin] = entry.origins.get(origin, 0) + 1
+            self.queries += 1
+            self.seconds += seconds
+
+    def n_plus_one(self) -> List[_Shape]:
+        return [s for s in list(self._shapes.values())
+                if s.count >= self.n_plus_one_threshold and s.shape.lstrip("( ").upper().startswith(("SELECT", "WITH"))]
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            shapes = sorted(self._shapes.values(), key=lambda s: s.seconds, reverse=True)
+            suspects = {id(s) for s in self.n_plus_one()}
+            return {
+                "id": self.id,
+                "label": self.label,
+                "started_at": self.started_at,
+                "queries": self.queries,
+                "time_ms": round(self.seconds * 1000, 2),
+                "distinct_shapes": len(shapes),
+                "n_plus_one": [
+                    {"shape": s.shape, "count": s.count, "origins": s.origins} for s in shapes if id(s) in suspects
+                ],
+                "shapes": [
+                    {
+                        "shape": s.shape,
+                        "count": s.count,
+                        "time_ms": round(s.seconds * 1000, 2),
+                        "max_ms": round(s.max_seconds * 1000, 2),
+                        "origins": s.origins,
+                        "example": s.example,
+                    }
+                    for s in shapes
+                ],
+            }
+
+
+# The profile for the current request or block. Sync handlers see it too:
+# their threadpool thread runs in a copy of the request's context.
+_current: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+# Profiles that record statements from every thread (tests: TestClient runs
+# the app on its own thread, outside the test's context)
+_global_profiles: List[QueryProfile] = []
+_listening = False
+_listen_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None or _global_profiles:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("profile_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    origin = _caller()
+    profile = _current.get()
+    if profile is not None:
+        profile.record(statement, elapsed, origin)
+    for global_profile in list(_global_profiles):
+        if global_profile is not profile:
+            global_profile.record(statement, elapsed, origin)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("profile_started"):
+        conn.info["profile_started"].pop()
+
+
+def _ensure_listening() -> None:
+    global _listening
+    with _listen_lock:
+        if _listening:
+            return
+        # On the Engine class, so the async engine's statements are seen too
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listening = True
+
+
+@contextmanager
+def profile_queries(label: str = "", all_threads: bool = False,
+                    n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD) -> Iterator[QueryProfile]:
+    """
+    Record statements issued inside the block. By default only statements
+    from this context (this request, or this thread in a script) count;
+    all_threads=True also counts other threads, e.g. a TestClient's app.
+    """
+    _ensure_listening()
+    profile = QueryProfile(label, n_plus_one_threshold)
+    token = _current.set(profile)
+    if all_threads:
+        _global_profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        if all_threads:
+            _global_profiles.remove(profile)
+        _current.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, allow_n_plus_one: bool = False, label: str = "") -> Iterator[QueryProfile]:
+    """Fail if the block issues more than max_queries statements, or any N+1 pattern."""
+    with profile_queries(label, all_threads=True) as profile:
+        yield profile
+    problems = []
+    if profile.queries > max_queries:
+        problems.append(f"{profile.queries} queries, budget is {max_queries}")
+    if not allow_n_plus_one and profile.n_plus_one():
+        problems.append(f"{len(profile.n_plus_one())} N+1 pattern(s)")
+    if problems:
+        raise QueryBudgetExceeded(f"{label or 'block'}: {'; '.join(problems)}\n"
+                                  + json.dumps(profile.report(), indent=2, default=str))
+
+
+# Request reports, by profile id, for /debug/sql
+reports = TTLCache(maxsize=SQL_PROFILE_KEEP, ttl=SQL_PROFILE_KEEP_SECONDS)
+
+
+class QueryProfilerMiddleware:
+    """
+    Profiles each HTTP request and reports the totals in response headers.
+    Headers are written when the response starts, so statements issued while
+    a StreamingResponse is streaming only appear in the /debug/sql report.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/debug/sql"):
+            return await self.app(scope, receive, send)
+
+        with profile_queries(f"{scope['method']} {scope['path']}") as profile:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers += [
+                        (b"x-sql-queries", str(profile.queries).encode()),
+                        (b"x-sql-time-ms", f"{profile.seconds * 1000:.2f}".encode()),
+                        (b"x-sql-n-plus-one", str(len(profile.n_plus_one())).encode()),
+                        (b"x-sql-profile", profile.id.encode()),
+                    ]
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    profile.label = f"{scope['method']} {route.path}"
+                reports.set(profile.id, profile.report())
+
+
+def _main():
+    """python -m services.query_profiler script.py [args...]"""
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m services.query_profiler script.py [args...]")
+    script = sys.argv[1]
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    with profile_queries(script, all_threads=True) as profile:
+        try:
+            runpy.run_path(script, run_name="__main__")
+        finally:
+            report = profile.report()
+            print(json.dumps(report, indent=2, default=str), file=sys.stderr)
+            print(f"\n{report['queries']} queries, {report['time_ms']}ms, "
+                  f"{len(report['n_plus_one'])} N+1 pattern(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,252 @@
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from services.ttl_cache import TTLCache
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()  # memory, postgres
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Reverse proxies in front of the app that append to X-Forwarded-For (the App
+# Service front end: 1). The client IP is the entry the outermost of them
+# appended; anything to its left was sent by the client and can be forged.
+# 0 = no proxy, use the connection's peer address.
+RATE_LIMIT_TRUSTED_PROXY_HOPS = int(os.getenv("RATE_LIMIT_TRUSTED_PROXY_HOPS", "1"))
+
+
+@dataclass(frozen=True)
+class Limit:
+    """A token bucket: ``burst`` requests at once, refilled at ``per_minute``."""
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    method: str
+    path: str
+    per_ip: Limit
+    per_email: Optional[Limit] = None
+    email_query_param: Optional[str] = None
+
+    @property
+    def email_in_body(self) -> bool:
+        """The per-email bucket is applied by the handler, via enforce_email."""
+        return self.per_email is not None and self.email_query_param is None
+
+
+# Endpoints that run bcrypt or send email, keyed by client IP and by account email
+RULES: List[Rule] = [
+    Rule("login", "POST", "/auth/login", per_ip=Limit(20, 10), per_email=Limit(5, 5)),
+    Rule("legacy_login", "GET", "/auth/login", per_ip=Limit(30, 10), per_email=Limit(10, 5),
+         email_query_param="email"),
+    Rule("forgot_password", "POST", "/auth/forgot-password", per_ip=Limit(5, 5), per_email=Limit(1, 3)),
+]
+
+
+class MemoryBucketStore:
+    """Per-process token buckets."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        """Spend ``cost`` tokens. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+            tokens = min(float(limit.burst), tokens + (now - updated) * limit.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+        return allowed, 0.0 if allowed else (cost - tokens) / limit.rate
+
+    def _evict(self, now: float):
+        # Drop the oldest half; buckets idle that long have refilled anyway
+        for key, _ in sorted(self._buckets.items(), key=lambda kv: kv[1][1])[: len(self._buckets) // 2]:
+            del self._buckets[key]
+
+
+class PostgresBucketStore:
+    """
+    Token buckets in the rate_limit_buckets table, shared by every worker and
+    node. Refill, spend and the allow decision happen in one atomic upsert.
+    Keys recently denied are remembered locally until their retry time, so a
+    client hammering a closed bucket doesn't cost a round trip per request.
+    """
+
+    # take() is a database round trip; async callers must run it in a thread
+    blocking = True
+
+    UPSERT = """
+        INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+        VALUES (:key, :burst - :cost, :burst >= :cost, clock_timestamp())
+        ON CONFLICT (key) DO UPDATE SET
+            allowed = LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= :cost,
+            tokens = LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate)
+                     - CASE WHEN LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= :cost
+                            THEN :cost ELSE 0 END,
+            updated_at = clock_timestamp()
+        RETURNING allowed, tokens
+    """
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from database import engine
+        self.engine = engine
+        self._denied = TTLCache(maxsize=RATE_LIMIT_MAX_KEYS)
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0) -> Tuple[bool, float]:
+        retry_at = self._denied.get(key)
+        if retry_at is not None:
+            return False, max(retry_at - time.monotonic(), 0.0)
+
+        from sqlalchemy import text
+        with self.engine.begin() as conn:
+            allowed, tokens = conn.execute(
+                text(self.UPSERT),
+                {"key": key, "burst": float(limit.burst), "cost": float(cost), "rate": limit.rate},
+            ).one()
+        if allowed:
+            return True, 0.0
+
+        retry_after = (cost - tokens) / limit.rate
+        self._denied.set(key, time.monotonic() + retry_after, ttl=retry_after)
+        return False, retry_after
+
+
+class RateLimiter:
+    """Applies RULES against a bucket store and keeps per-rule counters."""
+
+    def __init__(self, store=None, rules: List[Rule] = RULES, enabled: bool = RATE_LIMIT_ENABLED):
+        if store is None:
+            store = PostgresBucketStore() if RATE_LIMIT_BACKEND == "postgres" else MemoryBucketStore()
+        self.store = store
+        self.rules = {(r.method, r.path): r for r in rules}
+        self.rules_by_name = {r.name: r for r in rules}
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {r.name: {"allowed": 0, "limited_ip": 0, "limited_email": 0} for r in rules}
+
+    def _count(self, rule: Rule, outcome: str):
+        with self._lock:
+            self.counters[rule.name][outcome] += 1
+
+    def check(self, rule: Rule, ip: Optional[str] = None, email: Optional[str] = None,
+              count_allowed: bool = True) -> Optional[float]:
+        """
+        Return None if allowed, or the Retry-After in seconds if limited.
+        ``count_allowed=False`` leaves the "allowed" counter to a later check
+        of the same request, so each request is counted once.
+        """
+        if not self.enabled:
+            return None
+        if ip is not None:
+            allowed, retry_after = self.store.take(f"{rule.name}:ip:{ip}", rule.per_ip)
+            if not allowed:
+                self._count(rule, "limited_ip")
+                return retry_after
+        if email and rule.per_email:
+            allowed, retry_after = self.store.take(f"{rule.name}:email:{email.strip().lower()}", rule.per_email)
+            if not allowed:
+                self._count(rule, "limited_email")
+                return retry_after
+        if count_allowed:
+            self._count(rule, "allowed")
+        return None
+
+    def enforce_email(self, rule_name: str, email: str) -> None:
+        """Per-account check for handlers that only know the email after parsing the body."""
+        rule = self.rules_by_name[rule_name]
+        retry_after = self.check(rule, email=email)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please try again later.",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self.counters.items()}
+
+
+def client_ip(scope, trusted_hops: int = RATE_LIMIT_TRUSTED_PROXY_HOPS) -> str:
+    """
+    The client address as seen by the outermost trusted proxy. Read from the
+    raw X-Forwarded-For rather than scope["client"], which uvicorn's
+    --proxy-headers may have rewritten from a client-supplied entry.
+    """
+    if trusted_hops > 0:
+        forwarded = [value.decode("latin-1") for name, value in scope.get("headers", [])
+                     if name == b"x-forwarded-for"]
+        hops = [hop.strip() for hop in ",".join(forwarded).split(",") if hop.strip()]
+        if hops:
+            return hops[-min(trusted_hops, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that applies the per-IP bucket (and per-email bucket when the
+    email is in the query string) before the request body is even read, so a
+    throttled client never reaches bcrypt.
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        rule = self.limiter.rules.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        email = None
+        if rule.email_query_param:
+            from urllib.parse import parse_qs
+            values = parse_qs(scope.get("query_string", b"").decode()).get(rule.email_query_param)
+            email = values[0] if values else None
+
+        ip = client_ip(scope)
+        # When the handler still has the per-email check to run, it records the outcome
+        count_allowed = not rule.email_in_body
+        if self.limiter.store.blocking:
+            retry_after = await run_in_threadpool(self.limiter.check, rule, ip, email, count_allowed)
+        else:
+            retry_after = self.limiter.check(rule, ip=ip, email=email, count_allowed=count_allowed)
+        if retry_after is None:
+            return await self.app(scope, receive, send)
+
+        response = JSONResponse(
+            {"detail": "Too many requests. Please try again later."},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
+
+
+rate_limiter = RateLimiter()
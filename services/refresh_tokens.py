@@ -0,0 +1,172 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from auth_utils import REFRESH_TOKEN_EXPIRE_DAYS, create_refresh_token, invalidate_auth_state, token_claims
+from models import RefreshTokenFamily, User
+from services.action_tokens import PURGE_BATCH_SIZE, delete_in_batches, record_token_use
+from services.ttl_cache import TTLCache
+
+# A client that retries a refresh (lost response, two tabs racing) presents the
+# token it just rotated away from; within this window that is not treated as theft
+REFRESH_REUSE_GRACE_SECONDS = float(os.getenv("REFRESH_REUSE_GRACE_SECONDS", "30"))
+
+# Ledger purpose for refresh tokens issued before families existed
+LEGACY_REFRESH = "legacy_refresh"
+
+# Claims copied from a refresh token into the access token it mints
+_USER_CLAIMS = ("user_id", "email", "role", "ver")
+
+# family_id -> True for families this process knows are revoked. Only a fast
+# reject path: rotation itself is a compare-and-swap that checks revoked_at.
+_revoked_families = TTLCache(maxsize=10000, ttl=REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+class RefreshTokenError(Exception):
+    """The refresh token cannot be used; ``reused`` is set when its family was revoked for reuse."""
+
+    def __init__(self, message: str, reused: bool = False):
+        super().__init__(message)
+        self.reused = reused
+
+
+def _new_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+def _encode(claims: Dict[str, Any], family_id: str, jti: str) -> str:
+    return create_refresh_token(data={**claims, "fid": family_id, "jti": jti})
+
+
+def user_claims(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: payload.get(k) for k in _USER_CLAIMS}
+
+
+def issue_refresh_token(db: Session, user: User) -> str:
+    """
+    Start a new family (one per login) and return its first refresh token.
+    Adds the row to the caller's transaction; the caller commits.
+    """
+    family_id, jti = _new_id(), _new_id()
+    db.add(RefreshTokenFamily(
+        family_id=family_id,
+        user_id=user.id,
+        current_jti=jti,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return _encode(token_claims(user), family_id, jti)
+
+
+def exchange_legacy_refresh_token(db: Session, token: str, payload: Dict[str, Any], user: User) -> str:
+    """
+    Move a refresh token issued before rotation (no family, no jti) into a
+    new family, once. The token itself is recorded in the used-token ledger,
+    by hash, in the same transaction as the new family, so presenting it a
+    second time is rejected like any other reused token.
+    """
+    token_id = hashlib.sha256(token.encode()).hexdigest()[:32]
+    if not record_token_use(db, token_id, LEGACY_REFRESH, datetime.utcfromtimestamp(payload["exp"])):
+        db.rollback()
+        raise RefreshTokenError("Refresh token has already been used", reused=True)
+    refresh_token = issue_refresh_token(db, user)
+    db.commit()
+    return refresh_token
+
+
+def rotate_refresh_token(db: Session, payload: Dict[str, Any]) -> str:
+    """
+    Exchange a verified refresh token payload for the next token in its family.
+
+    The happy path is a single UPDATE on the family's primary key that only
+    matches while the presented jti is still current, so two concurrent
+    refreshes with the same token cannot both succeed. Anything else is looked
+    at once more to tell a benign retry from reuse of a stolen token.
+    """
+    family_id, jti = payload["fid"], payload["jti"]
+    if _revoked_families.get(family_id):
+        raise RefreshTokenError("Refresh token has been revoked")
+
+    now = datetime.utcnow()
+    new_jti = _new_id()
+    rotated = db.execute(
+        update(RefreshTokenFamily)
+        .where(
+            RefreshTokenFamily.family_id == family_id,
+            RefreshTokenFamily.current_jti == jti,
+            RefreshTokenFamily.revoked_at.is_(None),
+            RefreshTokenFamily.expires_at > now,
+        )
+        .values(
+            current_jti=new_jti,
+            previous_jti=jti,
+            rotated_at=now,
+            expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if rotated == 1:
+        db.commit()
+        return _encode(user_claims(payload), family_id, new_jti)
+
+    db.rollback()
+    family = db.get(RefreshTokenFamily, family_id)
+    if family is None or family.revoked_at is not None or family.expires_at <= now:
+        if family is not None and family.revoked_at is not None:
+            _revoked_families.set(family_id, True)
+        raise RefreshTokenError("Refresh token has been revoked")
+    if (jti == family.previous_jti and family.rotated_at is not None
+            and (now - family.rotated_at).total_seconds() <= REFRESH_REUSE_GRACE_SECONDS):
+        raise RefreshTokenError("Refresh token was already rotated")
+
+    revoke_family(db, family_id)
+    raise RefreshTokenError("Refresh token reuse detected; session revoked", reused=True)
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    """Log out one session."""
+    db.execute(
+        update(RefreshTokenFamily)
+        .where(RefreshTokenFamily.family_id == family_id, RefreshTokenFamily.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    _revoked_families.set(family_id, True)
+
+
+def revoke_all_for_user(db: Session, user_id: int) -> int:
+    """
+    Log out every device: revoke all of the user's families and bump their
+    token version so outstanding access tokens stop working too.
+    """
+    revoked = db.execute(
+        update(RefreshTokenFamily)
+        .where(RefreshTokenFamily.user_id == user_id, RefreshTokenFamily.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .returning(RefreshTokenFamily.family_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    invalidate_auth_state(user_id)
+    for family_id in revoked:
+        _revoked_families.set(family_id, True)
+    return len(revoked)
+
+
+def purge_expired_families(db: Session, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete families past their expiry (revoked ones included; their tokens have expired too)."""
+    return delete_in_batches(
+        db, RefreshTokenFamily, RefreshTokenFamily.family_id,
+        RefreshTokenFamily.expires_at <= datetime.utcnow(), batch_size,
+    )
@@ -0,0 +1,132 @@
+import asyncio
+import inspect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# After a failed initialization, get() fails fast until the backoff expires
+# (doubling per consecutive failure, up to the max) instead of retrying inline
+SERVICE_RETRY_BASE_SECONDS = float(os.getenv("SERVICE_RETRY_BASE_SECONDS", "5"))
+SERVICE_RETRY_MAX_SECONDS = float(os.getenv("SERVICE_RETRY_MAX_SECONDS", "300"))
+
+
+@dataclass
+class _Service:
+    name: str
+    factory: Callable[[], Any]
+    required: bool
+    close: Optional[Callable[[Any], Any]] = None
+    state: str = "pending"  # pending, starting, ready, failed
+    instance: Any = None
+    error: Optional[str] = None
+    init_seconds: Optional[float] = None
+    failures: int = 0
+    retry_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ServiceUnavailable(RuntimeError):
+    """A dependency failed to initialize."""
+
+
+class ServiceRegistry:
+    """
+    External dependencies (database, Firebase, blob storage), each initialized
+    once, on first use or by warm_up() at startup, with per-service state for
+    readiness reporting. A failed dependency is reported, not fatal: the app
+    still starts and serves whatever doesn't need it.
+    """
+
+    def __init__(self):
+        self._services: Dict[str, _Service] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], required: bool = True,
+                 close: Optional[Callable[[Any], Any]] = None) -> None:
+        self._services[name] = _Service(name, factory, required, close)
+
+    def get(self, name: str) -> Any:
+        """
+        The initialized service, initializing it now if nobody has yet. Blocks
+        (on I/O and on another thread's initialization); from async code use
+        aget().
+        """
+        service = self._services[name]
+        if service.state == "failed" and time.monotonic() < service.retry_at:
+            raise ServiceUnavailable(f"{name} is unavailable: {service.error}")
+        if service.state != "ready":
+            self._initialize(service)
+        if service.state != "ready":
+            raise ServiceUnavailable(f"{name} is unavailable: {service.error}")
+        return service.instance
+
+    async def aget(self, name: str) -> Any:
+        """get() for the event loop: returns at once when ready, otherwise waits in a worker thread."""
+        service = self._services[name]
+        if service.state == "ready":
+            return service.instance
+        return await asyncio.to_thread(self.get, name)
+
+    def _initialize(self, service: _Service) -> None:
+        with service.lock:
+            if service.state == "ready":
+                return
+            if service.state == "failed" and time.monotonic() < service.retry_at:
+                return  # another caller just failed while we waited for the lock
+            service.state = "starting"
+            started = time.perf_counter()
+            try:
+                service.instance = service.factory()
+                service.state, service.error = "ready", None
+                service.failures = 0
+            except Exception as e:
+                service.state, service.error = "failed", f"{type(e).__name__}: {e}"
+                service.failures += 1
+                backoff = min(SERVICE_RETRY_BASE_SECONDS * 2 ** (service.failures - 1), SERVICE_RETRY_MAX_SECONDS)
+                service.retry_at = time.monotonic() + backoff
+                logger.warning("%s failed to initialize: %s", service.name, service.error)
+            service.init_seconds = round(time.perf_counter() - started, 4)
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        """Initialize services in parallel worker threads (their setup is blocking I/O)."""
+        pending = [s for s in self._services.values()
+                   if (names is None or s.name in names) and s.state != "ready"]
+        await asyncio.gather(*(asyncio.to_thread(self._initialize, s) for s in pending))
+
+    def retry_failed(self) -> None:
+        """Retry every failed service now, ignoring the backoff."""
+        for service in self._services.values():
+            if service.state == "failed":
+                service.retry_at = 0.0
+                self._initialize(service)
+
+    def report(self) -> Dict[str, Any]:
+        services = {
+            s.name: {
+                "state": s.state,
+                "required": s.required,
+                "init_seconds": s.init_seconds,
+                **({"error": s.error} if s.error else {}),
+            }
+            for s in self._services.values()
+        }
+        ready = all(s.state == "ready" for s in self._services.values() if s.required)
+        return {"ready": ready, "services": services}
+
+    async def close(self) -> None:
+        """Release ready services at shutdown; close hooks may be sync or async."""
+        for service in self._services.values():
+            if service.state == "ready" and service.close is not None:
+                try:
+                    result = service.close(service.instance)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.warning("Error closing %s: %s", service.name, e)
+
+
+registry = ServiceRegistry()
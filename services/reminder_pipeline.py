@@ -0,0 +1,91 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, Session
+
+from models import Invoice, Student
+from services.notification_dispatcher import has_fcm_token
+
+# Reminder windows, in days relative to the invoice due date
+UPCOMING_DAYS = 3
+LATE_DAYS = 2
+
+# Push title for payment reminders and late notices
+REMINDER_TITLE = "AADA Payment Reminder"
+
+
+def load_actionable_invoices(
+    db: Session,
+    today: date,
+    include_square_sync: bool = True,
+    require_fcm_token: bool = False,
+) -> List[Tuple[Invoice, Student]]:
+    """
+    Load the (invoice, student) pairs that need action today: unpaid invoices
+    (status other than PAID) due in exactly UPCOMING_DAYS days with no reminder
+    sent, or at least LATE_DAYS days overdue with no late notice sent, plus any
+    unpaid invoice with a Square invoice ID when include_square_sync is set.
+    With require_fcm_token, students without a usable push token (NULL or "")
+    are left out. Ordered by invoice id.
+    """
+    return actionable_invoices_query(db, today, include_square_sync, require_fcm_token).all()
+
+
+def actionable_invoices_query(
+    db: Session,
+    today: date,
+    include_square_sync: bool = True,
+    require_fcm_token: bool = False,
+) -> Query:
+    """
+    Select, in one query, the unpaid invoices (joined to their student) that need
+    action today:
+      - due in exactly UPCOMING_DAYS days and no reminder sent yet
+      - LATE_DAYS+ days overdue and no late notice sent yet
+      - carrying a Square invoice ID, so their PAID status can be synced
+        (only when include_square_sync is set)
+    """
+    upcoming = and_(
+        Invoice.due_date == today + timedelta(days=UPCOMING_DAYS),
+        Invoice.reminder_sent.is_(False),
+    )
+    late = and_(
+        Invoice.due_date <= today - timedelta(days=LATE_DAYS),
+        Invoice.late_notice_sent.is_(False),
+    )
+    conditions = [upcoming, late]
+    if include_square_sync:
+        conditions.append(Invoice.square_invoice_id.isnot(None))
+
+    query = (
+        db.query(Invoice, Student)
+          .join(Student, Student.id == Invoice.student_id)
+          .filter(Invoice.status != "PAID")
+          .filter(or_(*conditions))
+    )
+    if require_fcm_token:
+        query = query.filter(has_fcm_token(Student.fcm_token))
+
+    return query.order_by(Invoice.id)
+
+
+def is_upcoming(inv: Invoice, today: date) -> bool:
+    return not inv.reminder_sent and inv.due_date == today + timedelta(days=UPCOMING_DAYS)
+
+
+def is_late(inv: Invoice, today: date) -> bool:
+    return not inv.late_notice_sent and inv.due_date <= today - timedelta(days=LATE_DAYS)
+
+
+def bulk_update_invoices(db: Session, invoice_ids: Iterable[int], **values) -> int:
+    """Apply one UPDATE to every invoice in invoice_ids. Does not commit."""
+    ids = list(invoice_ids)
+    if not ids:
+        return 0
+    values.setdefault("updated_at", datetime.utcnow())
+    return (
+        db.query(Invoice)
+          .filter(Invoice.id.in_(ids))
+          .update({getattr(Invoice, k): v for k, v in values.items()}, synchronize_session=False)
+    )
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from models import ExternshipStatus, PaymentPlan, Student
+from services.ttl_cache import TTLCache
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()  # memory, redis, off
+# With the memory backend a write is only seen by the worker that made it, so
+# other workers can serve the old body for up to this long
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "120"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# (etag, body)
+Entry = Tuple[str, bytes]
+
+
+class MemoryCacheBackend:
+    """Per-process LRU with per-entry TTL."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self._cache = TTLCache(maxsize=maxsize, ttl=RESPONSE_CACHE_TTL)
+
+    async def get(self, namespace: str, key: Hashable) -> Optional[Entry]:
+        return self._cache.get((namespace, key))
+
+    async def set(self, namespace: str, key: Hashable, entry: Entry, ttl: float) -> None:
+        self._cache.set((namespace, key), entry, ttl=ttl)
+
+    def invalidate(self, namespace: str, key: Hashable) -> None:
+        self._cache.delete((namespace, key))
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        self._cache.delete_matching(lambda k: k[0] == namespace)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self._cache.hits, "misses": self._cache.misses}
+
+
+class RedisCacheBackend:
+    """
+    Shared across workers and nodes, so a write anywhere is seen everywhere.
+    Each namespace carries a generation number; bumping it invalidates the
+    whole namespace without scanning keys. Requires the ``redis`` package.
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        try:
+            import redis
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package")
+        self._async = aioredis.from_url(url)
+        # Invalidation runs from sync SQLAlchemy events, so it gets a sync client
+        self._sync = redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _gen_key(namespace: str) -> str:
+        return f"rc:{namespace}:gen"
+
+    async def _key(self, namespace: str, key: Hashable) -> str:
+        generation = await self._async.get(self._gen_key(namespace)) or b"0"
+        return f"rc:{namespace}:{generation.decode()}:{key}"
+
+    async def get(self, namespace: str, key: Hashable) -> Optional[Entry]:
+        raw = await self._async.get(await self._key(namespace, key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, _, body = raw.partition(b"\n")
+        return etag.decode(), body
+
+    async def set(self, namespace: str, key: Hashable, entry: Entry, ttl: float) -> None:
+        etag, body = entry
+        await self._async.set(await self._key(namespace, key), etag.encode() + b"\n" + body, px=int(ttl * 1000))
+
+    def invalidate(self, namespace: str, key: Hashable) -> None:
+        generation = self._sync.get(self._gen_key(namespace)) or b"0"
+        self._sync.delete(f"rc:{namespace}:{generation.decode()}:{key}")
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        self._sync.incr(self._gen_key(namespace))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class ResponseCache:
+    """JSON response cache with strong ETags and ORM-driven invalidation."""
+
+    def __init__(self, backend=None, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled and backend is not None
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    @staticmethod
+    def etag_matches(request: Request, etag: str) -> bool:
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        return "*" in candidates or etag in candidates
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        key: Hashable,
+        build: Callable[[], Awaitable[Any]],
+        ttl: float = RESPONSE_CACHE_TTL,
+    ) -> Response:
+        """
+        Serve the cached body for (namespace, key), or build, encode and cache
+        it. Answers 304 with no body when If-None-Match carries the current
+        ETag; exceptions from build (e.g. a 404) propagate and are not cached.
+        """
+        entry = await self.backend.get(namespace, key) if self.enabled else None
+        if entry is None:
+            body = json.dumps(jsonable_encoder(await build()), separators=(",", ":")).encode()
+            entry = (self.make_etag(body), body)
+            if self.enabled:
+                await self.backend.set(namespace, key, entry, ttl)
+
+        etag, body = entry
+        # no-cache: clients may keep the body but must revalidate (cheaply, via the ETag)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if self.etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self, namespace: str, key: Hashable) -> None:
+        if self.enabled:
+            self.backend.invalidate(namespace, key)
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        if self.enabled:
+            self.backend.invalidate_namespace(namespace)
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats() if self.enabled else {}
+
+
+def _make_backend():
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return RedisCacheBackend()
+    if RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend()
+    return None
+
+
+response_cache = ResponseCache(_make_backend())
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Invalidation: which cached responses each model's rows feed
+# ────────────────────────────────────────────────────────────────────────────────
+CACHED_MODELS: Dict[type, Tuple[str, Callable[[Any], Hashable]]] = {
+    Student: ("student", lambda row: row.id),
+    ExternshipStatus: ("externship", lambda row: row.student_id),
+    PaymentPlan: ("payments", lambda row: row.student_id),
+}
+
+
+def _mark_stale(session: Session, namespace: str, key: Optional[Hashable]):
+    session.info.setdefault("response_cache_stale", set()).add((namespace, key))
+
+
+def _on_row_write(mapper, connection, target):
+    namespace, key_of = CACHED_MODELS[mapper.class_]
+    key = key_of(target)
+    response_cache.invalidate(namespace, key)
+    # Again after commit, in case a concurrent request re-cached the old body meanwhile
+    session = object_session(target)
+    if session is not None:
+        _mark_stale(session, namespace, key)
+
+
+for _model in CACHED_MODELS:
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _on_row_write)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_bulk_write(orm_execute_state):
+    # query.update()/delete() skip the mapper events and can touch any row
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in CACHED_MODELS:
+        namespace = CACHED_MODELS[mapper.class_][0]
+        response_cache.invalidate_namespace(namespace)
+        _mark_stale(orm_execute_state.session, namespace, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    stale: Set[Tuple[str, Optional[Hashable]]] = session.info.pop("response_cache_stale", set())
+    for namespace, key in stale:
+        if key is None:
+            response_cache.invalidate_namespace(namespace)
+        else:
+            response_cache.invalidate(namespace, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("response_cache_stale", None)
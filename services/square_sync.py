@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import httpx
+
+# Decide base URL based on environment (SQUARE_BASE_URL overrides, e.g. for a local stub)
+_env = os.getenv("SQUARE_ENVIRONMENT", "sandbox").lower()
+SQUARE_BASE = os.getenv(
+    "SQUARE_BASE_URL",
+    "https://connect.squareup.com" if _env == "production" else "https://connect.squareupsandbox.com",
+)
+SQUARE_VERSION = os.getenv("SQUARE_API_VERSION", "2024-06-12")
+
+# Tuning knobs
+SYNC_CONCURRENCY = int(os.getenv("SQUARE_SYNC_CONCURRENCY", "8"))
+LIST_PAGE_SIZE = 200     # Square's maximum page size for ListInvoices
+LIST_MIN_INVOICES = 50   # Below this, per-invoice lookups are cheaper than paging a location
+
+
+@dataclass
+class SyncStats:
+    """Per-run throughput numbers for an invoice status sync."""
+    invoices_requested: int = 0
+    invoices_resolved: int = 0
+    list_requests: int = 0
+    retrieve_requests: int = 0
+    errors: List[str] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        return self.list_requests + self.retrieve_requests
+
+    @property
+    def invoices_per_second(self) -> float:
+        return self.invoices_resolved / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.invoices_resolved}/{self.invoices_requested} invoices in {self.elapsed_seconds:.2f}s "
+            f"({self.invoices_per_second:.1f} inv/s, {self.requests} requests: "
+            f"{self.list_requests} list + {self.retrieve_requests} retrieve, {len(self.errors)} errors)"
+        )
+
+
+class SquareInvoiceSync:
+    """
+    Fetch Square invoice statuses in bulk.
+
+    Uses one pooled async HTTP client per run. When a location is configured and
+    enough invoices are requested, statuses are pulled from ListInvoices (up to 200
+    per request); anything not found there is retrieved individually, concurrently,
+    bounded by ``concurrency``.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        base_url: str = SQUARE_BASE,
+        api_version: str = SQUARE_VERSION,
+        location_ids: Optional[Sequence[str]] = None,
+        concurrency: int = SYNC_CONCURRENCY,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Square-Version": api_version,
+            "Content-Type": "application/json",
+        }
+        self.location_ids = [loc for loc in (location_ids or []) if loc]
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.transport = transport
+        self.stats = SyncStats()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "SquareInvoiceSync":
+        """Build a sync engine from SQUARE_ACCESS_TOKEN / SQUARE_LOCATION_ID."""
+        token = os.getenv("SQUARE_ACCESS_TOKEN")
+        if not token:
+            raise RuntimeError("Missing SQUARE_ACCESS_TOKEN in environment")
+        locations = os.getenv("SQUARE_LOCATION_ID", "").split(",")
+        kwargs.setdefault("location_ids", [loc.strip() for loc in locations])
+        return cls(token, **kwargs)
+
+    def _client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=limits,
+            transport=self.transport,
+        )
+
+    async def _list_location(
+        self,
+        client: httpx.AsyncClient,
+        location_id: str,
+        wanted: set,
+        statuses: Dict[str, str],
+    ) -> None:
+        """Page through a location's invoices until every wanted ID is found."""
+        cursor = None
+        while True:
+            params = {"location_id": location_id, "limit": LIST_PAGE_SIZE}
+            if cursor:
+                params["cursor"] = cursor
+            try:
+                resp = await client.get("/v2/invoices", params=params)
+                self.stats.list_requests += 1
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                self.stats.errors.append(f"list {location_id}: {e}")
+                return
+
+            try:
+                data = resp.json()
+            except ValueError as e:
+                self.stats.errors.append(f"list {location_id}: invalid JSON: {e}")
+                return
+            for invoice in data.get("invoices", []):
+                invoice_id = invoice.get("id")
+                if invoice_id in wanted:
+                    statuses[invoice_id] = invoice.get("status", "").upper()
+
+            cursor = data.get("cursor")
+            if not cursor or wanted.issubset(statuses):
+                return
+
+    async def _retrieve(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        invoice_id: str,
+        statuses: Dict[str, str],
+    ) -> None:
+        async with semaphore:
+            try:
+                resp = await client.get(f"/v2/invoices/{invoice_id}")
+                self.stats.retrieve_requests += 1
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                self.stats.errors.append(f"{invoice_id}: {e}")
+                return
+        try:
+            invoice = resp.json().get("invoice", {})
+        except ValueError as e:
+            self.stats.errors.append(f"{invoice_id}: invalid JSON: {e}")
+            return
+        statuses[invoice_id] = invoice.get("status", "").upper()
+
+    async def fetch_statuses(self, invoice_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Return a mapping of Square invoice ID -> upper-cased status.
+
+        Invoices that could not be fetched are left out of the result and
+        recorded in ``self.stats.errors``.
+        """
+        wanted = {invoice_id for invoice_id in invoice_ids if invoice_id}
+        self.stats = SyncStats(invoices_requested=len(wanted))
+        statuses: Dict[str, str] = {}
+        started = time.perf_counter()
+
+        async with self._client() as client:
+            # 1) Bulk: list each location's invoices concurrently
+            if self.location_ids and len(wanted) >= LIST_MIN_INVOICES:
+                await asyncio.gather(*(
+                    self._list_location(client, location_id, wanted, statuses)
+                    for location_id in self.location_ids
+                ))
+
+            # 2) Fallback: retrieve whatever is left, bounded by the concurrency limit
+            missing = wanted.difference(statuses)
+            if missing:
+                semaphore = asyncio.Semaphore(self.concurrency)
+                await asyncio.gather(*(
+                    self._retrieve(client, semaphore, invoice_id, statuses)
+                    for invoice_id in missing
+                ))
+
+        self.stats.invoices_resolved = len(statuses)
+        self.stats.elapsed_seconds = time.perf_counter() - started
+        return statuses
+
+    def sync(self, invoice_ids: Iterable[str]) -> Dict[str, str]:
+        """Blocking wrapper around ``fetch_statuses`` for cron jobs and scripts."""
+        return asyncio.run(self.fetch_statuses(invoice_ids))
@@ -0,0 +1,6 @@
+class FileTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds its size limit."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File size exceeds maximum allowed size of {max_size} bytes")
@@ -1,11 +1,37 @@
+import logging
 import os
 import uuid
-from datetime import datetime
-from typing import BinaryIO, Tuple, Optional
-from azure.storage.blob import BlobServiceClient, BlobClient
-from azure.core.exceptions import AzureError
+import base64
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, Tuple, Optional
+from urllib.parse import unquote, urlparse
+from azure.storage.blob import (
+    BlobServiceClient,
+    BlobClient,
+    BlobBlock,
+    BlobLeaseClient,
+    BlobSasPermissions,
+    ContentSettings,
+    generate_blob_sas,
+)
+from azure.core.exceptions import AzureError, HttpResponseError, ResourceNotFoundError
 import mimetypes
 
+from .registry import registry
+from .storage_errors import FileTooLargeError
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Download SAS URLs are signed with an expiry pinned to a time bucket, so every
+# request for the same blob within a bucket reuses one signed URL.
+DOWNLOAD_URL_BUCKET_SECONDS = int(os.getenv("DOWNLOAD_URL_BUCKET_SECONDS", "900"))
+DOWNLOAD_URL_CACHE_SIZE = int(os.getenv("DOWNLOAD_URL_CACHE_SIZE", "10000"))
+# How long a user delegation key is requested for (Azure allows up to 7 days)
+USER_DELEGATION_KEY_HOURS = int(os.getenv("USER_DELEGATION_KEY_HOURS", "48"))
+
 class AzureStorageService:
     def __init__(self):
         self.connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
@@ -14,12 +40,21 @@ class AzureStorageService:
         if not self.connection_string:
             raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable is not set")
 
+        # Async client for streamed uploads, created on first use inside the event loop
+        self._async_blob_service_client = None
+
+        # Signed download URLs and the user delegation key used to sign them
+        self._download_url_cache = TTLCache(maxsize=DOWNLOAD_URL_CACHE_SIZE)
+        self._delegation_key = None
+        self._delegation_key_expiry = None
+        self._delegation_key_lock = threading.Lock()
+
         try:
             self.blob_service_client = BlobServiceClient.from_connection_string(self.connection_string)
             # Create container if it doesn't exist
             self._ensure_container_exists()
         except Exception as e:
-            print(f"Failed to initialize Azure Blob Storage: {e}")
+            logger.error("Failed to initialize Azure Blob Storage: %s", e)
             raise
 
     def _ensure_container_exists(self):
@@ -30,7 +65,7 @@ class AzureStorageService:
         except AzureError as e:
             # Container might already exist
             if "ContainerAlreadyExists" not in str(e):
-                print(f"Warning: Could not create container: {e}")
+                logger.warning("Could not create container: %s", e)
 
     def _generate_blob_name(self, user_id: int, document_type: str, original_filename: str) -> str:
         """Generate a unique blob name for the document."""
@@ -96,13 +131,83 @@ class AzureStorageService:
             # Get the blob URL
             blob_url = blob_client.url
 
-            print(f"Successfully uploaded document: {blob_name}")
+            logger.info("Uploaded document %s", blob_name)
             return blob_name, blob_url
 
         except Exception as e:
-            print(f"Error uploading document: {e}")
+            logger.error("Error uploading document %s: %s", filename, e)
             raise
 
+    def _get_async_client(self):
+        """Lazily create the async BlobServiceClient (one pooled client per process)."""
+        if self._async_blob_service_client is None:
+            from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+            self._async_blob_service_client = AsyncBlobServiceClient.from_connection_string(
+                self.connection_string
+            )
+        return self._async_blob_service_client
+
+    async def upload_document_stream(
+        self,
+        user_id: int,
+        document_type: str,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        max_size: Optional[int] = None
+    ) -> Tuple[str, str, int]:
+        """
+        Stream a document to Azure Blob Storage as staged blocks.
+
+        Each chunk is staged as one block as soon as it arrives, so only one
+        chunk is held in memory at a time, and the block list is committed at
+        the end. Nothing blocks the event loop.
+
+        Args:
+            user_id: The ID of the user uploading the document
+            document_type: Type of document (id, diploma, certificate, etc.)
+            chunks: Async iterator of file chunks
+            filename: Original filename
+            max_size: Abort with FileTooLargeError once this many bytes are exceeded
+
+        Returns:
+            Tuple of (blob_name, blob_url, size_in_bytes)
+        """
+        allowed_extensions = {'.jpg', '.jpeg', '.png', '.pdf', '.doc', '.docx'}
+        file_extension = os.path.splitext(filename)[1].lower()
+        if file_extension not in allowed_extensions:
+            raise ValueError(f"File type {file_extension} not allowed. Allowed types: {allowed_extensions}")
+
+        blob_name = self._generate_blob_name(user_id, document_type, filename)
+        blob_client = self._get_async_client().get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
+
+        block_list = []
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                # Staged blocks that are never committed are discarded by Azure
+                raise FileTooLargeError(max_size)
+            block_id = base64.b64encode(f"{len(block_list):08d}".encode()).decode()
+            await blob_client.stage_block(block_id, chunk, length=len(chunk))
+            block_list.append(BlobBlock(block_id=block_id))
+
+        await blob_client.commit_block_list(
+            block_list,
+            content_settings=ContentSettings(content_type=self._get_content_type(filename))
+        )
+
+        logger.info("Streamed document %s", blob_name, extra={"bytes": size, "blocks": len(block_list)})
+        return blob_name, blob_client.url, size
+
+    async def close(self):
+        """Close the async client's connection pool."""
+        if self._async_blob_service_client is not None:
+            await self._async_blob_service_client.close()
+            self._async_blob_service_client = None
+
     def delete_document(self, blob_name: str) -> bool:
         """
         Delete a document from Azure Blob Storage.
@@ -118,11 +223,18 @@ class AzureStorageService:
                 container=self.container_name,
                 blob=blob_name
             )
-            blob_client.delete_blob()
-            print(f"Successfully deleted document: {blob_name}")
+            try:
+                blob_client.delete_blob()
+            except HttpResponseError as e:
+                if e.error_code != "LeaseIdMissing":
+                    raise
+                # Sealed by seal_upload: break the lease, then delete
+                BlobLeaseClient(blob_client).break_lease(lease_break_period=0)
+                blob_client.delete_blob()
+            logger.info("Deleted document %s", blob_name)
             return True
         except Exception as e:
-            print(f"Error deleting document {blob_name}: {e}")
+            logger.error("Error deleting document %s: %s", blob_name, e)
             return False
 
     def get_document_url(self, blob_name: str) -> str:
@@ -141,10 +253,130 @@ class AzureStorageService:
         )
         return blob_client.url
 
+    def blob_name_from_url(self, blob_url: str) -> str:
+        """Recover the blob name (e.g. user_1/id/2024..._abc.jpg) from a blob URL."""
+        path = unquote(urlparse(blob_url).path).lstrip("/")
+        prefix = f"{self.container_name}/"
+        return path[len(prefix):] if path.startswith(prefix) else path
+
+    def generate_upload_url(
+        self,
+        user_id: int,
+        document_type: str,
+        filename: str,
+        expiry_minutes: int = 15
+    ) -> Tuple[str, str, str, datetime]:
+        """
+        Generate a short-lived, write-only SAS URL for a direct client upload.
+
+        Args:
+            user_id: The ID of the user uploading the document
+            document_type: Type of document (id, diploma, certificate, etc.)
+            filename: Original filename
+            expiry_minutes: How many minutes the URL should be valid
+
+        Returns:
+            Tuple of (blob_name, blob_url, upload_url, expires_at)
+        """
+        blob_name = self._generate_blob_name(user_id, document_type, filename)
+        expires_at = datetime.utcnow() + timedelta(minutes=expiry_minutes)
+
+        sas_token = generate_blob_sas(
+            account_name=self.blob_service_client.account_name,
+            container_name=self.container_name,
+            blob_name=blob_name,
+            permission=BlobSasPermissions(create=True, write=True),
+            expiry=expires_at,
+            **self._sas_credential(expires_at)
+        )
+
+        blob_url = self.get_document_url(blob_name)
+        return blob_name, blob_url, f"{blob_url}?{sas_token}", expires_at
+
+    def seal_upload(self, blob_name: str) -> Optional[Dict[str, object]]:
+        """
+        Lock a directly uploaded blob against further writes and return its
+        properties (None if nothing was uploaded).
+
+        The upload SAS stays valid until it expires, so once /complete has
+        checked the blob, an infinite lease is taken on it: Azure rejects any
+        write that doesn't carry the lease ID, which only this service knows
+        (and never needs: the blob is immutable from here on). The properties
+        are read after the lease, so they describe the content that stays.
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
+        try:
+            blob_client.acquire_lease(lease_duration=-1)
+        except ResourceNotFoundError:
+            return None
+        except HttpResponseError as e:
+            # Already sealed by an earlier /complete attempt
+            if e.error_code != "LeaseAlreadyPresent":
+                raise
+        return self.get_blob_properties(blob_name)
+
+    def get_blob_properties(self, blob_name: str) -> Optional[Dict[str, object]]:
+        """
+        Return the size and content type of an uploaded blob, or None if it does not exist.
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
+        try:
+            props = blob_client.get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        etag = props.etag if props.etag.startswith('"') else f'"{props.etag}"'
+        return {
+            "size": props.size,
+            "content_type": props.content_settings.content_type,
+            "etag": etag,
+            "last_modified": props.last_modified,
+        }
+
+    def iter_blob(self, blob_name: str, offset: Optional[int] = None, length: Optional[int] = None) -> Iterator[bytes]:
+        """Stream a blob (or a byte range of it) in chunks without buffering it whole."""
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name
+        )
+        return blob_client.download_blob(offset=offset, length=length).chunks()
+
+    def _sas_credential(self, expires_at: datetime) -> Dict[str, object]:
+        """
+        Signing credential for a SAS that must stay valid until expires_at.
+
+        Uses the account key when the connection string has one; otherwise a user
+        delegation key, cached and reused until it would expire before the SAS.
+        """
+        account_key = getattr(self.blob_service_client.credential, "account_key", None)
+        if account_key:
+            return {"account_key": account_key}
+
+        with self._delegation_key_lock:
+            if self._delegation_key is None or self._delegation_key_expiry <= expires_at + timedelta(minutes=5):
+                start = datetime.utcnow() - timedelta(minutes=5)
+                expiry = max(
+                    datetime.utcnow() + timedelta(hours=USER_DELEGATION_KEY_HOURS),
+                    expires_at + timedelta(hours=1)
+                )
+                self._delegation_key = self.blob_service_client.get_user_delegation_key(start, expiry)
+                self._delegation_key_expiry = expiry
+            return {"user_delegation_key": self._delegation_key}
+
     def generate_download_url(self, blob_name: str, expiry_hours: int = 24) -> str:
         """
         Generate a temporary download URL with SAS token.
 
+        The expiry is pinned to the end of the current DOWNLOAD_URL_BUCKET_SECONDS
+        bucket plus expiry_hours, and the URL is cached until the bucket ends, so
+        repeated downloads reuse one signature and every URL handed out is valid
+        for at least expiry_hours.
+
         Args:
             blob_name: The name of the blob
             expiry_hours: How many hours the URL should be valid
@@ -152,32 +384,40 @@ class AzureStorageService:
         Returns:
             A temporary URL with SAS token
         """
+        now = time.time()
+        bucket = int(now // DOWNLOAD_URL_BUCKET_SECONDS)
+        cache_key = (blob_name, expiry_hours, bucket)
+        cached = self._download_url_cache.get(cache_key)
+        if cached:
+            return cached
+
         try:
-            from azure.storage.blob import generate_blob_sas, BlobSasPermissions
-            from datetime import timedelta
+            bucket_end = (bucket + 1) * DOWNLOAD_URL_BUCKET_SECONDS
+            expires_at = datetime.utcfromtimestamp(bucket_end) + timedelta(hours=expiry_hours)
 
             # Generate SAS token
             sas_token = generate_blob_sas(
                 account_name=self.blob_service_client.account_name,
                 container_name=self.container_name,
                 blob_name=blob_name,
-                account_key=self.blob_service_client.credential.account_key,
                 permission=BlobSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(hours=expiry_hours)
+                expiry=expires_at,
+                **self._sas_credential(expires_at)
             )
 
-            # Get blob URL with SAS token
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            return f"{blob_client.url}?{sas_token}"
+            url = f"{self.get_document_url(blob_name)}?{sas_token}"
+            self._download_url_cache.set(cache_key, url, ttl=bucket_end - now)
+            return url
 
         except Exception as e:
-            print(f"Error generating download URL: {e}")
+            logger.error("Error generating download URL: %s", e)
             # Return the regular URL as fallback
             return self.get_document_url(blob_name)
 
+    def ping(self, timeout: int = 3) -> None:
+        """Cheap round trip to the storage account (raises if unreachable or unauthorized)."""
+        self.blob_service_client.get_container_client(self.container_name).get_container_properties(timeout=timeout)
+
     def list_user_documents(self, user_id: int) -> list:
         """
         List all documents for a specific user.
@@ -193,20 +433,50 @@ class AzureStorageService:
             blob_list = container_client.list_blobs(name_starts_with=f"user_{user_id}/")
             return [blob.name for blob in blob_list]
         except Exception as e:
-            print(f"Error listing documents for user {user_id}: {e}")
+            logger.error("Error listing documents for user %s: %s", user_id, e)
             return []
 
-# Global instance - use mock service for testing if Azure is not configured
-try:
-    if os.getenv("AZURE_STORAGE_CONNECTION_STRING") and "PLACEHOLDER_KEY" not in os.getenv("AZURE_STORAGE_CONNECTION_STRING", ""):
-        storage_service = AzureStorageService()
-        print("✅ Using Azure Blob Storage")
-    else:
+def azure_storage_configured() -> bool:
+    connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING", "")
+    return bool(connection_string) and "PLACEHOLDER_KEY" not in connection_string
+
+def create_storage_service():
+    """Azure Blob Storage when configured, otherwise (or if Azure fails to initialize) mock storage."""
+    try:
+        if azure_storage_configured():
+            service = AzureStorageService()
+            logger.info("Using Azure Blob Storage")
+            return service
+        from .mock_storage_service import mock_storage_service
+        logger.info("Using Mock Storage Service for testing")
+        return mock_storage_service
+    except Exception as e:
+        logger.warning("Storage service initialization failed: %s", e)
         from .mock_storage_service import mock_storage_service
-        storage_service = mock_storage_service
-        print("🧪 Using Mock Storage Service for testing")
-except Exception as e:
-    print(f"⚠️  Storage service initialization failed: {e}")
-    from .mock_storage_service import mock_storage_service
-    storage_service = mock_storage_service
-    print("🧪 Falling back to Mock Storage Service")
\ No newline at end of file
+        logger.warning("Falling back to Mock Storage Service")
+        return mock_storage_service
+
+class _LazyStorageService:
+    """
+    Stands in for the storage service so importing this module makes no network
+    calls. The real service (client construction, container check) is built by
+    the service registry at startup warm-up or on first use.
+    """
+
+    def __getattr__(self, name):
+        # Blocks until the service is ready: fine from sync handlers (threadpool),
+        # but async code must use `await get_storage_service()` instead
+        return getattr(registry.get("storage"), name)
+
+    def __bool__(self):
+        return True
+
+registry.register("storage", create_storage_service, close=lambda service: service.close())
+
+# Global instance - use mock service for testing if Azure is not configured
+storage_service = _LazyStorageService()
+
+
+async def get_storage_service():
+    """The storage service, for async code: never blocks the event loop on its initialization."""
+    return await registry.aget("storage")
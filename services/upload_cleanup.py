@@ -0,0 +1,48 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from models import Document
+
+logger = logging.getLogger(__name__)
+
+# A direct upload whose URL expired this long ago without /complete is abandoned
+ABANDONED_UPLOAD_HOURS = float(os.getenv("ABANDONED_UPLOAD_HOURS", "24"))
+CLEANUP_BATCH_SIZE = int(os.getenv("UPLOAD_CLEANUP_BATCH_SIZE", "500"))
+
+
+def purge_abandoned_uploads(db: Session, storage, older_than_hours: float = ABANDONED_UPLOAD_HOURS,
+                            batch_size: int = CLEANUP_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Delete documents rows still in upload_status "uploading" that were
+    started more than older_than_hours ago, with whatever blob was partly
+    uploaded for them. A batch per transaction. The blob is deleted before its
+    row, so a failure leaves a row to retry rather than an orphaned blob.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    counts = {"documents": 0, "blobs": 0}
+    while True:
+        rows = db.execute(
+            select(Document.id, Document.file_url)
+            .where(Document.upload_status == "uploading", Document.uploaded_at < cutoff)
+            .order_by(Document.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return counts
+        for _, file_url in rows:
+            if storage.delete_document(storage.blob_name_from_url(file_url)):
+                counts["blobs"] += 1
+        counts["documents"] += db.execute(
+            delete(Document)
+            .where(Document.id.in_([row.id for row in rows]), Document.upload_status == "uploading")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        logger.info("Purged %d abandoned uploads", len(rows))
+        if len(rows) < batch_size:
+            return counts
@@ -0,0 +1,50 @@
+"""
+Size limit for multipart upload endpoints, applied before the body is read.
+
+Starlette parses a multipart form in full before the handler runs, spooling
+the file part to a temporary file (to disk past 1MB), so a check in the
+handler only happens after an oversized upload has been received and
+written out. This middleware rejects it from the Content-Length header
+instead, before any of the body is read; the server never reads past
+Content-Length, so the declared size bounds what is spooled.
+"""
+from typing import Dict
+
+from starlette.responses import JSONResponse
+
+# Allowance for the multipart boundaries, part headers and small form fields
+# that travel with the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Answers 413 (or 411 without a Content-Length) for POSTs to ``limits``' paths over their byte limit."""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.limits:
+            return await self.app(scope, receive, send)
+
+        limit = self.limits[scope["path"]]
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                content_length = value
+                break
+
+        if content_length is None:
+            # Chunked bodies can't be checked up front
+            response = JSONResponse({"detail": "Content-Length required"}, status_code=411)
+        elif not content_length.isdigit():
+            response = JSONResponse({"detail": "Invalid Content-Length"}, status_code=400)
+        elif int(content_length) > limit:
+            response = JSONResponse(
+                {"detail": f"Upload exceeds maximum allowed size of {limit // (1024 * 1024)}MB"},
+                status_code=413,
+            )
+        else:
+            return await self.app(scope, receive, send)
+        await response(scope, receive, send)
@@ -0,0 +1,79 @@
+"""
+Test setup: the app runs against a throwaway SQLite file (sync engine via
+pysqlite, async engine via aiosqlite), so database.py and main.py must see
+these settings before they are first imported.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="aada-tests-")
+_db_path = os.path.join(_db_dir, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+os.environ["STARTUP_WARMUP"] = "off"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_BACKEND"] = "off"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+# Documents go to the local mock storage backend
+os.environ.pop("AZURE_STORAGE_CONNECTION_STRING", None)
+
+import pytest
+from fastapi.testclient import TestClient
+
+import auth_utils
+from auth_utils import create_access_token, token_claims
+from database import Base, SessionLocal, engine
+from models import User
+
+
+@pytest.fixture(scope="session")
+def app():
+    Base.metadata.create_all(engine)
+    import main
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    # One client (one event loop) for the session, so pooled aiosqlite
+    # connections are always used from the loop that opened them
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(app):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def _clear_auth_state_cache():
+    # Budgets count the auth state lookup; don't let an earlier test warm it
+    auth_utils._auth_state_cache.clear()
+    yield
+
+
+_user_seq = 0
+
+
+@pytest.fixture
+def make_user(db):
+    def make(role: str = "student", **fields) -> User:
+        global _user_seq
+        _user_seq += 1
+        user = User(email=f"user{_user_seq}@example.com", password_hash="x", role=role, **fields)
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(data=token_claims(user))}"}
+    return headers
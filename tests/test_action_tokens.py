@@ -0,0 +1,43 @@
+import pytest
+
+import routers.auth
+from services.action_tokens import EMAIL_VERIFICATION, PASSWORD_RESET, create_action_token
+
+
+@pytest.fixture
+def fast_hash(monkeypatch):
+    # Hashing isn't what these tests are about; keep bcrypt out of them
+    monkeypatch.setattr(routers.auth, "get_password_hash", lambda password: f"hashed:{password}")
+
+
+def test_verification_token_is_single_use(client, db, make_user):
+    user = make_user(is_verified=False)
+    token = create_action_token(user, EMAIL_VERIFICATION)
+
+    assert client.post("/auth/verify-email", json={"token": token}).status_code == 200
+    db.refresh(user)
+    assert user.is_verified
+
+    response = client.post("/auth/verify-email", json={"token": token})
+    assert response.status_code == 400
+
+
+def test_reset_token_is_single_use_and_purpose_bound(client, make_user, fast_hash):
+    user = make_user()
+    token = create_action_token(user, PASSWORD_RESET)
+
+    # A reset token can't verify an email, and that attempt doesn't use it up
+    assert client.post("/auth/verify-email", json={"token": token}).status_code == 400
+
+    body = {"token": token, "new_password": "n3w-Passw0rd!"}
+    assert client.post("/auth/reset-password", json=body).status_code == 200
+    assert client.post("/auth/reset-password", json=body).status_code == 400
+
+
+def test_password_change_revokes_outstanding_reset_links(client, make_user, fast_hash):
+    user = make_user()
+    first = create_action_token(user, PASSWORD_RESET)
+    second = create_action_token(user, PASSWORD_RESET)
+
+    assert client.post("/auth/reset-password", json={"token": first, "new_password": "n3w-Passw0rd!"}).status_code == 200
+    assert client.post("/auth/reset-password", json={"token": second, "new_password": "0ther-Passw0rd!"}).status_code == 400
@@ -0,0 +1,100 @@
+"""The two-phase direct upload flow (upload URL, PUT, /complete) against mock storage."""
+from urllib.parse import urlsplit
+
+import pytest
+
+PDF = b"%PDF-1.4 test document"
+
+
+def local(url: str) -> str:
+    """Path and query of a mock storage URL, for the test client."""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}"
+
+
+@pytest.fixture
+def student_headers(make_user, auth_headers):
+    return auth_headers(make_user())
+
+
+def start_upload(client, headers, file_name="diploma.pdf", **fields):
+    response = client.post("/documents/upload-url",
+                           json={"document_type": "diploma", "file_name": file_name, **fields}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_upload_complete_download(client, student_headers):
+    started = start_upload(client, student_headers)
+    document_id = started["document_id"]
+
+    # Not visible until completed
+    assert client.get(f"/documents/{document_id}", headers=student_headers).status_code == 404
+
+    put = client.put(local(started["upload_url"]), content=PDF, headers=started["headers"])
+    assert put.status_code == 201
+
+    completed = client.post(f"/documents/{document_id}/complete", headers=student_headers)
+    assert completed.status_code == 200
+    assert completed.json()["file_size"] == len(PDF)
+    assert client.get(f"/documents/{document_id}", headers=student_headers).status_code == 200
+
+    download = client.get(f"/documents/{document_id}/download", headers=student_headers, follow_redirects=False)
+    assert download.status_code in (302, 307)
+    blob = client.get(local(download.headers["location"]))
+    assert blob.status_code == 200 and blob.content == PDF
+
+
+def test_upload_url_cannot_overwrite_completed_blob(client, student_headers):
+    started = start_upload(client, student_headers)
+    client.put(local(started["upload_url"]), content=PDF, headers=started["headers"])
+    assert client.post(f"/documents/{started['document_id']}/complete", headers=student_headers).status_code == 200
+
+    overwrite = client.put(local(started["upload_url"]), content=b"x" * 100, headers=started["headers"])
+
+    assert overwrite.status_code == 412
+
+
+def test_complete_before_upload_is_rejected(client, student_headers):
+    started = start_upload(client, student_headers)
+
+    response = client.post(f"/documents/{started['document_id']}/complete", headers=student_headers)
+
+    assert response.status_code == 400
+
+
+def test_wrong_content_type_discards_upload(client, student_headers):
+    started = start_upload(client, student_headers)
+    client.put(local(started["upload_url"]), content=b"<html>", headers={"Content-Type": "text/html"})
+
+    response = client.post(f"/documents/{started['document_id']}/complete", headers=student_headers)
+
+    assert response.status_code == 415
+    # The pending document is gone; the client starts over
+    again = client.post(f"/documents/{started['document_id']}/complete", headers=student_headers)
+    assert again.status_code == 404
+
+
+def test_upload_url_signature_is_checked(client, student_headers):
+    started = start_upload(client, student_headers)
+    url = local(started["upload_url"])
+
+    assert client.put(url.replace("sig=", "sig=0"), content=PDF).status_code == 403
+    # A read URL can't be forged from an upload URL
+    assert client.get(url).status_code == 403
+
+
+def test_declared_size_over_limit_is_rejected(client, student_headers):
+    response = client.post("/documents/upload-url",
+                           json={"document_type": "diploma", "file_name": "big.pdf", "file_size": 10 ** 10},
+                           headers=student_headers)
+    assert response.status_code == 413
+
+
+def test_other_users_cannot_complete(client, student_headers, make_user, auth_headers):
+    started = start_upload(client, student_headers)
+    client.put(local(started["upload_url"]), content=PDF, headers=started["headers"])
+
+    response = client.post(f"/documents/{started['document_id']}/complete", headers=auth_headers(make_user()))
+
+    assert response.status_code == 404
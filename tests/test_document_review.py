@@ -0,0 +1,20 @@
+from models import Notification, NotificationOutbox, UserProfile
+from services.document_review import ReviewedDocument, notify_reviewed
+
+
+def test_notify_reviewed_skips_missing_and_blank_push_tokens(db, make_user):
+    db.query(NotificationOutbox).delete()
+    users = [make_user() for _ in range(3)]
+    for user, token in zip(users, ["tok-review", "", None]):
+        db.add(UserProfile(user_id=user.id, first_name="A", last_name="B", fcm_token=token))
+    db.commit()
+
+    reviewed = [ReviewedDocument(n, user.id, "id_card", "approved") for n, user in enumerate(users, 1)]
+    reviewed.append(ReviewedDocument(10, users[0].id, "transcript", "rejected"))
+    counts = notify_reviewed(db, reviewed)
+    db.commit()
+
+    assert counts == {"notifications": 3, "pushes": 1}
+    assert [row.token for row in db.query(NotificationOutbox)] == ["tok-review"]
+    message = db.query(Notification.message).filter(Notification.user_id == users[0].id).scalar()
+    assert message == "Your documents were reviewed: 1 approved (id_card); 1 rejected (transcript)."
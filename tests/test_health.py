@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+import services.health
+from services.health import Probe
+
+
+def ok():
+    pass
+
+
+def down():
+    raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    def use(*probes):
+        monkeypatch.setattr(services.health, "PROBES", list(probes))
+    return use
+
+
+def test_ready_when_only_optional_probe_fails(client, probes):
+    probes(Probe("database", ok), Probe("fcm", down, required=False))
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["fcm"]["ok"] is False
+    assert body["checks"]["fcm"]["error"] == "ConnectionError: connection refused"
+
+
+def test_required_probe_failure_returns_503(client, probes):
+    probes(Probe("database", down), Probe("storage", ok))
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "unavailable"
+    assert body["checks"]["database"]["ok"] is False
+    assert body["checks"]["storage"]["ok"] is True
+
+
+def test_slow_probe_times_out_as_failed(client, probes):
+    probes(Probe("storage", lambda: time.sleep(0.5), timeout=0.05))
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["storage"]["error"] == "timed out after 0.05s"
+
+
+def test_probe_results_are_cached(client, probes):
+    calls = []
+    probes(Probe("database", lambda: calls.append(1)))
+    for _ in range(3):
+        assert client.get("/health/ready").status_code == 200
+    assert len(calls) == 1
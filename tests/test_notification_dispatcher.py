@@ -0,0 +1,78 @@
+from typing import List, Sequence
+
+from models import Student, UserProfile
+from services.notification_dispatcher import (
+    NotificationDispatcher,
+    PushMessage,
+    SendResult,
+    clear_invalid_tokens,
+)
+
+
+class FakeTransport:
+    """Answers each token from a fixed table; unknown tokens succeed."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.batches: List[int] = []
+
+    def send_batch(self, messages: Sequence[PushMessage]) -> List[SendResult]:
+        self.batches.append(len(messages))
+        results = []
+        for m in messages:
+            if m.token in self.errors:
+                code, error = self.errors[m.token]
+                results.append(SendResult(m.token, False, error_code=code, error=error))
+            else:
+                results.append(SendResult(m.token, True, message_id=f"msg-{m.token}"))
+        return results
+
+
+def test_dispatch_batches_and_classifies_token_errors():
+    transport = FakeTransport({
+        "gone": ("UNREGISTERED", "Requested entity was not found."),
+        "other-project": ("SENDER_ID_MISMATCH", "SenderId mismatch"),
+        "garbled": ("INVALID_ARGUMENT", "The registration token is not a valid FCM registration token"),
+        "big-payload": ("INVALID_ARGUMENT", "Message payload exceeds the maximum size"),
+        "flaky": ("UNAVAILABLE", "Service unavailable"),
+    })
+    tokens = ["gone", "other-project", "garbled", "big-payload", "flaky"] + [f"ok-{n}" for n in range(7)]
+    dispatcher = NotificationDispatcher(transport, batch_size=5, concurrency=2)
+
+    report = dispatcher.dispatch(PushMessage(token=t, title="t", body="b") for t in tokens + [""])
+
+    assert sorted(transport.batches) == [2, 5, 5]
+    assert report.sent == 7 and report.failed == 5
+    # A malformed payload or an outage says nothing about the token itself
+    assert report.invalid_tokens == {"gone", "other-project", "garbled"}
+
+
+def test_whole_batch_failure_keeps_tokens():
+    class DownTransport:
+        def send_batch(self, messages):
+            raise ConnectionError("fcm unreachable")
+
+    report = NotificationDispatcher(DownTransport()).dispatch([PushMessage(token="a", title="t", body="b")])
+
+    assert report.failed == 1
+    assert report.results[0].error_code == "UNAVAILABLE"
+    assert report.invalid_tokens == set()
+
+
+def test_clear_invalid_tokens(db, make_user):
+    user = make_user()
+    db.add_all([
+        Student(name="Dead", email="dead-token@example.com", fcm_token="dead"),
+        Student(name="Live", email="live-token@example.com", fcm_token="live"),
+        UserProfile(user_id=user.id, first_name="A", last_name="B", fcm_token="dead"),
+    ])
+    db.commit()
+
+    assert clear_invalid_tokens(db, ["dead", "dead", "never-stored"]) == 2
+    db.commit()
+
+    db.expire_all()
+    tokens = {s.email: s.fcm_token for s in db.query(Student).filter(Student.email.like("%-token@example.com"))}
+    assert tokens == {"dead-token@example.com": None, "live-token@example.com": "live"}
+    assert db.query(UserProfile).filter(UserProfile.user_id == user.id).one().fcm_token is None
+    assert clear_invalid_tokens(db, []) == 0
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import SessionLocal
+from models import NotificationOutbox
+from services import notification_outbox
+from services.notification_dispatcher import NotificationDispatcher, PushMessage, SendResult
+from services.notification_outbox import claim_batch, enqueue_pushes, process_batch
+
+
+class ScriptedTransport:
+    """Fails the tokens listed in ``errors``; ``during_send`` runs before answering."""
+
+    def __init__(self, errors=None, during_send=None):
+        self.errors = errors or {}
+        self.during_send = during_send
+
+    def send_batch(self, messages):
+        if self.during_send:
+            self.during_send()
+        return [
+            SendResult(m.token, False, error_code=self.errors[m.token], error="boom") if m.token in self.errors
+            else SendResult(m.token, True, message_id=f"msg-{m.token}")
+            for m in messages
+        ]
+
+
+@pytest.fixture(autouse=True)
+def _empty_outbox(db):
+    db.query(NotificationOutbox).delete()
+    db.commit()
+
+
+def enqueue(db, *tokens):
+    enqueue_pushes(db, [PushMessage(token=t, title="Reminder", body="Due soon") for t in tokens])
+    db.commit()
+
+
+def rows_by_token(db):
+    db.expire_all()
+    return {row.token: row for row in db.query(NotificationOutbox)}
+
+
+def test_enqueue_skips_rows_without_token(db):
+    enqueue(db, "a", "", "b")
+    assert set(rows_by_token(db)) == {"a", "b"}
+
+
+def test_claim_leases_rows(db):
+    enqueue(db, "a", "b", "c")
+
+    claimed = claim_batch(db, limit=2)
+
+    assert [c["message"].token for c in claimed] == ["a", "b"]
+    rows = rows_by_token(db)
+    assert rows["a"].status == "sending" and rows["a"].attempts == 1
+    assert rows["a"].next_attempt_at > datetime.utcnow()
+    # Leased rows are not handed out again; the rest are
+    assert [c["message"].token for c in claim_batch(db)] == ["c"]
+    assert claim_batch(db) == []
+
+
+def test_expired_lease_is_reclaimed(db):
+    enqueue(db, "a")
+    claim_batch(db)
+    # The worker died mid-send; its lease runs out
+    row = rows_by_token(db)["a"]
+    row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    claimed = claim_batch(db)
+
+    assert [c["attempts"] for c in claimed] == [2]
+
+
+def test_process_batch_records_outcomes(db, monkeypatch):
+    monkeypatch.setattr(notification_outbox, "OUTBOX_MAX_ATTEMPTS", 5)
+    enqueue(db, "ok", "gone", "flaky")
+    dispatcher = NotificationDispatcher(ScriptedTransport({"gone": "UNREGISTERED", "flaky": "UNAVAILABLE"}))
+
+    assert process_batch(db, dispatcher) == 3
+
+    rows = rows_by_token(db)
+    assert rows["ok"].status == "sent" and rows["ok"].message_id == "msg-ok" and rows["ok"].locked_at is None
+    assert rows["gone"].status == "failed" and rows["gone"].last_error.startswith("UNREGISTERED")
+    assert rows["flaky"].status == "pending" and rows["flaky"].locked_at is None
+    assert rows["flaky"].next_attempt_at > datetime.utcnow()
+
+
+def test_retries_stop_at_max_attempts(db, monkeypatch):
+    monkeypatch.setattr(notification_outbox, "OUTBOX_MAX_ATTEMPTS", 1)
+    enqueue(db, "flaky")
+
+    process_batch(db, NotificationDispatcher(ScriptedTransport({"flaky": "UNAVAILABLE"})))
+
+    assert rows_by_token(db)["flaky"].status == "failed"
+
+
+def test_outcome_skipped_when_lease_was_lost(db):
+    enqueue(db, "a", "b")
+
+    def reclaimed_by_another_worker():
+        # "a"'s lease ran out mid-send and another worker claimed it
+        other = SessionLocal()
+        try:
+            row = other.query(NotificationOutbox).filter_by(token="a").one()
+            row.locked_at = datetime.utcnow() + timedelta(seconds=1)
+            row.attempts += 1
+            other.commit()
+        finally:
+            other.close()
+
+    process_batch(db, NotificationDispatcher(ScriptedTransport(during_send=reclaimed_by_another_worker)))
+
+    rows = rows_by_token(db)
+    assert rows["a"].status == "sending" and rows["a"].attempts == 2
+    assert rows["b"].status == "sent"
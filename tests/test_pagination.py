@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from routers.documents import DOCUMENT_PAGE_ORDER
+from services.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    uploaded_at = datetime(2026, 3, 4, 5, 6, 7, 890)
+    cursor = encode_cursor([uploaded_at, 42])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, DOCUMENT_PAGE_ORDER) == (uploaded_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1]), encode_cursor(["yesterday", 1])])
+def test_bad_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, DOCUMENT_PAGE_ORDER)
+    assert exc.value.status_code == 400
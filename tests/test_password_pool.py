@@ -0,0 +1,54 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from services.password_pool import PasswordPool, PasswordPoolBusy
+
+
+def settled(pool, timeout=5.0):
+    # Done callbacks run on the executor's thread, just after the caller wakes
+    deadline = time.monotonic() + timeout
+    while pool.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pool.stats()["pending"] == 0
+
+
+@pytest.fixture
+def pool():
+    pool = PasswordPool(workers=1, max_pending=2, timeout=30)
+    yield pool
+    pool.shutdown()
+
+
+def test_rejects_jobs_over_the_admission_limit():
+    pool = PasswordPool(workers=1, max_pending=0)
+    with pytest.raises(PasswordPoolBusy):
+        pool.hash("pw")
+    assert pool.stats()["rejected"] == 1
+    assert pool._executor is None
+
+
+def test_timeout_raises_busy(pool):
+    pool.timeout = 0.05
+    with pytest.raises(PasswordPoolBusy):
+        pool._run(time.sleep, 0.5)
+    assert pool.stats()["timed_out"] == 1
+
+
+def test_recovers_from_a_broken_executor(pool):
+    broken = pool._get_executor()
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    assert pool._run(abs, -3) == 3
+    assert pool._executor is not broken
+    assert settled(pool)
+
+
+def test_job_that_keeps_breaking_the_pool_raises_busy(pool):
+    with pytest.raises(PasswordPoolBusy):
+        pool._run(os._exit, 1)
+    assert settled(pool)
+    assert pool._run(abs, -3) == 3
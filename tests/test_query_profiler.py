@@ -0,0 +1,120 @@
+"""
+Query budgets for the hot endpoints, and the profiler behind them.
+
+Each budget counts every statement the request issues, the per-request auth
+state lookup included (the cache is cleared before each test), and fails on
+any N+1 pattern, so a relationship that starts lazy-loading per row shows up
+here rather than in production latency.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from models import Course, Document, Enrollment, ExternshipStatus, PaymentPlan, Student, UserProfile
+from services.query_profiler import QueryBudgetExceeded, assert_query_budget, statement_shape
+
+
+def test_me_budget(client, db, make_user, auth_headers):
+    user = make_user()
+    db.add(UserProfile(user_id=user.id, first_name="Ada", last_name="Lovelace"))
+    db.commit()
+    headers = auth_headers(user)
+
+    # Auth state, then the user with its profile joined
+    with assert_query_budget(2, label="GET /auth/me"):
+        response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Ada"
+
+
+def test_me_with_includes_budget(client, db, make_user, auth_headers):
+    user = make_user()
+    courses = [Course(title=f"Course {n}", duration_weeks=12) for n in range(6)]
+    db.add_all(courses)
+    db.flush()
+    db.add_all(Enrollment(user_id=user.id, course_id=course.id) for course in courses)
+    db.add_all(
+        Document(user_id=user.id, document_type="id", file_name=f"{n}.pdf", file_url=f"{n}.pdf", file_size=1)
+        for n in range(6)
+    )
+    db.commit()
+    headers = auth_headers(user)
+
+    # Plus one query for all enrollments (courses joined) and one grouped count
+    with assert_query_budget(4, label="GET /auth/me?include=..."):
+        response = client.get("/auth/me?include=enrollments,documents_summary", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["enrollments"]) == 6
+    assert all(e["course_title"] for e in body["enrollments"])
+    assert body["documents_summary"]["pending"] == 6
+
+
+def test_pending_documents_budget(client, db, make_user, auth_headers):
+    admin = make_user("admin")
+    owners = [make_user() for _ in range(6)]
+    db.add_all(
+        Document(user_id=owner.id, document_type="diploma", file_name=f"{n}.pdf",
+                 file_url=f"{n}.pdf", file_size=10, uploaded_at=datetime(2026, 1, 1) + timedelta(minutes=n))
+        for n, owner in enumerate(owners * 2)
+    )
+    db.commit()
+    headers = auth_headers(admin)
+
+    # Auth state, the count for X-Total-Count-Estimate, and the page
+    with assert_query_budget(3, label="GET /documents/admin/pending"):
+        first = client.get("/documents/admin/pending?limit=5", headers=headers)
+    assert first.status_code == 200
+    assert len(first.json()) == 5
+    next_cursor = first.headers["X-Next-Cursor"]
+
+    # Later pages skip the count
+    with assert_query_budget(2, label="GET /documents/admin/pending (next page)"):
+        second = client.get(f"/documents/admin/pending?limit=5&cursor={next_cursor}", headers=headers)
+    assert second.status_code == 200
+    assert not {d["id"] for d in first.json()} & {d["id"] for d in second.json()}
+
+
+def test_students_batch_budget(client, db, make_user, auth_headers):
+    admin = make_user("admin")
+    students = [Student(name=f"Student {n}", email=f"batch{n}@example.com") for n in range(20)]
+    db.add_all(students)
+    db.flush()
+    for student in students:
+        db.add_all(PaymentPlan(student_id=student.id, amount=100, due_date=date(2026, month, 1)) for month in (1, 2))
+        db.add(ExternshipStatus(student_id=student.id, status="Pending"))
+    db.commit()
+    student_ids = [s.id for s in students]
+    headers = auth_headers(admin)
+
+    # Auth state plus one query each for students, payment plans and externships
+    with assert_query_budget(4, label="POST /students/batch"):
+        response = client.post("/students/batch", json={"student_ids": student_ids + [0]}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["id"] for r in body["results"]] == student_ids
+    assert all(len(r["payments"]) == 2 for r in body["results"])
+    assert body["not_found"] == [0]
+
+
+def test_budget_reports_n_plus_one(db, make_user):
+    users = [make_user() for _ in range(5)]
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with assert_query_budget(100):
+            for user in users:
+                db.expire(user)
+                user.email
+
+
+
+def test_statement_shape_collapses_values():
+    a = statement_shape("SELECT * FROM users\n  WHERE id IN (1, 2, 3) AND email = 'a@b.c'")
+    b = statement_shape("SELECT * FROM users WHERE id IN (7) AND email = 'it''s'")
+    assert a == b == "SELECT * FROM users WHERE id IN (...) AND email = ?"
+
+
+def test_statement_shape_binds():
+    assert statement_shape("SELECT a FROM t WHERE b = %(b_1)s LIMIT $2") == "SELECT a FROM t WHERE b = ? LIMIT ?"
+    assert statement_shape("SELECT a FROM t WHERE b IN (?, ?, ?)") == "SELECT a FROM t WHERE b IN (...)"
+    # Digits inside identifiers are not literals
+    assert statement_shape("SELECT t1.col2 FROM t1") == "SELECT t1.col2 FROM t1"
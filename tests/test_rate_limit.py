@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from services.rate_limit import MemoryBucketStore, RateLimiter, RateLimitMiddleware, client_ip
+
+
+class Login(BaseModel):
+    email: str
+    password: str
+
+
+def make_client():
+    limiter = RateLimiter(store=MemoryBucketStore(), enabled=True)
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.post("/auth/login")
+    def login(body: Login):
+        limiter.enforce_email("login", body.email)
+        return {"ok": True}
+
+    return TestClient(app), limiter
+
+
+def login(client, email, ip):
+    return client.post("/auth/login", json={"email": email, "password": "pw"},
+                       headers={"X-Forwarded-For": ip})
+
+
+def test_per_email_limit_returns_429_with_retry_after():
+    client, limiter = make_client()
+    # login allows a burst of 5 per account
+    for _ in range(5):
+        assert login(client, "victim@example.com", "10.0.0.1").status_code == 200
+
+    response = login(client, "Victim@Example.com", "10.0.0.2")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    assert login(client, "other@example.com", "10.0.0.2").status_code == 200
+    assert limiter.stats()["login"] == {"allowed": 6, "limited_ip": 0, "limited_email": 1}
+
+
+def test_per_ip_limit_is_applied_before_the_handler():
+    client, limiter = make_client()
+    # login allows a burst of 10 per IP
+    for n in range(10):
+        assert login(client, f"user{n}@example.com", "10.0.0.9").status_code == 200
+
+    response = login(client, "user99@example.com", "10.0.0.9")
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many requests. Please try again later."}
+    assert int(response.headers["Retry-After"]) >= 1
+    assert limiter.stats()["login"] == {"allowed": 10, "limited_ip": 1, "limited_email": 0}
+
+
+def test_client_ip_uses_the_trusted_hop():
+    scope = {"headers": [(b"x-forwarded-for", b"6.6.6.6, 1.2.3.4")], "client": ("10.0.0.1", 1234)}
+    assert client_ip(scope, trusted_hops=1) == "1.2.3.4"
+    assert client_ip(scope, trusted_hops=0) == "10.0.0.1"
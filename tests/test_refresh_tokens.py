@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from auth_utils import verify_token
+from models import RefreshTokenFamily
+from services import refresh_tokens
+from services.refresh_tokens import RefreshTokenError, issue_refresh_token, rotate_refresh_token
+
+
+def _family(db, token):
+    db.expire_all()
+    return db.get(RefreshTokenFamily, verify_token(token, "refresh")["fid"])
+
+
+def test_refresh_rotation(db, make_user):
+    token = issue_refresh_token(db, make_user())
+    db.commit()
+    rotated = rotate_refresh_token(db, verify_token(token, "refresh"))
+    assert verify_token(rotated, "refresh")["jti"] == _family(db, token).current_jti
+
+
+def test_refresh_retry_within_grace_is_not_reuse(db, make_user):
+    token = issue_refresh_token(db, make_user())
+    db.commit()
+    rotate_refresh_token(db, verify_token(token, "refresh"))
+
+    with pytest.raises(RefreshTokenError) as exc:
+        rotate_refresh_token(db, verify_token(token, "refresh"))
+    assert not exc.value.reused
+    assert _family(db, token).revoked_at is None
+
+
+def test_refresh_reuse_revokes_family(db, make_user, monkeypatch):
+    monkeypatch.setattr(refresh_tokens, "REFRESH_REUSE_GRACE_SECONDS", 0)
+    token = issue_refresh_token(db, make_user())
+    db.commit()
+    rotated = rotate_refresh_token(db, verify_token(token, "refresh"))
+    time.sleep(0.01)
+
+    with pytest.raises(RefreshTokenError) as exc:
+        rotate_refresh_token(db, verify_token(token, "refresh"))
+    assert exc.value.reused
+    assert _family(db, token).revoked_at is not None
+
+    # The legitimate holder's newer token dies with the family
+    with pytest.raises(RefreshTokenError):
+        rotate_refresh_token(db, verify_token(rotated, "refresh"))
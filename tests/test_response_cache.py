@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+
+from models import Student
+from services.response_cache import MemoryCacheBackend, response_cache
+
+_seq = itertools.count()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # The suite runs with the cache off; turn the shared instance on with a fresh backend
+    monkeypatch.setattr(response_cache, "backend", MemoryCacheBackend())
+    monkeypatch.setattr(response_cache, "enabled", True)
+    return response_cache
+
+
+@pytest.fixture
+def student(db):
+    student = Student(name="Ada", email=f"cached{next(_seq)}@example.com")
+    db.add(student)
+    db.commit()
+    return student
+
+
+def test_matching_etag_gets_304(client, cache, student):
+    first = client.get(f"/students/{student.id}")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    second = client.get(f"/students/{student.id}", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+    assert cache.stats()["hits"] == 1
+
+    assert client.get(f"/students/{student.id}", headers={"If-None-Match": 'W/"other", ' + etag}).status_code == 304
+    assert client.get(f"/students/{student.id}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_row_update_invalidates(client, db, cache, student):
+    etag = client.get(f"/students/{student.id}").headers["ETag"]
+
+    student.name = "Ada Lovelace"
+    db.commit()
+
+    response = client.get(f"/students/{student.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Ada Lovelace"
+    assert response.headers["ETag"] != etag
+
+
+def test_bulk_update_invalidates_namespace(client, db, cache, student):
+    etag = client.get(f"/students/{student.id}").headers["ETag"]
+
+    db.query(Student).filter(Student.id == student.id).update({Student.enrollment_status: "Enrolled"})
+    db.commit()
+
+    response = client.get(f"/students/{student.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["enrollment_status"] == "Enrolled"
+
+
+def test_errors_are_not_cached(client, cache):
+    assert client.get("/students/999999").status_code == 404
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,64 @@
+import httpx
+import pytest
+
+from benchmarks import square_stub
+from services.square_sync import SquareInvoiceSync
+
+
+@pytest.fixture(autouse=True)
+def _no_stub_latency(monkeypatch):
+    monkeypatch.setattr(square_stub, "STUB_LATENCY_MS", 0)
+
+
+def make_sync(transport=None, **kwargs) -> SquareInvoiceSync:
+    return SquareInvoiceSync(
+        "test-token",
+        base_url="http://square.test",
+        transport=transport or httpx.ASGITransport(app=square_stub.app),
+        **kwargs,
+    )
+
+
+def test_bulk_sync_pages_locations():
+    ids = [square_stub.invoice_id(n) for n in range(60)]
+    sync = make_sync(location_ids=[square_stub.STUB_LOCATION_ID])
+
+    statuses = sync.sync(ids)
+
+    assert statuses == {i: ("PAID" if n % 2 == 0 else "UNPAID") for n, i in enumerate(ids)}
+    # One ListInvoices page covers them all; nothing is retrieved one by one
+    assert sync.stats.list_requests == 1
+    assert sync.stats.retrieve_requests == 0
+    assert sync.stats.errors == []
+
+
+def test_small_sync_retrieves_individually():
+    sync = make_sync(location_ids=[square_stub.STUB_LOCATION_ID])
+
+    statuses = sync.sync(["inv_000002", "inv_000003", "missing", None])
+
+    assert statuses == {"inv_000002": "PAID", "inv_000003": "UNPAID"}
+    assert sync.stats.list_requests == 0
+    assert sync.stats.retrieve_requests == 3
+    assert len(sync.stats.errors) == 1 and sync.stats.errors[0].startswith("missing:")
+
+
+def test_list_falls_back_to_retrieve_for_unlisted_invoices():
+    ids = [square_stub.invoice_id(n) for n in range(55)]
+    sync = make_sync(location_ids=["OTHER_LOCATION"])
+
+    statuses = sync.sync(ids)
+
+    assert len(statuses) == 55
+    assert sync.stats.list_requests == 1
+    assert sync.stats.retrieve_requests == 55
+
+
+def test_invalid_json_is_recorded_not_raised():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="<html>gateway</html>"))
+    sync = make_sync(transport)
+
+    statuses = sync.sync(["inv_000001"])
+
+    assert statuses == {}
+    assert "invalid JSON" in sync.stats.errors[0]
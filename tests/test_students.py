@@ -0,0 +1,8 @@
+from routers.students import MAX_BATCH_STUDENTS
+
+
+def test_students_batch_limit(client, make_user, auth_headers):
+    headers = auth_headers(make_user("admin"))
+    response = client.post("/students/batch", json={"student_ids": list(range(MAX_BATCH_STUDENTS + 1))},
+                           headers=headers)
+    assert response.status_code == 422
@@ -0,0 +1,31 @@
+"""Uploads through the API (multipart) to mock storage."""
+from routers.documents import MAX_FILE_SIZE
+
+
+def test_upload_document(client, make_user, auth_headers):
+    response = client.post("/documents/upload", data={"document_type": "id"},
+                           files={"file": ("id.pdf", b"%PDF-1.4 id", "application/pdf")},
+                           headers=auth_headers(make_user()))
+
+    assert response.status_code == 200, response.text
+    assert response.json()["file_size"] == len(b"%PDF-1.4 id")
+
+
+def test_oversized_upload_refused_before_parsing(client, make_user, auth_headers):
+    headers = {**auth_headers(make_user()), "Content-Type": "multipart/form-data; boundary=x",
+               "Content-Length": str(MAX_FILE_SIZE * 2)}
+
+    # Only the declared size is sent; the body is never read
+    response = client.post("/documents/upload", content=b"", headers=headers)
+
+    assert response.status_code == 413
+
+
+def test_upload_without_content_length_refused(client):
+    def chunked():
+        yield b"--x--\r\n"
+
+    response = client.post("/documents/upload-registration", content=chunked(),
+                           headers={"Content-Type": "multipart/form-data; boundary=x"})
+
+    assert response.status_code == 411